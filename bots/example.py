@@ -1,29 +1,33 @@
 import os
+from datetime import timedelta
 
 from silverback import SilverbackBot
 
-from apepay import Stream, StreamManager
+from apepay import AsyncStreamManager, Stream, StreamIndex, StreamManager
 
 bot = SilverbackBot()
-# NOTE: This bot assumes you use a new bot per ApePay deployment
+# NOTE: This bot assumes you use a new bot per ApePay deployment (see `factory.py` otherwise)
 sm = StreamManager(os.environ["APEPAY_CONTRACT_ADDRESS"])
+# NOTE: Use for any reads in handlers, so that RPC calls don't block the event loop
+asm = AsyncStreamManager(sm)
 
 
 @bot.on_startup()
 async def load_db(_):
     # NOTE: You would probably want to index your db by network and deployment address,
     #       if you were operating on multiple networks and/or deployments (for easy lookup)
-    bot.state.db = {
-        stream.id: stream
-        for stream in sm.active_streams()
-    } 
+    # NOTE: Replaying logs is much faster than querying the state of every stream, and with a
+    #       checkpoint only the logs since the last time the bot ran have to be replayed
+    index = StreamIndex(sm, checkpoint=os.environ.get("APEPAY_INDEX_CHECKPOINT"))
+    index.sync()
+    bot.state.db = {stream.id: stream for stream in index.active_streams()}
 
 
 @sm.on_stream_created(bot)
 async def grant_product(stream):
     bot.state.db[stream.id] = stream
     print(f"provisioning products: {stream.products}")
-    return stream.time_left
+    return await asm.wrap(stream).time_left()
 
 
 @sm.on_stream_funded(bot)
@@ -31,11 +35,30 @@ async def update_product_funding(stream):
     # NOTE: properties of stream have changed, you may not need to handle this, but typically you
     #       would want to update `stream.time_left` in db for use in user Stream life notifications
     bot.state.db[stream.id] = stream
-    return stream.time_left
+    return await asm.wrap(stream).time_left()
 
 
 @sm.on_stream_cancelled(bot)
 async def revoke_product(stream):
-    print(f"unprovisioning product for {stream.owner}")
+    print(f"unprovisioning product for {await asm.wrap(stream).owner()}")
     bot.state.db[stream.id] = None
-    return stream.time_left
+    return await asm.wrap(stream).time_left()
+
+
+@sm.on_stream_expired(bot)
+async def expire_product(stream):
+    # NOTE: Only called once the Stream runs out of time, rather than checking every Stream
+    print(f"unprovisioning product for {await asm.wrap(stream).owner()}")
+    bot.state.db[stream.id] = None
+    return stream.id
+
+
+@sm.on_stream_expiring(
+    bot,
+    within=timedelta(hours=24),
+    # NOTE: Remembers which warnings were sent, so they aren't sent again when the bot restarts
+    checkpoint=os.environ.get("APEPAY_INDEX_CHECKPOINT"),
+)
+async def warn_owner(stream):
+    print(f"stream {stream.id} expires in {await asm.wrap(stream).time_left()}")
+    return stream.id
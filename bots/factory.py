@@ -0,0 +1,25 @@
+import os
+
+from ape import chain
+from silverback import SilverbackBot
+
+from apepay import FactoryIndex, StreamFactory
+
+bot = SilverbackBot()
+# NOTE: This bot serves every StreamManager deployed by the factory (defaults to latest release)
+index = FactoryIndex(
+    StreamFactory(os.environ.get("APEPAY_FACTORY_ADDRESS")),
+    checkpoint=os.environ.get("APEPAY_INDEX_CHECKPOINT"),
+)
+
+
+@bot.on_startup()
+async def load_index(_):
+    index.sync()
+
+
+@bot.on_(chain.blocks)
+async def sync_index(block):
+    # NOTE: Logs of all StreamManagers are fetched with a single query, no matter how many
+    num_logs = index.sync(stop_block=block.number)
+    return {"managers": len(index), "logs": num_logs}
@@ -2,72 +2,85 @@ import os
 from collections import defaultdict
 
 from ape import convert
-from ape_ethereum import multicall
 from ape_tokens import tokens
 from silverback import SilverbackBot
 
-from apepay import StreamManager
+from apepay import (
+    AsyncStreamManager,
+    ClaimEngine,
+    ShardedClaimEngine,
+    StreamIndex,
+    StreamManager,
+    StreamRecords,
+    token_registry,
+)
 
 BATCH_SIZE = int(os.environ.get("BATCH_SIZE", 100))
+# NOTE: Split reading Streams across worker processes (connected to the same network as the bot),
+#       if there are many Streams
+NUM_SHARDS = int(os.environ.get("NUM_SHARDS", 1))
 
 bot = SilverbackBot()
 assert bot.signer, "Need a signer for this bot"
 
 sm = StreamManager(os.environ["APEPAY_CONTRACT_ADDRESS"])
+asm = AsyncStreamManager(sm)
 
 # NOTE: Must install `tokens`, then can use e.g. `"100 USDC"`
 MIN_CLAIMS = {
     # NOTE: Defaults to "only claim when expired"
-    token.symbol(): convert(os.environ.get(f"MIN_CLAIM_{token.symbol()}", 2**256 - 1), int)
+    token.address: convert(os.environ.get(f"MIN_CLAIM_{token.symbol()}", 2**256 - 1), int)
     for token in tokens
 }
+engine = (
+    ClaimEngine(sm, min_claims=MIN_CLAIMS, max_batch_size=BATCH_SIZE)
+    if NUM_SHARDS <= 1
+    else ShardedClaimEngine(
+        sm,
+        num_shards=NUM_SHARDS,
+        network_choice=sm.provider.network_choice,
+        min_claims=MIN_CLAIMS,
+        max_batch_size=BATCH_SIZE,
+    )
+)
 
 
 @bot.on_startup()
 async def load_streams(_ss):
-    bot.state.unclaimed_streams = {stream.id: stream for stream in sm.unclaimed_streams()}
+    # NOTE: Replaying logs is much faster than querying the state of every stream
+    index = StreamIndex(sm, checkpoint=os.environ.get("APEPAY_INDEX_CHECKPOINT"))
+    index.sync()
+    # NOTE: Only keep a compact record of each Stream, since there may be very many of them
+    bot.state.unclaimed_streams = StreamRecords.from_index(index, index.unclaimed_streams())
+
+    if checkpoint := os.environ.get("APEPAY_INDEX_CHECKPOINT"):
+        token_registry.persist(checkpoint)
+
+    token_registry.prefill(bot.state.unclaimed_streams.tokens)
 
 
 @sm.on_stream_created(bot)
 async def add_stream(stream):
-    bot.state.unclaimed_streams[stream.id] = stream
+    bot.state.unclaimed_streams.add(stream.id, stream.info)
 
 
 @sm.on_stream_claimed(bot)
 async def check_if_finished(stream):
-    if not stream.is_active:
-        del bot.state.unclaimed_streams[stream.id]
+    if not await asm.wrap(stream).is_active():
+        bot.state.unclaimed_streams.discard(stream.id)
 
 
 @bot.cron(os.environ.get("CLAIM_SCHEDULE", "*/5 * * * *"))
 async def current_revenue(time):
-    unclaimed_streams = iter(bot.state.unclaimed_streams.values())
     total_revenue_collected: dict[str, float] = defaultdict(lambda: 0.0)
 
-    more_streams = True
-    while more_streams:
-        tx = multicall.Transaction()
-
-        while len(tx.calls) < BATCH_SIZE:
-            try:
-                stream = next(unclaimed_streams)
-            except StopIteration:
-                # So we break out of outer `while` loop (after calling `tx`)
-                more_streams = False
-                break  # Break out of inner `while` loop now
-
-            if not stream.is_active:  # NOTE: Always claim inactive streams
-                tx.add(sm.contract.claim_stream, stream.id)
-                claim_amount = stream.info.funded_amount
-
-            elif (claim_amount := stream.amount_claimable) > MIN_CLAIMS[stream.token.symbol()]:
-                tx.add(sm.contract.claim_stream, stream.id)
-
-            total_revenue_collected[stream.token.symbol()] += (
-                claim_amount / 10 ** stream.token.decimals()
-            )
-
-        if len(tx.calls) > 0:
-            tx(sender=bot.signer)
+    # NOTE: Claimable amounts are re-loaded in bulk, and batches are sized by gas used
+    # NOTE: Run in the thread pool, so that the event loop is not blocked while claiming
+    batches = await asm.run(engine.run, bot.signer, list(bot.state.unclaimed_streams))
+    for batch in batches:
+        for token_address, claim_amount in batch.amounts.items():
+            # NOTE: Token metadata is only fetched once per process (or ever, if persisted)
+            token = token_registry[token_address]
+            total_revenue_collected[token.symbol] += claim_amount / 10**token.decimals
 
     return total_revenue_collected
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of iterating over `StreamManager.all_streams()` from async code
+"""
+
+import asyncio
+import time
+
+import click
+from ape.cli import ConnectedProviderCommand, ape_cli_context
+from eth_pydantic_types import HashBytes32
+
+from apepay import StreamManager
+from apepay.utils import async_wrap_iter
+
+
+def deploy_test_manager(cli_ctx, num_streams: int) -> StreamManager:
+    deployer = cli_ctx.account_manager.test_accounts[-1]
+    token = cli_ctx.local_project.TestToken.deploy(sender=deployer)
+    validator = cli_ctx.local_project.TestValidator.deploy(sender=deployer)
+    sm = StreamManager(
+        cli_ctx.local_project.StreamManager.deploy(
+            deployer, 0, [token], [validator], sender=deployer
+        ),
+        # NOTE: Local test providers are typically not thread-safe
+        max_concurrent_calls=1,
+    )
+    decimals = token.decimals()
+    token.DEBUG_mint(deployer, num_streams * 10**decimals, sender=deployer)
+    token.approve(sm.address, 2**256 - 1, sender=deployer)
+    products = [HashBytes32(b"\x00" * 24 + b"\x01" + b"\x00" * 7)]  # ~259.41 tokens/hour
+    for _ in range(num_streams):
+        sm.contract.create_stream(token, 10**decimals, products, sender=deployer)
+
+    return sm
+
+
+async def consume_async(manager: StreamManager, prefetch: int, batch_size: int) -> int:
+    num_items = 0
+    async for _ in async_wrap_iter(manager.all_streams(), prefetch=prefetch, batch_size=batch_size):
+        num_items += 1
+
+    return num_items
+
+
+def measure(label: str, run) -> None:
+    start = time.perf_counter()
+    num_items = run()
+    elapsed = time.perf_counter() - start
+    click.echo(f"{label:>32}: {num_items / elapsed:>10.1f} items/sec ({num_items} items)")
+
+
+@click.command(cls=ConnectedProviderCommand)
+@ape_cli_context()
+@click.option("-n", "--num-streams", default=500, help="Streams to create if no MANAGER given")
+@click.option("-p", "--prefetch", default=2)
+@click.option("-b", "--batch-size", "batch_sizes", type=int, multiple=True, default=[1, 10, 100])
+@click.argument("manager", type=StreamManager, required=False)
+def cli(cli_ctx, num_streams, prefetch, batch_sizes, manager):
+    """Compare items/sec of `all_streams()`, synchronously and wrapped with `async_wrap_iter`"""
+
+    if manager is None:
+        click.echo(f"Deploying test StreamManager with {num_streams} streams...")
+        manager = deploy_test_manager(cli_ctx, num_streams)
+
+    measure("sync", lambda: sum(1 for _ in manager.all_streams()))
+
+    for batch_size in batch_sizes:
+        measure(
+            f"async (prefetch={prefetch}, batch={batch_size})",
+            lambda: asyncio.run(consume_async(manager, prefetch, batch_size)),
+        )
@@ -0,0 +1,78 @@
+"""
+Memory benchmark of keeping many Streams around as `Stream` objects vs. as `StreamRecords`
+"""
+
+import random
+import tracemalloc
+
+import click
+from ape.cli import ConnectedProviderCommand, ape_cli_context
+
+from apepay import Stream, StreamInfo, StreamManager, StreamRecords
+
+START = 1_700_000_000
+
+
+def make_infos(num_streams: int, num_owners: int, num_tokens: int) -> list[StreamInfo]:
+    owners = [f"0x{random.getrandbits(160):040x}" for _ in range(num_owners)]
+    tokens = [f"0x{random.getrandbits(160):040x}" for _ in range(num_tokens)]
+    products = [[random.getrandbits(256).to_bytes(32, "big")] for _ in range(10)]
+    return [
+        StreamInfo(
+            owner=random.choice(owners),
+            token=random.choice(tokens),
+            funded_amount=random.getrandbits(80),
+            expires_at=START + random.getrandbits(24),
+            last_update=START,
+            last_claim=START,
+            products=random.choice(products),
+            block_number=1,
+            timestamp=START,
+        )
+        for _ in range(num_streams)
+    ]
+
+
+def measure(label: str, num_streams: int, build) -> None:
+    tracemalloc.start()
+    try:
+        value = build()
+        size, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    del value
+    click.echo(f"{label:>16}: {size / 2**20:>10.1f} MiB ({size / num_streams:>6.0f} bytes/stream)")
+
+
+@click.command(cls=ConnectedProviderCommand)
+@ape_cli_context()
+@click.option("-n", "--num-streams", default=100_000)
+@click.option("--num-owners", default=10_000)
+@click.option("--num-tokens", default=3)
+@click.argument("manager", type=StreamManager)
+def cli(cli_ctx, num_streams, num_owners, num_tokens, manager):
+    """Compare memory used to hold the (synthetic) state of many Streams of MANAGER"""
+
+    infos = make_infos(num_streams, num_owners, num_tokens)
+
+    def build_streams():
+        streams = {}
+        for stream_id, info in enumerate(infos):
+            stream = Stream(manager=manager, id=stream_id)
+            # NOTE: Copy, so every Stream holds its own snapshot (like when loaded from chain)
+            stream._cache_info(info.model_copy(deep=True), version=0)
+            streams[stream_id] = stream
+
+        return streams
+
+    def build_records():
+        records = StreamRecords(manager)
+        for stream_id, info in enumerate(infos):
+            records.add(stream_id, info.model_copy(deep=True))
+
+        return records
+
+    measure("Stream", num_streams, build_streams)
+    measure("StreamRecords", num_streams, build_records)
@@ -1,8 +1,21 @@
+import asyncio
+import csv
+import json
+import sys
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from decimal import Decimal
+
 import click
 from ape.cli import ConnectedProviderCommand, account_option, network_option
-from ape_ethereum import multicall
 
-from apepay import StreamManager
+from apepay import ClaimEngine, Stream, StreamManager, token_registry
+from apepay.manager import SNAPSHOT_BATCH_SIZE
+from apepay.utils import DEFAULT_PREFETCH, async_wrap_iter
+
+COLUMNS = ["stream_id", "owner", "token", "funded", "claimable", "time_left"]
+# NOTE: Widths of each column in `--format table` (rows are printed before all are loaded)
+TABLE_WIDTHS = [10, 42, 8, 24, 24, 12]
 
 
 @click.group()
@@ -12,15 +25,136 @@ def cli():
     """
 
 
+def stream_range_options(f):
+    f = click.option("--to-id", type=int, help="Last stream ID to load (defaults to newest)")(f)
+    f = click.option("--from-id", type=int, default=0, help="First stream ID to load")(f)
+    return f
+
+
+def export_options(f):
+    f = click.option(
+        "--format",
+        "output_format",
+        type=click.Choice(["table", "json", "csv"]),
+        default="table",
+        help="Rows are printed as they are loaded (`json` is one object per line)",
+    )(f)
+    f = click.option("--at-block", type=int, help="Load every stream as of this block")(f)
+    f = click.option("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)(f)
+    f = click.option(
+        "--prefetch", type=int, default=DEFAULT_PREFETCH, help="Batches to load ahead"
+    )(f)
+    f = click.option(
+        "--totals/--no-totals", default=True, help="Print totals per token (to stderr)"
+    )(f)
+    return stream_range_options(f)
+
+
+def stream_ids(manager: StreamManager, from_id: int, to_id: int | None, block_id: int) -> range:
+    num_streams = manager.contract.num_streams(block_id=block_id)
+    return range(from_id, num_streams if to_id is None else min(to_id + 1, num_streams))
+
+
+def to_row(stream: Stream) -> dict:
+    info = stream.info
+    token = token_registry[info.token]
+    scale = Decimal(10**token.decimals)
+    return dict(
+        stream_id=stream.id,
+        owner=info.owner,
+        token=token.symbol,
+        funded=str(info.funded_amount / scale),
+        claimable=str(info.amount_claimable / scale),
+        time_left=info.time_left,
+    )
+
+
+def format_table_row(values: list) -> str:
+    return " ".join(f"{value!s:<{width}}" for value, width in zip(values, TABLE_WIDTHS)).rstrip()
+
+
+async def export_streams(
+    streams: AsyncIterator[Stream], output_format: str, unclaimed_only: bool
+) -> dict[str, Decimal]:
+    totals: dict[str, Decimal] = defaultdict(Decimal)
+    writer = csv.DictWriter(sys.stdout, fieldnames=COLUMNS)
+
+    if output_format == "table":
+        click.echo(format_table_row(COLUMNS))
+
+    elif output_format == "csv":
+        writer.writeheader()
+
+    async for stream in streams:
+        if unclaimed_only and stream.info.amount_claimable == 0:
+            continue
+
+        row = to_row(stream)
+        totals[row["token"]] += Decimal(row["claimable"])
+
+        if output_format == "table":
+            click.echo(format_table_row([row[column] for column in COLUMNS]))
+
+        elif output_format == "csv":
+            writer.writerow(row)
+
+        else:
+            click.echo(json.dumps(row))
+
+    return totals
+
+
+def export(
+    manager: StreamManager,
+    from_id: int,
+    to_id: int | None,
+    at_block: int | None,
+    output_format: str,
+    batch_size: int,
+    prefetch: int,
+    totals: bool,
+    unclaimed_only: bool = False,
+):
+    # NOTE: Every stream (and their number) is loaded as of the same block
+    block_id = manager.chain_manager.blocks[-1 if at_block is None else at_block].number
+    # NOTE: Fetch the metadata of every token at once
+    token_registry.prefill(manager.accepted_tokens_at(block_id))
+
+    # NOTE: Streams are loaded in bulk (in the background), while earlier rows are printed
+    loading = async_wrap_iter(
+        manager.load_streams(
+            stream_ids(manager, from_id, to_id, block_id),
+            block_id=block_id,
+            batch_size=batch_size,
+        ),
+        prefetch=prefetch,
+        batch_size=batch_size,
+    )
+    token_totals = asyncio.run(export_streams(loading, output_format, unclaimed_only))
+
+    if totals:
+        for symbol, amount in sorted(token_totals.items()):
+            click.echo(f"Total claimable: {amount} {symbol}", err=True)
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@network_option()
+@export_options
+@click.argument("manager", type=StreamManager)
+def streams(manager, **export_kwargs):
+    """List all streams"""
+
+    export(manager, **export_kwargs)
+
+
 @cli.command(cls=ConnectedProviderCommand)
 @network_option()
+@export_options
 @click.argument("manager", type=StreamManager)
-def unclaimed(manager):
+def unclaimed(manager, **export_kwargs):
     """List all unclaimed streams"""
 
-    for stream in manager.unclaimed_streams():
-        stream_balance = stream.amount_claimable / 10 ** stream.token.decimals()
-        click.echo(f"{stream.id}: {stream_balance} {stream.token.symbol()}")
+    export(manager, unclaimed_only=True, **export_kwargs)
 
 
 @cli.command(cls=ConnectedProviderCommand)
@@ -28,41 +162,19 @@ def unclaimed(manager):
 @account_option()
 @click.option("--batch-size", type=int, default=256)
 @click.option("--multicall/--no-multicall", "use_multicall", default=True)
+@stream_range_options
 @click.argument("manager", type=StreamManager)
-def claim(account, batch_size, use_multicall, manager):
+def claim(account, batch_size, use_multicall, from_id, to_id, manager):
     """Claim unclaimed streams using multicall (anyone can claim)"""
 
-    unclaimed_streams = manager.unclaimed_streams()
-
-    if not use_multicall:
-        for _ in range(batch_size):
-            try:
-                stream = next(unclaimed_streams)
-            except StopIteration:
-                click.secho("SUCCESS: All Streams Claimed!", fg="green")
-                return
-
-            stream.claim(sender=account)
-
-        click.echo(f"INFO: {len(list(unclaimed_streams))} more claims needed...")
-        return
-
-    # else: use multicall
-    more_streams = True
-
-    while more_streams:
-        tx = multicall.Transaction()
-
-        for _ in range(batch_size):
-            try:
-                stream = next(unclaimed_streams)
-            except StopIteration:
-                more_streams = False
-                break
+    # NOTE: Falls back to claiming one stream per transaction if multicall is not supported
+    engine = ClaimEngine(manager, max_batch_size=batch_size, use_multicall=use_multicall)
+    block_id = manager.chain_manager.blocks.head.number
 
-            tx.add(manager.contract.claim_stream, stream.id)
+    for batch in engine.run(account, stream_ids(manager, from_id, to_id, block_id)):
+        click.echo(
+            f"INFO: Claimed {len(batch.stream_ids)} streams in {batch.receipt.txn_hash} "
+            f"(nonce: {batch.nonce})"
+        )
 
-        try:
-            tx(sender=account)
-        except multicall.exceptions.UnsupportedChainError as e:
-            raise click.UsageError("Multicall not supported, try with `--no-multicall`") from e
+    click.secho("SUCCESS: All Streams Claimed!", fg="green")
@@ -1,16 +1,61 @@
+from .aio import AsyncStream, AsyncStreamManager
+from .checkpoint import IndexCheckpoint
+from .claims import ClaimBatch, ClaimEngine
 from .factory import StreamFactory, releases
-from .manager import StreamManager
-from .streams import Stream
+from .indexer import FactoryIndex, StreamIndex
+from .manager import StreamCreation, StreamManager, StreamRequest
+from .products import ProductCatalog
+from .quotes import Quote, QuoteEngine
+from .records import StreamRecord, StreamRecords
+from .scheduler import ExpiryScheduler
+from .shards import ShardedClaimEngine, ShardReport
+from .streams import Stream, StreamInfo
+from .tokens import TokenMetadata, TokenRegistry, token_registry
+from .topups import TopUp, TopUpPlanner
 from .validators import Validator
 
 # NOTE: This is required due to mutual recursion
 Stream.model_rebuild()
 Validator.model_rebuild()
 
+
+def __getattr__(name: str):
+    # NOTE: Imported lazily, since it requires NumPy (which is an optional dependency)
+    if name == "StreamTable":
+        from .table import StreamTable
+
+        return StreamTable
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
 __all__ = [
+    AsyncStream.__name__,
+    AsyncStreamManager.__name__,
+    ClaimBatch.__name__,
+    ClaimEngine.__name__,
+    ExpiryScheduler.__name__,
+    FactoryIndex.__name__,
+    IndexCheckpoint.__name__,
+    ProductCatalog.__name__,
+    Quote.__name__,
+    QuoteEngine.__name__,
+    ShardedClaimEngine.__name__,
+    ShardReport.__name__,
     Stream.__name__,
+    StreamInfo.__name__,
     StreamFactory.__name__,
+    StreamIndex.__name__,
+    StreamCreation.__name__,
     StreamManager.__name__,
+    StreamRecord.__name__,
+    StreamRecords.__name__,
+    StreamRequest.__name__,
+    TokenMetadata.__name__,
+    TokenRegistry.__name__,
+    TopUp.__name__,
+    TopUpPlanner.__name__,
     Validator.__name__,
     "releases",
+    "token_registry",
 ]
@@ -0,0 +1,258 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from typing import Any, TypeVar
+
+from ape.api import ReceiptAPI
+from ape.contracts.base import ContractInstance
+from ape.types import AddressType, HexBytes
+from ape.utils import BaseInterfaceModel
+from pydantic import PrivateAttr
+
+from .manager import MAX_CONCURRENT_CALLS, SNAPSHOT_BATCH_SIZE, StreamManager
+from .streams import Stream, StreamInfo
+from .utils import DEFAULT_PREFETCH, PrefetchingIterator, async_wrap_iter
+from .validators import Validator
+
+T = TypeVar("T")
+
+
+class AsyncStreamManager(BaseInterfaceModel):
+    """
+    Async version of `StreamManager`, for use in async code (such as Silverback bots).
+
+    Every blocking call is made in a thread pool of (at most) `max_concurrency` threads, so that
+    the event loop is never blocked, and many Streams can be read concurrently. The pool is shared
+    by every Stream loaded from this manager.
+
+    Usage example::
+
+        sm = AsyncStreamManager("0x...")  # NOTE: Or an existing `StreamManager`
+
+        async for stream in sm.active_streams():
+            print(await stream.time_left())
+
+        # NOTE: Reads fan out over the thread pool
+        time_left = await asyncio.gather(*(sm.stream(i).time_left() for i in range(100)))
+    """
+
+    manager: StreamManager
+    max_concurrency: int = MAX_CONCURRENT_CALLS
+
+    _executor: ThreadPoolExecutor | None = PrivateAttr(default=None)
+
+    def __init__(self, manager, /, *args, **kwargs):
+        if not isinstance(manager, StreamManager):
+            manager = StreamManager(manager)
+
+        kwargs["manager"] = manager
+        super().__init__(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.AsyncStreamManager address={self.address}>"
+
+    @property
+    def address(self) -> AddressType:
+        return self.manager.address
+
+    @property
+    def contract(self) -> ContractInstance:
+        return self.manager.contract
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="apepay",
+            )
+
+        return self._executor
+
+    def close(self):
+        """
+        Shut down the thread pool (it is re-created on next use).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self) -> "AsyncStreamManager":
+        return self
+
+    async def __aexit__(self, *_):
+        self.close()
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run blocking `func` in the thread pool, and wait for the result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def iterate(
+        self,
+        it: Iterable[T],
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+        prefetch: int = DEFAULT_PREFETCH,
+    ) -> PrefetchingIterator[T]:
+        """
+        Iterate over blocking iterator `it`, fetching `batch_size` items at a time in the pool.
+        """
+        return async_wrap_iter(it, prefetch=prefetch, batch_size=batch_size, executor=self.executor)
+
+    def stream(self, stream_id: int) -> "AsyncStream":
+        return AsyncStream(manager=self, stream=Stream(manager=self.manager, id=stream_id))
+
+    def wrap(self, stream: Stream) -> "AsyncStream":
+        """
+        Use an existing `Stream` (e.g. from a Silverback handler) with the async API.
+        """
+        return AsyncStream(manager=self, stream=stream)
+
+    async def controller(self) -> AddressType:
+        return await self.run(lambda: self.manager.controller)
+
+    async def validators(self) -> list[Validator]:
+        return await self.run(lambda: self.manager.validators)
+
+    async def is_accepted(self, token: AddressType) -> bool:
+        return await self.run(self.manager.is_accepted, token)
+
+    async def num_streams(self) -> int:
+        return await self.run(self.contract.num_streams)
+
+    async def create(
+        self,
+        token: ContractInstance,
+        amount: str | int,
+        products: list[HexBytes],
+        min_stream_life: timedelta | int | None = None,
+        **txn_kwargs,
+    ) -> "AsyncStream":
+        stream = await self.run(
+            self.manager.create,
+            token,
+            amount,
+            products,
+            min_stream_life=min_stream_life,
+            **txn_kwargs,
+        )
+        return self.wrap(stream)
+
+    async def _iter_streams(self, streams: Iterator[Stream], batch_size: int):
+        wrapped = self.iterate(streams, batch_size=batch_size)
+        try:
+            async for stream in wrapped:
+                yield self.wrap(stream)
+
+        finally:
+            # NOTE: Stop loading more Streams if the consumer stops early
+            await wrapped.aclose()
+
+    def load_streams(
+        self,
+        stream_ids: Iterable[int],
+        block_id: int | None = None,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> AsyncIterator["AsyncStream"]:
+        """
+        Async version of `StreamManager.load_streams`.
+        """
+        streams = self.manager.load_streams(stream_ids, block_id=block_id, batch_size=batch_size)
+        return self._iter_streams(streams, batch_size)
+
+    def all_streams(
+        self,
+        block_id: int | None = None,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> AsyncIterator["AsyncStream"]:
+        streams = self.manager.all_streams(block_id=block_id, batch_size=batch_size)
+        return self._iter_streams(streams, batch_size)
+
+    def active_streams(self, **snapshot_kwargs) -> AsyncIterator["AsyncStream"]:
+        streams = self.manager.active_streams(**snapshot_kwargs)
+        return self._iter_streams(streams, snapshot_kwargs.get("batch_size", SNAPSHOT_BATCH_SIZE))
+
+    def unclaimed_streams(self, **snapshot_kwargs) -> AsyncIterator["AsyncStream"]:
+        streams = self.manager.unclaimed_streams(**snapshot_kwargs)
+        return self._iter_streams(streams, snapshot_kwargs.get("batch_size", SNAPSHOT_BATCH_SIZE))
+
+
+class AsyncStream(BaseInterfaceModel):
+    """
+    Async version of `Stream`, where every property that may call the chain is a coroutine.
+    """
+
+    manager: AsyncStreamManager
+    stream: Stream
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.AsyncStream address={self.manager.address} id={self.id}>"
+
+    @property
+    def id(self) -> int:
+        return self.stream.id
+
+    async def _get(self, attr: str) -> Any:
+        return await self.manager.run(getattr, self.stream, attr)
+
+    async def info(self) -> StreamInfo:
+        return await self._get("info")
+
+    async def refresh(self, at_block: int | None = None) -> StreamInfo:
+        return await self.manager.run(self.stream.refresh, at_block=at_block)
+
+    async def token(self) -> ContractInstance:
+        return await self._get("token")
+
+    async def funded(self) -> Decimal:
+        return await self._get("funded")
+
+    async def funding_rate(self) -> Decimal:
+        return await self._get("funding_rate")
+
+    async def estimate_funding(self, period: timedelta) -> Decimal:
+        return await self.manager.run(self.stream.estimate_funding, period)
+
+    async def products(self) -> list[HexBytes]:
+        return await self._get("products")
+
+    async def owner(self) -> AddressType:
+        return await self._get("owner")
+
+    async def expires_at(self) -> datetime:
+        return await self._get("expires_at")
+
+    async def last_update(self) -> datetime:
+        return await self._get("last_update")
+
+    async def last_claim(self) -> datetime:
+        return await self._get("last_claim")
+
+    async def amount_claimable(self) -> int:
+        return await self._get("amount_claimable")
+
+    async def amount_refundable(self) -> int:
+        return await self._get("amount_refundable")
+
+    async def time_left(self) -> timedelta:
+        return await self._get("time_left")
+
+    async def is_active(self) -> bool:
+        return await self._get("is_active")
+
+    async def is_cancelable(self) -> bool:
+        return await self._get("is_cancelable")
+
+    async def add_funds(self, amount: int, **txn_kwargs) -> ReceiptAPI:
+        return await self.manager.run(self.stream.add_funds, amount, **txn_kwargs)
+
+    async def cancel(self, *args, **txn_kwargs) -> ReceiptAPI:
+        return await self.manager.run(self.stream.cancel, *args, **txn_kwargs)
+
+    async def claim(self, **txn_kwargs) -> ReceiptAPI:
+        return await self.manager.run(self.stream.claim, **txn_kwargs)
@@ -0,0 +1,248 @@
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ape.types import HexBytes
+
+from .streams import StreamInfo
+
+if TYPE_CHECKING:
+    from .indexer import StreamIndex
+    from .manager import StreamManager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    start_block INTEGER NOT NULL,
+    last_block INTEGER NOT NULL,
+    last_timestamp INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, manager)
+);
+CREATE TABLE IF NOT EXISTS streams (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    stream_id INTEGER NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (chain_id, manager, stream_id)
+);
+CREATE TABLE IF NOT EXISTS journal (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    stream_id INTEGER NOT NULL,
+    info TEXT,
+    PRIMARY KEY (chain_id, manager, seq)
+);
+CREATE TABLE IF NOT EXISTS log_positions (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    stream_id INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, manager, stream_id)
+);
+CREATE TABLE IF NOT EXISTS block_hashes (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    PRIMARY KEY (chain_id, manager, block_number)
+);
+CREATE TABLE IF NOT EXISTS warnings (
+    chain_id INTEGER NOT NULL,
+    manager TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stream_id INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, manager, name, stream_id)
+);
+"""
+KEY = "chain_id = ? AND manager = ?"
+
+
+class IndexCheckpoint:
+    """
+    SQLite database that a StreamIndex can be saved to and restored from, so that it does not
+    have to replay every log again when restarted. A single database can hold the checkpoints
+    for many StreamManagers, keyed by chain ID and address.
+
+    It also holds the warnings that bots have already sent (see `StreamManager.on_stream_expiring`),
+    so they are not sent again when restarted.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.IndexCheckpoint path={self.path}>"
+
+    def _connect(self) -> sqlite3.Connection:
+        # NOTE: Use a fresh connection every time so indexes can be synced from any thread
+        return sqlite3.connect(self.path)
+
+    def _key(self, index: "StreamIndex") -> tuple[int, str]:
+        return self._manager_key(index.manager)
+
+    def _manager_key(self, manager: "StreamManager") -> tuple[int, str]:
+        return manager.provider.chain_id, str(manager.address)
+
+    def load(self, index: "StreamIndex") -> bool:
+        """
+        Restore the state of `index` from its checkpoint. Returns `False` if there was none.
+        """
+        key = self._key(index)
+
+        with closing(self._connect()) as connection:
+            if not (
+                checkpoint := connection.execute(
+                    f"SELECT start_block, last_block, last_timestamp FROM checkpoints WHERE {KEY}",
+                    key,
+                ).fetchone()
+            ):
+                return False
+
+            index._reset()
+            index._start_block, index.last_block, index.last_timestamp = checkpoint
+
+            for stream_id, info in connection.execute(
+                f"SELECT stream_id, info FROM streams WHERE {KEY}", key
+            ):
+                index._add(stream_id, StreamInfo.model_validate_json(info))
+
+            index._journal = [
+                (
+                    block_number,
+                    stream_id,
+                    None if info is None else StreamInfo.model_validate_json(info),
+                )
+                for block_number, stream_id, info in connection.execute(
+                    f"SELECT block_number, stream_id, info FROM journal WHERE {KEY} ORDER BY seq",
+                    key,
+                )
+            ]
+            index._log_positions = {
+                stream_id: (block_number, log_index)
+                for stream_id, block_number, log_index in connection.execute(
+                    f"SELECT stream_id, block_number, log_index FROM log_positions WHERE {KEY}",
+                    key,
+                )
+            }
+            index._block_hashes = {
+                block_number: HexBytes(block_hash)
+                for block_number, block_hash in connection.execute(
+                    f"SELECT block_number, block_hash FROM block_hashes WHERE {KEY}", key
+                )
+            }
+
+        return True
+
+    def save(self, index: "StreamIndex"):
+        """
+        Save the state of `index`. Only the Streams modified since the last save are written.
+        """
+        if index.last_block is None or index.last_timestamp is None:
+            return  # NOTE: Nothing to save yet
+
+        key = self._key(index)
+
+        # NOTE: Everything is written in a single transaction, so a crash never corrupts it
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+                (*key, index.start_block, index.last_block, index.last_timestamp),
+            )
+
+            for stream_id in index._modified:
+                if (info := index.streams.get(stream_id)) is None:
+                    # NOTE: Stream creation was undone by a re-org
+                    connection.execute(
+                        f"DELETE FROM streams WHERE {KEY} AND stream_id = ?", (*key, stream_id)
+                    )
+
+                else:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?)",
+                        (*key, stream_id, info.model_dump_json()),
+                    )
+
+            # NOTE: Journal, log positions and block hashes are always small, so just replace them
+            connection.execute(f"DELETE FROM journal WHERE {KEY}", key)
+            connection.executemany(
+                "INSERT INTO journal VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        *key,
+                        seq,
+                        block_number,
+                        stream_id,
+                        None if info is None else info.model_dump_json(),
+                    )
+                    for seq, (block_number, stream_id, info) in enumerate(index._journal)
+                ),
+            )
+            connection.execute(f"DELETE FROM log_positions WHERE {KEY}", key)
+            connection.executemany(
+                "INSERT INTO log_positions VALUES (?, ?, ?, ?, ?)",
+                (
+                    (*key, stream_id, block_number, log_index)
+                    for stream_id, (block_number, log_index) in index._log_positions.items()
+                ),
+            )
+            connection.execute(f"DELETE FROM block_hashes WHERE {KEY}", key)
+            connection.executemany(
+                "INSERT INTO block_hashes VALUES (?, ?, ?, ?)",
+                (
+                    (*key, block_number, block_hash.hex())
+                    for block_number, block_hash in index._block_hashes.items()
+                ),
+            )
+
+        index._modified.clear()
+
+    def clear(self, index: "StreamIndex"):
+        """
+        Remove the checkpoint for `index` (e.g. to force it to be re-built from scratch).
+        """
+        key = self._key(index)
+
+        with closing(self._connect()) as connection, connection:
+            for table in ("checkpoints", "streams", "journal", "log_positions", "block_hashes"):
+                connection.execute(f"DELETE FROM {table} WHERE {KEY}", key)
+
+    def load_warnings(self, manager: "StreamManager", name: str) -> dict[int, int]:
+        """
+        Expiry of every Stream of `manager` that a warning was sent for under `name`.
+        """
+        with closing(self._connect()) as connection:
+            return dict(
+                connection.execute(
+                    f"SELECT stream_id, expires_at FROM warnings WHERE {KEY} AND name = ?",
+                    (*self._manager_key(manager), name),
+                )
+            )
+
+    def save_warnings(
+        self, manager: "StreamManager", name: str, warnings: dict[int, int], timestamp: int
+    ):
+        """
+        Add `warnings` (the expiry of each Stream warned about), and forget every Stream that has
+        expired by `timestamp` (they can never be warned about again).
+        """
+        key = self._manager_key(manager)
+
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO warnings VALUES (?, ?, ?, ?, ?)",
+                ((*key, name, stream_id, expires_at) for stream_id, expires_at in warnings.items()),
+            )
+            connection.execute(
+                f"DELETE FROM warnings WHERE {KEY} AND name = ? AND expires_at <= ?",
+                (*key, name, timestamp),
+            )
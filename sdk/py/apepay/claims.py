@@ -0,0 +1,265 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from ape.api import AccountAPI, ReceiptAPI, TransactionAPI
+from ape.types import AddressType
+from ape.utils import ManagerAccessMixin
+from ape.utils.basemodel import BaseModel
+from ape_ethereum import multicall
+
+from .manager import StreamManager
+from .streams import Stream
+
+# NOTE: Fraction of the block gas limit that a single batch of claims is allowed to use
+MAX_BLOCK_GAS_USAGE = 0.5
+# NOTE: Added on top of simulated gas, in case state changes before the batch is executed
+GAS_LIMIT_MULTIPLIER = 1.25
+# NOTE: Number of batches that can be submitted (but not yet confirmed) at once
+MAX_PENDING_BATCHES = 4
+
+
+class ClaimBatch(BaseModel):
+    """
+    Report of a single transaction sent (or planned) by `ClaimEngine`.
+    """
+
+    stream_ids: list[int]
+    # NOTE: Amount expected to be claimed per token, as of the snapshot the batch was built from
+    amounts: dict[AddressType, int]
+    gas_limit: int
+    nonce: int | None = None
+    receipt: ReceiptAPI | None = None
+
+
+class ClaimEngine(ManagerAccessMixin):
+    """
+    Claim from many Streams at once, using as few transactions as possible.
+
+    Claimable amounts are read in bulk, and `claim_stream` calls are packed into multicall
+    transactions sized by simulated gas (up to `max_block_gas_usage` of the block gas limit).
+    Each batch is signed with the next sequential nonce and submitted while the following batch
+    is being built, with up to `max_pending_batches` transactions in flight at once.
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        engine = ClaimEngine(sm, min_claims={"0x...": 100 * 10**6})
+        for batch in engine.run(sender=account):
+            print(batch.receipt.txn_hash, batch.amounts)
+
+    Streams that have no time left are always claimed, whereas active Streams are skipped if
+    their claimable amount is less than the minimum set for their token in `min_claims`.
+    """
+
+    def __init__(
+        self,
+        manager: StreamManager,
+        min_claims: Mapping[Any, int] | None = None,
+        max_block_gas_usage: float = MAX_BLOCK_GAS_USAGE,
+        max_batch_size: int | None = None,
+        max_pending_batches: int = MAX_PENDING_BATCHES,
+        use_multicall: bool = True,
+    ):
+        self.manager = manager
+        self.min_claims: dict[AddressType, int] = {
+            self.conversion_manager.convert(token, AddressType): amount
+            for token, amount in (min_claims or {}).items()
+        }
+        self.max_block_gas_usage = max_block_gas_usage
+        self.max_batch_size = max_batch_size
+        self.max_pending_batches = max_pending_batches
+        self.use_multicall = use_multicall
+
+        # NOTE: Simulated gas of a single claim, by token (what is claimed doesn't affect it much)
+        self._claim_gas: dict[AddressType, int] = {}
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.ClaimEngine manager={self.manager.address}>"
+
+    def claimable_streams(
+        self,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> Iterator[tuple[Stream, int]]:
+        """
+        Load every Stream in `stream_ids` (defaults to all Streams) in bulk, and yield those that
+        should be claimed, with the amount that can be claimed from them. Every Stream is pinned
+        to the same block (defaults to latest), even if the chain moves on while claiming.
+        """
+        if snapshot_kwargs.get("block_id") is None:
+            snapshot_kwargs["block_id"] = self.chain_manager.blocks.head.number
+
+        streams = (
+            self.manager.all_streams(**snapshot_kwargs)
+            if stream_ids is None
+            else self.manager.load_streams(stream_ids, **snapshot_kwargs)
+        )
+
+        for stream in streams:
+            info = stream.info
+            if (amount := info.amount_claimable) == 0:
+                continue
+
+            elif info.time_left > 0 and amount < self.min_claims.get(info.token, 0):
+                continue
+
+            yield stream, amount
+
+    @property
+    def gas_budget(self) -> int:
+        gas_limit = self.chain_manager.blocks.head.gas_limit
+        return int(gas_limit * self.max_block_gas_usage)
+
+    def _multicall_supported(self) -> bool:
+        if not self.use_multicall:
+            return False
+
+        try:
+            multicall.Transaction().contract
+
+        except multicall.exceptions.UnsupportedChainError:
+            return False
+
+        return True
+
+    def _simulate_claim(self, stream: Stream, sender: AccountAPI) -> int:
+        if (token := stream.info.token) not in self._claim_gas:
+            self._claim_gas[token] = self.manager.contract.claim_stream.estimate_gas_cost(
+                stream.id, sender=sender
+            )
+
+        return self._claim_gas[token]
+
+    def _build_transaction(
+        self,
+        streams: list[tuple[Stream, int]],
+        sender: AccountAPI,
+        use_multicall: bool,
+    ) -> TransactionAPI:
+        if not use_multicall:
+            stream, _ = streams[0]
+            return self.manager.contract.claim_stream.as_transaction(stream.id, sender=sender)
+
+        tx = multicall.Transaction()
+        for stream, _ in streams:
+            # NOTE: Allow failure, so a single Stream claimed by someone else can't block the rest
+            tx.add(self.manager.contract.claim_stream, stream.id)
+
+        return tx.as_transaction(sender=sender)
+
+    def _build_batches(
+        self,
+        sender: AccountAPI,
+        claims: Iterable[tuple[Stream, int]],
+    ) -> Iterator[tuple[ClaimBatch, TransactionAPI]]:
+        use_multicall = self._multicall_supported()
+        max_batch_size = self.max_batch_size if use_multicall else 1
+        gas_budget = self.gas_budget
+
+        def build(streams: list[tuple[Stream, int]]) -> Iterator[tuple[ClaimBatch, TransactionAPI]]:
+            txn = self._build_transaction(streams, sender, use_multicall)
+            gas_limit = int(self.provider.estimate_gas_cost(txn) * GAS_LIMIT_MULTIPLIER)
+
+            if gas_limit > gas_budget and len(streams) > 1:
+                # NOTE: Packing estimate was too optimistic, so split the batch in half
+                middle = len(streams) // 2
+                yield from build(streams[:middle])
+                yield from build(streams[middle:])
+                return
+
+            amounts: dict[AddressType, int] = defaultdict(int)
+            for stream, amount in streams:
+                amounts[stream.info.token] += amount
+
+            txn.gas_limit = gas_limit
+            yield (
+                ClaimBatch(
+                    stream_ids=[stream.id for stream, _ in streams],
+                    amounts=dict(amounts),
+                    gas_limit=gas_limit,
+                ),
+                txn,
+            )
+
+        batch: list[tuple[Stream, int]] = []
+        batch_gas = 0
+        for stream, amount in claims:
+            claim_gas = int(self._simulate_claim(stream, sender) * GAS_LIMIT_MULTIPLIER)
+
+            if batch and (
+                batch_gas + claim_gas > gas_budget
+                or (max_batch_size is not None and len(batch) >= max_batch_size)
+            ):
+                yield from build(batch)
+                batch, batch_gas = [], 0
+
+            batch.append((stream, amount))
+            batch_gas += claim_gas
+
+        if batch:
+            yield from build(batch)
+
+    def plan(
+        self,
+        sender: AccountAPI,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> list[ClaimBatch]:
+        """
+        Work out which batches would be sent by `run` (without sending them).
+        """
+        claims = self.claimable_streams(stream_ids, **snapshot_kwargs)
+        return [batch for batch, _ in self._build_batches(sender, claims)]
+
+    def run(
+        self,
+        sender: AccountAPI,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> list[ClaimBatch]:
+        """
+        Claim from every Stream in `stream_ids` (defaults to all Streams) that should be claimed,
+        and return a report of each batch that was sent (in nonce order).
+
+        If submitting a batch fails, no more batches are submitted and the error is raised.
+        """
+        claims = self.claimable_streams(stream_ids, **snapshot_kwargs)
+        batches: list[ClaimBatch] = []
+        nonce = sender.nonce
+
+        if self.max_pending_batches < 1:
+            # NOTE: Useful for providers that can't handle concurrent requests
+            for batch, txn in self._build_batches(sender, claims):
+                txn.nonce = batch.nonce = nonce
+                batch.receipt = sender.call(txn)
+                batches.append(batch)
+                nonce += 1
+
+            return batches
+
+        pending: list[Future] = []
+        with ThreadPoolExecutor(self.max_pending_batches) as executor:
+            try:
+                for batch, txn in self._build_batches(sender, claims):
+                    # NOTE: Nonces are assigned in order, so the chain will execute them in order
+                    txn.nonce = batch.nonce = nonce
+                    pending.append(executor.submit(sender.call, txn))
+                    batches.append(batch)
+                    nonce += 1
+
+                    # NOTE: Stop building new batches if a submitted one already failed
+                    if failed := next((f for f in pending if f.done() and f.exception()), None):
+                        failed.result()
+
+                for batch, future in zip(batches, pending):
+                    batch.receipt = future.result()
+
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+
+                raise
+
+        return batches
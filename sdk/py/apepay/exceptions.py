@@ -48,3 +48,18 @@ class StreamLifeInsufficient(ApePayException, ValueError):
 class NoValidProducts(ApePayException, ValueError):
     def __init__(self):
         super().__init__("No valid products in stream creation")
+
+
+class StreamComputationError(ApePayException, ArithmeticError):
+    def __init__(self, method: str, reason: str):
+        super().__init__(f"Computing '{method}' would revert in contract: {reason}")
+
+
+class StreamRejected(ApePayException, ValueError):
+    def __init__(self, validators: list[AddressType]):
+        super().__init__(f"Stream rejected by validator(s): {', '.join(validators)}")
+
+
+class StreamNotSubmitted(ApePayException):
+    def __init__(self, sender: AddressType):
+        super().__init__(f"Not submitted, because an earlier transaction from {sender} failed.")
@@ -1,9 +1,11 @@
+from collections.abc import Iterable
 from typing import Any
 
 from ape.contracts import ContractInstance
-from ape.types import AddressType
+from ape.types import AddressType, LogFilter
 from ape.utils import ZERO_ADDRESS, BaseInterfaceModel
-from pydantic import field_validator
+from ape_ethereum import multicall
+from pydantic import PrivateAttr, field_validator
 
 from .exceptions import ManagerDoesNotExist, NoFactoryAvailable
 from .manager import StreamManager
@@ -11,8 +13,27 @@ from .package import MANIFEST
 
 
 class StreamFactory(BaseInterfaceModel):
+    """
+    Wrapper class around a StreamFactory contract, which caches the StreamManager deployed by
+    each deployer (a deployment can never change once created). Deployers without a deployment
+    are also cached, but only until the next block.
+
+    Usage example::
+
+        factory = StreamFactory()  # NOTE: Latest release
+        factory.load_deployments()  # NOTE: Optional, from the `ManagerCreated` logs
+        managers = factory.get_deployments(customers)  # NOTE: A single multicall (if any)
+    """
+
     address: AddressType
 
+    _contract: ContractInstance | None = PrivateAttr(default=None)
+    _deployments: dict[AddressType, StreamManager] = PrivateAttr(default_factory=dict)
+    # NOTE: Last block that each deployer was seen without a deployment at
+    _missing: dict[AddressType, int] = PrivateAttr(default_factory=dict)
+    # NOTE: Last block that `ManagerCreated` logs have been loaded up to (if ever)
+    _last_block: int | None = PrivateAttr(default=None)
+
     def __init__(self, address=None, /, *args, **kwargs):
         if address is not None:
             kwargs["address"] = address
@@ -28,18 +49,114 @@ class StreamFactory(BaseInterfaceModel):
     def __hash__(self) -> int:
         return self.address.__hash__()
 
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.StreamFactory address={self.address}>"
+
     @field_validator("address", mode="before")
     def normalize_address(cls, value: Any) -> AddressType:
         return cls.conversion_manager.convert(value, AddressType)
 
     @property
     def contract(self) -> ContractInstance:
-        return MANIFEST.StreamFactory.at(self.address)
+        if self._contract is None:
+            self._contract = MANIFEST.StreamFactory.at(self.address)
+
+        return self._contract
+
+    def _add_deployment(self, deployer: AddressType, manager: AddressType):
+        if deployer not in self._deployments:
+            self._deployments[deployer] = StreamManager(manager)
+            self._missing.pop(deployer, None)
+
+    def _checked_block(self, deployer: AddressType) -> int:
+        # NOTE: Last block that `deployer` is known to not have a deployment at
+        return max(
+            self._missing.get(deployer, -1), -1 if self._last_block is None else self._last_block
+        )
+
+    def load_deployments(self, stop_block: int | None = None) -> int:
+        """
+        Cache every deployment from the `ManagerCreated` logs of the factory, up to `stop_block`
+        (defaults to latest). Only the blocks since the last time it was called are queried, and
+        afterwards any deployer not found is known to not have a deployment without a call.
+
+        Returns the number of new deployments found.
+        """
+        from .indexer import _find_deployment_block  # NOTE: Avoid circular import
+
+        if stop_block is None:
+            stop_block = self.chain_manager.blocks.head.number or 0
+
+        start_block = (
+            _find_deployment_block(self.address)
+            if self._last_block is None
+            else self._last_block + 1
+        )
+        num_deployments = len(self._deployments)
+        if start_block <= stop_block:
+            log_filter = LogFilter.from_event(
+                event=self.contract.ManagerCreated.abi,
+                addresses=[self.address],
+                start_block=start_block,
+                stop_block=stop_block,
+            )
+            for log in self.provider.get_contract_logs(log_filter):
+                self._add_deployment(log.owner, log.manager)
+
+        self._last_block = max(stop_block, self._last_block or 0)
+        return len(self._deployments) - num_deployments
+
+    def _call_deployments(self, deployers: list[AddressType], block_number: int) -> list[Any]:
+        call = multicall.Call()
+        for deployer in deployers:
+            call.add(self.contract.deployments, deployer)
+
+        try:
+            return list(call(block_id=block_number))
+
+        except multicall.exceptions.UnsupportedChainError:
+            # Handle if multicall isn't available via individual calls (e.g. local testing)
+            return [
+                self.contract.deployments(deployer, block_id=block_number) for deployer in deployers
+            ]
+
+    def get_deployments(self, deployers: Iterable[Any]) -> dict[AddressType, StreamManager | None]:
+        """
+        The StreamManager deployed by each of `deployers` (or `None` if they do not have one).
+        Every deployer that is not cached is looked up in a single multicall, or from the new
+        `ManagerCreated` logs if `load_deployments` has been used.
+        """
+        addresses = list(
+            dict.fromkeys(self.conversion_manager.convert(d, AddressType) for d in deployers)
+        )
+        if all(address in self._deployments for address in addresses):
+            return {address: self._deployments[address] for address in addresses}
+
+        block_number = self.chain_manager.blocks.head.number or 0
+        if self._last_block is not None:
+            # NOTE: A single query for the new logs finds the deployments of every deployer
+            self.load_deployments(stop_block=block_number)
+
+        if unknown := [
+            address
+            for address in addresses
+            if address not in self._deployments and self._checked_block(address) < block_number
+        ]:
+            for deployer, manager in zip(unknown, self._call_deployments(unknown, block_number)):
+                if manager == ZERO_ADDRESS:
+                    self._missing[deployer] = block_number
+
+                else:
+                    self._add_deployment(deployer, manager)
+
+        return {address: self._deployments.get(address) for address in addresses}
 
     def get_deployment(self, deployer: Any) -> StreamManager:
-        if (sm_address := self.contract.deployments(deployer)) == ZERO_ADDRESS:
+        (manager,) = self.get_deployments([deployer]).values()
+        if manager is None:
             raise ManagerDoesNotExist()
-        return StreamManager(sm_address)
+
+        return manager
 
 
 class Releases:
@@ -0,0 +1,529 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from ape.api import BlockAPI
+from ape.logging import logger
+from ape.types import AddressType, ContractLog, HexBytes, LogFilter
+from ape.utils import ManagerAccessMixin
+from eth_utils import encode_hex, keccak
+
+from .checkpoint import IndexCheckpoint
+from .factory import StreamFactory
+from .manager import StreamManager
+from .streams import Stream, StreamInfo
+
+# NOTE: Number of blocks to query logs for at once (and to make progress in)
+LOG_CHUNK_SIZE = 10_000
+# NOTE: Number of recent blocks that can be undone if there is a re-org
+MAX_REORG_DEPTH = 64
+
+INDEXED_EVENTS = (
+    "StreamCreated",
+    "StreamFunded",
+    "StreamClaimed",
+    "StreamCancelled",
+    "StreamOwnershipUpdated",
+)
+
+
+def _find_deployment_block(address: AddressType) -> int:
+    # NOTE: Binary search for the first block that `address` has code at
+    low, high = 0, ManagerAccessMixin.chain_manager.blocks.head.number or 0
+    while low < high:
+        middle = (low + high) // 2
+        if ManagerAccessMixin.provider.get_code(address, block_id=middle):
+            high = middle
+
+        else:
+            low = middle + 1
+
+    return low
+
+
+def _stream_log_filter(manager: StreamManager, addresses: list[AddressType]) -> LogFilter:
+    # NOTE: All StreamManagers have the same events, so any of them can be used for the ABIs
+    events = [getattr(manager.contract, event_name).abi for event_name in INDEXED_EVENTS]
+    return LogFilter(
+        addresses=addresses,
+        events=events,
+        # NOTE: Match any of the events
+        topic_filter=[[encode_hex(keccak(text=abi.selector)) for abi in events]],
+    )
+
+
+class StreamIndex(ManagerAccessMixin):
+    """
+    In-memory table of the state of every Stream in a StreamManager, built by replaying the
+    logs it has emitted. Once synced, all queries are served locally without calling the chain.
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        index = StreamIndex(sm)
+        index.sync()  # NOTE: Call again at any point to process new logs
+
+        for stream in index.active_streams():
+            ...
+
+    If `checkpoint` is given, the index is persisted there after processing every chunk of logs,
+    and is restored from it when created (so syncing resumes from the last block processed).
+    """
+
+    def __init__(
+        self,
+        manager: StreamManager,
+        start_block: int | None = None,
+        chunk_size: int = LOG_CHUNK_SIZE,
+        max_reorg_depth: int = MAX_REORG_DEPTH,
+        checkpoint: IndexCheckpoint | Path | str | None = None,
+    ):
+        self.manager = manager
+        self.chunk_size = chunk_size
+        self.max_reorg_depth = max_reorg_depth
+        self._start_block = start_block
+        self._reset()
+
+        if checkpoint is not None and not isinstance(checkpoint, IndexCheckpoint):
+            checkpoint = IndexCheckpoint(checkpoint)
+
+        self.checkpoint = checkpoint
+        if self.checkpoint is not None:
+            self.checkpoint.load(self)
+
+    def _reset(self) -> None:
+        # NOTE: Last block that all logs have been processed for
+        self.last_block: int | None = None
+        self.last_timestamp: int | None = None
+
+        self.streams: dict[int, StreamInfo] = {}
+        self._by_owner: dict[AddressType, set[int]] = defaultdict(set)
+        self._by_token: dict[AddressType, set[int]] = defaultdict(set)
+        self._block_timestamps: dict[int, int] = {}
+        # NOTE: Position (`(block_number, log_index)`) of the last log applied to each Stream,
+        #       for logs applied ahead of `last_block` (so `sync` does not apply them again)
+        self._log_positions: dict[int, tuple[int, int]] = {}
+
+        # NOTE: Used to detect and undo re-orgs of (at most) the last `max_reorg_depth` blocks
+        self._block_hashes: dict[int, HexBytes] = {}
+        self._journal: list[tuple[int, int, StreamInfo | None]] = []
+        # NOTE: Streams modified since last checkpoint
+        self._modified: set[int] = set()
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.StreamIndex manager={self.manager.address} streams={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self.streams)
+
+    def __contains__(self, stream_id: int) -> bool:
+        return stream_id in self.streams
+
+    def __getitem__(self, stream_id: int) -> Stream:
+        stream = Stream(manager=self.manager, id=stream_id)
+        info = self.streams[stream_id]
+        stream._cache_info(
+            info,
+            version=self.manager._stream_versions.get(stream_id, 0),
+            block_hash=self._block_hashes.get(info.block_number),
+        )
+        return stream
+
+    @property
+    def start_block(self) -> int:
+        if self._start_block is None:
+            self._start_block = _find_deployment_block(self.manager.address)
+
+        return self._start_block
+
+    @property
+    def _next_block(self) -> int:
+        return self.start_block if self.last_block is None else self.last_block + 1
+
+    @property
+    def _log_filter(self) -> LogFilter:
+        return _stream_log_filter(self.manager, [self.manager.address])
+
+    def sync(self, stop_block: int | None = None) -> int:
+        """
+        Process all logs up to `stop_block` (defaults to the latest block), continuing from the
+        last block processed. Returns the number of logs processed.
+        """
+        block = (
+            self.chain_manager.blocks.head
+            if stop_block is None
+            else self.chain_manager.blocks[stop_block]
+        )
+        stop_block = block.number or 0
+        log_filter = self._log_filter
+        num_logs = 0
+        self._handle_reorg()
+
+        for chunk_start in range(self._next_block, stop_block + 1, self.chunk_size):
+            chunk_stop = min(chunk_start + self.chunk_size - 1, stop_block)
+            num_logs += self.apply_logs(
+                self.provider.get_contract_logs(
+                    log_filter.model_copy(
+                        update=dict(start_block=chunk_start, stop_block=chunk_stop)
+                    )
+                )
+            )
+            self._chunk_synced(chunk_stop, stop_block)
+
+        self._synced(block)
+        return num_logs
+
+    def _chunk_synced(self, chunk_stop: int, stop_block: int):
+        self.last_block = chunk_stop
+        self._block_timestamps.clear()  # NOTE: Only useful within a chunk
+        self._prune_log_positions()
+
+        if chunk_stop < stop_block:
+            self._prune_history()
+            if self.checkpoint is not None:
+                self.checkpoint.save(self)
+
+    def _synced(self, block: BlockAPI):
+        self.last_block = block.number or 0
+        self.last_timestamp = block.timestamp
+        self._block_hashes[self.last_block] = block.hash
+        self._prune_log_positions()
+        self._prune_history()
+        if self.checkpoint is not None:
+            self.checkpoint.save(self)
+
+    def _prune_log_positions(self):
+        # NOTE: Logs up to `last_block` are skipped anyways
+        self._log_positions = {
+            stream_id: position
+            for stream_id, position in self._log_positions.items()
+            if self.last_block is None or position[0] > self.last_block
+        }
+
+    def _prune_history(self):
+        if self.last_block is None:
+            return
+
+        oldest_block = self.last_block - self.max_reorg_depth
+        self._block_hashes = {
+            block_number: block_hash
+            for block_number, block_hash in self._block_hashes.items()
+            if block_number > oldest_block
+        }
+        self._journal = [entry for entry in self._journal if entry[0] > oldest_block]
+
+    def _handle_reorg(self):
+        # NOTE: Check most recent block first, since that is the only one to check most of the time
+        for block_number in sorted(self._block_hashes, reverse=True):
+            if self.chain_manager.blocks[block_number].hash == self._block_hashes[block_number]:
+                if block_number != self.last_block:
+                    logger.warning(f"Re-org detected, rewinding index to block {block_number}.")
+                    self.rewind(block_number)
+
+                return
+
+        if self._block_hashes:
+            logger.warning("Re-org detected beyond max depth, re-building index.")
+            # NOTE: Make sure the next checkpoint removes every Stream that is not re-created
+            modified = self._modified | set(self.streams)
+            self._reset()
+            self._modified = modified
+
+    def rewind(self, block_number: int):
+        """
+        Undo all logs processed after `block_number` (can be at most `max_reorg_depth` back).
+        """
+        if self.last_block is not None and block_number < self.last_block - self.max_reorg_depth:
+            raise ValueError(f"Cannot rewind more than {self.max_reorg_depth} blocks.")
+
+        while self._journal and self._journal[-1][0] > block_number:
+            _, stream_id, previous_info = self._journal.pop()
+            if (info := self.streams.pop(stream_id, None)) is not None:
+                self._by_owner[info.owner].discard(stream_id)
+                self._by_token[info.token].discard(stream_id)
+
+            if previous_info is not None:
+                self._add(stream_id, previous_info)
+
+            self._modified.add(stream_id)
+            self.manager._invalidate_stream(stream_id)
+
+        # NOTE: Every log after `block_number` was undone, and the rest are up to `last_block`
+        self._log_positions.clear()
+        self._block_hashes = {
+            number: block_hash
+            for number, block_hash in self._block_hashes.items()
+            if number <= block_number
+        }
+        self.last_block = block_number
+        self.last_timestamp = self.chain_manager.blocks[block_number].timestamp
+
+    def _add(self, stream_id: int, info: StreamInfo):
+        self.streams[stream_id] = info
+        self._by_owner[info.owner].add(stream_id)
+        self._by_token[info.token].add(stream_id)
+
+    def _block_timestamp(self, block_number: int) -> int:
+        if (timestamp := self._block_timestamps.get(block_number)) is None:
+            block = self.chain_manager.blocks[block_number]
+            self._block_timestamps[block_number] = timestamp = block.timestamp
+            self._block_hashes[block_number] = block.hash
+
+        return timestamp
+
+    def apply_logs(self, logs: Iterable[ContractLog]) -> int:
+        """
+        Update the state of the index using `logs` (must be in the order they were emitted).
+        Logs that were not emitted by `manager` are ignored. Returns the number of logs applied.
+        """
+        num_logs = 0
+        for log in logs:
+            if log.contract_address != self.manager.address or log.event_name not in INDEXED_EVENTS:
+                continue
+
+            num_logs += self.apply_log(log)
+
+        return num_logs
+
+    def apply_log(self, log: ContractLog) -> bool:
+        """
+        Update the state of the index using `log`. Returns `False` if it was already applied
+        (e.g. logs applied from a receipt are seen again when syncing).
+        """
+        stream_id = log.stream_id
+        position = (log.block_number or 0, log.log_index or 0)
+        if (self.last_block is not None and position[0] <= self.last_block) or (
+            stream_id in self._log_positions and position <= self._log_positions[stream_id]
+        ):
+            return False
+
+        self._log_positions[stream_id] = position
+        timestamp = self._block_timestamp(log.block_number or 0)
+        self._journal.append((log.block_number or 0, stream_id, self.streams.get(stream_id)))
+        self._modified.add(stream_id)
+
+        if log.event_name == "StreamCreated":
+            self._add(stream_id, StreamInfo.from_log(log, timestamp))
+
+        elif (info := self.streams.get(stream_id)) is None:
+            # NOTE: Should only happen if we did not start from the deployment block
+            raise KeyError(f"Stream {stream_id} was not indexed before '{log.event_name}'.")
+
+        else:
+            if log.event_name == "StreamOwnershipUpdated":
+                self._by_owner[info.owner].discard(stream_id)
+                self._by_owner[log.new_owner].add(stream_id)
+
+            self.streams[stream_id] = info.apply_log(log, timestamp)
+
+        # NOTE: Any cached state for this Stream is now out of date
+        self.manager._invalidate_stream(stream_id)
+        return True
+
+    def _timestamp(self, timestamp: int | None) -> int:
+        if timestamp is not None:
+            return timestamp
+
+        elif self.last_timestamp is None:
+            raise ValueError("Index has not been synced yet, please provide `timestamp=`.")
+
+        return self.last_timestamp
+
+    def all_streams(self) -> Iterator[Stream]:
+        for stream_id in sorted(self.streams):
+            yield self[stream_id]
+
+    def active_streams(self, timestamp: int | None = None) -> Iterator[Stream]:
+        timestamp = self._timestamp(timestamp)
+        for stream_id in sorted(self.streams):
+            if self.streams[stream_id].time_left_at(timestamp) > 0:
+                yield self[stream_id]
+
+    def unclaimed_streams(self, timestamp: int | None = None) -> Iterator[Stream]:
+        timestamp = self._timestamp(timestamp)
+        for stream_id in sorted(self.streams):
+            if self.streams[stream_id].amount_claimable_at(timestamp) > 0:
+                yield self[stream_id]
+
+    def streams_by_owner(self, owner: Any) -> Iterator[Stream]:
+        owner = self.conversion_manager.convert(owner, AddressType)
+        for stream_id in sorted(self._by_owner.get(owner, ())):
+            yield self[stream_id]
+
+    def streams_by_token(self, token: Any) -> Iterator[Stream]:
+        token = self.conversion_manager.convert(token, AddressType)
+        for stream_id in sorted(self._by_token.get(token, ())):
+            yield self[stream_id]
+
+
+class FactoryIndex(ManagerAccessMixin):
+    """
+    Index of every StreamManager deployed by a StreamFactory, so that a single process can serve
+    all of them. Each StreamManager has its own `StreamIndex` (in `indexes`), but the logs of all
+    of them are fetched together, using a single log filter per chunk of blocks.
+
+    StreamManagers are discovered from the `ManagerCreated` logs of the factory (which are
+    replayed when restarted, since there are much fewer of them than Stream logs).
+
+    Usage example::
+
+        factory = StreamFactory(address=...)
+        index = FactoryIndex(factory)
+        index.sync()  # NOTE: Call again at any point to process new logs
+
+        for manager_address, stream_index in index.indexes.items():
+            for stream in stream_index.active_streams():
+                ...
+
+    If `checkpoint` is given, the index of every StreamManager is persisted there.
+    """
+
+    def __init__(
+        self,
+        factory: StreamFactory,
+        start_block: int | None = None,
+        chunk_size: int = LOG_CHUNK_SIZE,
+        max_reorg_depth: int = MAX_REORG_DEPTH,
+        checkpoint: IndexCheckpoint | Path | str | None = None,
+    ):
+        self.factory = factory
+        self.chunk_size = chunk_size
+        self.max_reorg_depth = max_reorg_depth
+        self._start_block = start_block
+
+        if checkpoint is not None and not isinstance(checkpoint, IndexCheckpoint):
+            checkpoint = IndexCheckpoint(checkpoint)
+
+        self.checkpoint = checkpoint
+        # NOTE: Last block that `ManagerCreated` logs have been processed for
+        self.last_block: int | None = None
+        self.indexes: dict[AddressType, StreamIndex] = {}
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.FactoryIndex factory={self.factory.address} managers={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def _address(self, manager: Any) -> AddressType:
+        if isinstance(manager, StreamManager):
+            return manager.address
+
+        return self.conversion_manager.convert(manager, AddressType)
+
+    def __contains__(self, manager: Any) -> bool:
+        return self._address(manager) in self.indexes
+
+    def __getitem__(self, manager: Any) -> StreamIndex:
+        return self.indexes[self._address(manager)]
+
+    @property
+    def start_block(self) -> int:
+        if self._start_block is None:
+            self._start_block = _find_deployment_block(self.factory.address)
+
+        return self._start_block
+
+    @property
+    def managers(self) -> list[StreamManager]:
+        return [index.manager for index in self.indexes.values()]
+
+    def add_manager(self, manager: Any, start_block: int | None = None) -> StreamIndex:
+        """
+        Also index `manager` (e.g. if it was not deployed by the factory). Defaults to indexing
+        from the block it was deployed at.
+        """
+        address = self._address(manager)
+        if (index := self.indexes.get(address)) is None:
+            self.indexes[address] = index = StreamIndex(
+                manager if isinstance(manager, StreamManager) else StreamManager(address),
+                start_block=start_block,
+                chunk_size=self.chunk_size,
+                max_reorg_depth=self.max_reorg_depth,
+                checkpoint=self.checkpoint,
+            )
+
+        return index
+
+    def _discover_managers(self, start_block: int, stop_block: int):
+        event = self.factory.contract.ManagerCreated
+        log_filter = LogFilter.from_event(
+            event=event.abi,
+            addresses=[self.factory.address],
+            start_block=start_block,
+            stop_block=stop_block,
+        )
+        for log in self.provider.get_contract_logs(log_filter):
+            # NOTE: Also saves the factory from looking up the deployment later
+            self.factory._add_deployment(log.owner, log.manager)
+            # NOTE: StreamManager cannot have emitted any logs before it was created
+            self.add_manager(log.manager, start_block=log.block_number or start_block)
+
+    def sync(self, stop_block: int | None = None) -> int:
+        """
+        Discover new StreamManagers, and process the logs of all of them up to `stop_block`
+        (defaults to the latest block). Returns the number of Stream logs processed.
+        """
+        block = (
+            self.chain_manager.blocks.head
+            if stop_block is None
+            else self.chain_manager.blocks[stop_block]
+        )
+        stop_block = block.number or 0
+        num_logs = 0
+
+        for index in self.indexes.values():
+            index._handle_reorg()
+
+        next_discovery = self.start_block if self.last_block is None else self.last_block + 1
+        start_block = min([next_discovery, *(index._next_block for index in self.indexes.values())])
+        for chunk_start in range(start_block, stop_block + 1, self.chunk_size):
+            chunk_stop = min(chunk_start + self.chunk_size - 1, stop_block)
+            if chunk_stop >= next_discovery:
+                self._discover_managers(max(chunk_start, next_discovery), chunk_stop)
+                self.last_block = chunk_stop
+
+            # NOTE: Some indexes may be ahead of others (e.g. if restored from a checkpoint)
+            next_blocks = {
+                address: next_block
+                for address, index in self.indexes.items()
+                if (next_block := index._next_block) <= chunk_stop
+            }
+            if not next_blocks:
+                continue
+
+            log_filter = _stream_log_filter(
+                self.indexes[next(iter(next_blocks))].manager, list(next_blocks)
+            )
+            for log in self.provider.get_contract_logs(
+                log_filter.model_copy(update=dict(start_block=chunk_start, stop_block=chunk_stop))
+            ):
+                # NOTE: Route each log to the index of the StreamManager that emitted it
+                if (log.block_number or 0) >= next_blocks.get(log.contract_address, stop_block + 1):
+                    num_logs += self.indexes[log.contract_address].apply_log(log)
+
+            for address in next_blocks:
+                self.indexes[address]._chunk_synced(chunk_stop, stop_block)
+
+        self.last_block = stop_block
+        for index in self.indexes.values():
+            index._synced(block)
+
+        return num_logs
+
+    def all_streams(self) -> Iterator[Stream]:
+        for index in self.indexes.values():
+            yield from index.all_streams()
+
+    def active_streams(self, timestamp: int | None = None) -> Iterator[Stream]:
+        for index in self.indexes.values():
+            yield from index.active_streams(timestamp=timestamp)
+
+    def unclaimed_streams(self, timestamp: int | None = None) -> Iterator[Stream]:
+        for index in self.indexes.values():
+            yield from index.unclaimed_streams(timestamp=timestamp)
+
+    def streams_by_owner(self, owner: Any) -> Iterator[Stream]:
+        for index in self.indexes.values():
+            yield from index.streams_by_owner(owner)
@@ -1,27 +1,37 @@
+import asyncio
 import inspect
-from collections.abc import Iterator
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta
 from difflib import Differ
 from functools import partial, wraps
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Union, cast
 
-from ape.api import ReceiptAPI
+from ape.api import AccountAPI, BlockAPI, ReceiptAPI
 from ape.contracts.base import ContractEvent, ContractInstance, ContractTransactionHandler
-from ape.exceptions import ContractLogicError, DecodingError
+from ape.exceptions import ApeException, ContractLogicError, DecodingError
 from ape.logging import logger
-from ape.types import AddressType, ContractLog, HexBytes
+from ape.types import AddressType, ContractLog, HexBytes, LogFilter
 from ape.utils import BaseInterfaceModel, cached_property
+from ape.utils.basemodel import BaseModel
 from ape_ethereum import multicall
-from pydantic import field_validator
+from pydantic import PrivateAttr, field_validator
 
+from .checkpoint import IndexCheckpoint
 from .exceptions import (
     NotEnoughAllowance,
     NoValidProducts,
     StreamLifeInsufficient,
+    StreamNotSubmitted,
+    StreamRejected,
     TokenNotAccepted,
 )
 from .package import MANIFEST
-from .streams import Stream
+from .scheduler import ExpiryScheduler
+from .streams import Stream, StreamInfo
+from .utils import batched, shared_executor
 from .validators import Validator
 
 if TYPE_CHECKING:
@@ -29,12 +39,92 @@ if TYPE_CHECKING:
     from silverback import SilverbackApp
 
 MAX_DURATION_SECONDS = int(timedelta.max.total_seconds()) - 1
+# NOTE: Stream structs are fairly large, so this keeps each multicall to a reasonable size
+SNAPSHOT_BATCH_SIZE = 100
+MAX_CONCURRENT_CALLS = 16
+# NOTE: Same as `MAX_VALIDATORS` in `StreamManager.vy`
+MAX_VALIDATORS = 10
+# NOTE: Number of blocks to remember the validator set (and accepted tokens) for
+VALIDATOR_CACHE_SIZE = 128
+# NOTE: Seconds to use the latest accepted tokens for, when not checked against a block (about
+#       one block on mainnet)
+ACCEPTED_TOKENS_TTL = 12.0
+# NOTE: Seconds to use the latest block for, before looking it up again (`None` uses the block
+#       time of the network, so it is looked up at most once per block)
+HEAD_TTL: float | None = None
+# NOTE: Number of transactions that can be submitted (but not yet confirmed) at once
+MAX_PENDING_TRANSACTIONS = 4
+# NOTE: Number of Streams (and blocks) to keep the state decoded from logs for, in bots
+LOG_CACHE_SIZE = 10_000
+# NOTE: Number of owners (and tokens) to remember the Streams of, for `StreamManager.streams`
+TOPIC_INDEX_CACHE_SIZE = 10_000
+# NOTE: Number of recent blocks to query again when updating those (in case of re-orgs)
+TOPIC_INDEX_OVERLAP = 64
 
 _ValidatorItem = Union[Validator, ContractInstance, AddressType]
 
 
+class StreamRequest(BaseModel):
+    """
+    A Stream to create using `StreamManager.create_many`.
+    """
+
+    sender: AccountAPI
+    token: ContractInstance
+    amount: int
+    products: list[HexBytes]
+    min_stream_life: timedelta | None = None
+
+
+class StreamCreation(BaseModel):
+    """
+    Outcome of a single `StreamRequest` in `StreamManager.create_many`.
+    """
+
+    request: StreamRequest
+    stream: Stream | None = None
+    receipt: ReceiptAPI | None = None
+    # NOTE: Why the Stream was not created (if it wasn't)
+    error: Exception | None = None
+
+
 class StreamManager(BaseInterfaceModel):
     address: AddressType
+    # NOTE: Max number of calls to make concurrently when multicall is not available
+    max_concurrent_calls: int = MAX_CONCURRENT_CALLS
+
+    # NOTE: Resolved once, since every call made to this StreamManager goes through them
+    _contract: ContractInstance | None = PrivateAttr(default=None)
+    _validator_instances: dict[AddressType, Validator] = PrivateAttr(default_factory=dict)
+    # NOTE: Incremented every time a Stream is known to be modified, to invalidate cached state
+    _stream_versions: dict[int, int] = PrivateAttr(default_factory=dict)
+    # NOTE: Validator set by block hash (validators can only change in a transaction, and using
+    #       the hash means a re-org'd block is never looked up by mistake)
+    _validators_cache: dict[HexBytes, tuple[AddressType, ...]] = PrivateAttr(default_factory=dict)
+    # NOTE: Tokens that may be accepted (discovered from how this StreamManager was created, and
+    #       from any token seen since), and which of them are accepted by block hash
+    _token_candidates: set[AddressType] | None = PrivateAttr(default=None)
+    _accepted_tokens_cache: dict[HexBytes, frozenset[AddressType]] = PrivateAttr(
+        default_factory=dict
+    )
+    # NOTE: Latest accepted tokens, along with when they were read (see `ACCEPTED_TOKENS_TTL`)
+    _latest_accepted_tokens: tuple[float, frozenset[AddressType]] | None = PrivateAttr(default=None)
+    # NOTE: Latest block, along with when it was seen (see `HEAD_TTL`), shared by every Stream
+    _head: tuple[float, BlockAPI] | None = PrivateAttr(default=None)
+    # NOTE: State of each Stream decoded from the last log seen for it, and the position of that
+    #       log (`(block_number, log_index)`), so bots don't have to fetch it again
+    _log_infos: dict[int, tuple[tuple[int, int], StreamInfo]] = PrivateAttr(default_factory=dict)
+    _block_timestamps: dict[tuple[int, HexBytes | None], int] = PrivateAttr(default_factory=dict)
+    # NOTE: IDs of the Streams created for (or transferred to) each owner, and in each token,
+    #       from the indexed topics of logs, along with the last block that was queried
+    _topic_indices: dict[tuple[str, AddressType], tuple[int, set[int]]] = PrivateAttr(
+        default_factory=dict
+    )
+    _deployment_block: int | None = PrivateAttr(default=None)
+    # NOTE: IDs of the apps that already track every log of this StreamManager
+    _tracking_apps: set[int] = PrivateAttr(default_factory=set)
+    # NOTE: Schedulers to load on startup, by the ID of the app they are used in
+    _expiry_schedulers: dict[int, list[ExpiryScheduler]] = PrivateAttr(default_factory=dict)
 
     def __init__(self, address, /, *args, **kwargs):
         kwargs["address"] = address
@@ -46,11 +136,14 @@ class StreamManager(BaseInterfaceModel):
 
     @property
     def contract(self) -> ContractInstance:
-        return self.chain_manager.contracts.instance_at(
-            self.address,
-            contract_type=MANIFEST.StreamManager.contract_type,
-            detect_proxy=False,
-        )
+        if self._contract is None:
+            self._contract = self.chain_manager.contracts.instance_at(
+                self.address,
+                contract_type=MANIFEST.StreamManager.contract_type,
+                detect_proxy=False,
+            )
+
+        return self._contract
 
     def __repr__(self) -> str:
         return f"<apepay_sdk.StreamManager address={self.address}>"
@@ -63,12 +156,11 @@ class StreamManager(BaseInterfaceModel):
     def set_controller(self) -> ContractTransactionHandler:
         return self.contract.set_controller
 
-    @property
-    def validators(self) -> list[Validator]:
+    def _load_validators(self, block_id: int) -> tuple[AddressType, ...]:
         call = multicall.Call()
-        [call.add(self.contract.validators, idx) for idx in range(20)]
+        [call.add(self.contract.validators, idx) for idx in range(MAX_VALIDATORS)]
         try:
-            return [Validator(addr, manager=self) for addr in call() if addr is not None]
+            return tuple(addr for addr in call(block_id=block_id) if addr is not None)
 
         except multicall.exceptions.UnsupportedChainError:
             pass
@@ -76,17 +168,51 @@ class StreamManager(BaseInterfaceModel):
         # Handle if multicall isn't available via brute force (e.g. local testing)
         validators = []
 
-        for idx in range(20):  # NOTE: Max of 20 validators per contract
+        for idx in range(MAX_VALIDATORS):
             try:
-                validator_address = self.contract.validators(idx)
+                validators.append(self.contract.validators(idx, block_id=block_id))
 
             except (ContractLogicError, DecodingError):
-                # NOTE: Vyper returns no data if not a valid index
+                # NOTE: Vyper returns no data if not a valid index (so we are past the end)
                 break
 
-            validators.append(Validator(validator_address, manager=self))
+        return tuple(validators)
 
-        return validators
+    def _cache_validators(self, block: BlockAPI, validators: tuple[AddressType, ...]):
+        self._validators_cache[block.hash] = validators
+
+        while len(self._validators_cache) > VALIDATOR_CACHE_SIZE:
+            # NOTE: Dicts are insertion-ordered, so this is the oldest cached block
+            del self._validators_cache[next(iter(self._validators_cache))]
+
+    def validators_at(self, block_id: int | BlockAPI | None = None) -> list[Validator]:
+        """
+        The validator set as of `block_id` (defaults to latest), only read from chain once per
+        block. Costs a single block header lookup when it is already cached.
+        """
+        block = (
+            block_id
+            if isinstance(block_id, BlockAPI)
+            else self.chain_manager.blocks[-1 if block_id is None else block_id]
+        )
+
+        if (validators := self._validators_cache.get(block.hash)) is None:
+            validators = self._load_validators(block.number)
+            self._cache_validators(block, validators)
+
+        return [self._validator(addr) for addr in validators]
+
+    def _validator(self, address: AddressType) -> Validator:
+        if (validator := self._validator_instances.get(address)) is None:
+            validator = Validator(address, manager=self)
+            self._validator_instances[address] = validator
+
+        return validator
+
+    @property
+    def validators(self) -> list[Validator]:
+        # NOTE: Cached until the next block (or until changed via `set_validators`)
+        return self.validators_at()
 
     @property
     def _parse_validator(self) -> Callable[[_ValidatorItem], Validator]:
@@ -109,7 +235,13 @@ class StreamManager(BaseInterfaceModel):
                     Differ().compare(tuple(v.address for v in self.validators), new_validators)
                 )
             )
-            return self.contract.set_validators(new_validators, **txn_kwargs)
+            receipt = self.contract.set_validators(new_validators, **txn_kwargs)
+
+            if not receipt.failed:
+                # NOTE: We know the new set, so no need to read it from chain again
+                self._cache_validators(receipt.block, tuple(new_validators))
+
+            return receipt
 
         return cast(ContractTransactionHandler, set_validators)
 
@@ -139,14 +271,127 @@ class StreamManager(BaseInterfaceModel):
             **txn_kwargs,
         )
 
+    def _creation_tokens(self) -> set[AddressType]:
+        try:
+            creation = self.chain_manager.contracts.get_creation_metadata(self.address)
+
+        except (ApeException, NotImplementedError):
+            creation = None
+
+        if creation is None:
+            return set()  # NOTE: Provider cannot tell how this StreamManager was created
+
+        receipt = self.provider.get_receipt(creation.txn_hash)
+        if creation.factory is None:
+            contract_type = MANIFEST.StreamManager.contract_type
+            # NOTE: Constructor arguments are appended to the deployment bytecode
+            offset = len(contract_type.deployment_bytecode.to_bytes())  # type: ignore[union-attr]
+            try:
+                args = self.provider.network.ecosystem.decode_calldata(
+                    contract_type.constructor, receipt.transaction.data[offset:]
+                )
+
+            except DecodingError:
+                return set()
+
+            return set(args["accepted_tokens"])
+
+        factory = MANIFEST.StreamFactory.at(creation.factory)
+        return {
+            address
+            for log in receipt.events.filter(factory.ManagerCreated)
+            if log.manager == self.address
+            for address in log.accepted_tokens
+        }
+
+    def _add_token_candidates(self, *tokens: AddressType):
+        if self._token_candidates is None:
+            self._token_candidates = self._creation_tokens()
+
+        if new_tokens := set(tokens) - self._token_candidates:
+            self._token_candidates |= new_tokens
+            # NOTE: Cached sets do not include the new tokens
+            self._clear_accepted_tokens()
+
+    def _clear_accepted_tokens(self):
+        self._accepted_tokens_cache.clear()
+        self._latest_accepted_tokens = None
+
+    def _load_accepted_tokens(self, block_id: int | None) -> frozenset[AddressType]:
+        self._add_token_candidates()
+        tokens = sorted(self._token_candidates or ())
+        is_accepted = self._bulk_call(
+            [(self.contract.token_is_accepted, (token,)) for token in tokens], block_id
+        )
+        return frozenset(token for token, accepted in zip(tokens, is_accepted) if accepted)
+
+    def accepted_tokens_at(self, block_id: int | BlockAPI | None = None) -> frozenset[AddressType]:
+        """
+        Every token known to be accepted as of `block_id` (defaults to latest), only read from
+        chain once per block (see `validators_at`).
+
+        Tokens are discovered from the arguments this StreamManager was created with, and from
+        every token since added through this object or seen in a Stream. The contract does not
+        log `set_token_accepted`, so tokens accepted elsewhere are only found once used.
+        """
+        block = (
+            block_id
+            if isinstance(block_id, BlockAPI)
+            else self.chain_manager.blocks[-1 if block_id is None else block_id]
+        )
+
+        if (tokens := self._accepted_tokens_cache.get(block.hash)) is None:
+            tokens = self._load_accepted_tokens(block.number)
+            self._accepted_tokens_cache[block.hash] = tokens
+
+            while len(self._accepted_tokens_cache) > VALIDATOR_CACHE_SIZE:
+                del self._accepted_tokens_cache[next(iter(self._accepted_tokens_cache))]
+
+        return tokens
+
+    @property
+    def accepted_tokens(self) -> frozenset[AddressType]:
+        # NOTE: Cached for `ACCEPTED_TOKENS_TTL` seconds (or until changed via `add_token` or
+        #       `remove_token`), so it does not need to look up the latest block every time
+        if (latest := self._latest_accepted_tokens) is None or time.monotonic() - latest[
+            0
+        ] > ACCEPTED_TOKENS_TTL:
+            latest = time.monotonic(), self._load_accepted_tokens(None)
+            self._latest_accepted_tokens = latest
+
+        return latest[1]
+
     def add_token(self, token: AddressType, **txn_kwargs) -> ReceiptAPI:
-        return self.contract.set_token_accepted(token, True, **txn_kwargs)
+        receipt = self.contract.set_token_accepted(token, True, **txn_kwargs)
+        self._add_token_candidates(self.conversion_manager.convert(token, AddressType))
+        self._clear_accepted_tokens()
+        return receipt
 
     def remove_token(self, token: AddressType, **txn_kwargs) -> ReceiptAPI:
-        return self.contract.set_token_accepted(token, False, **txn_kwargs)
+        receipt = self.contract.set_token_accepted(token, False, **txn_kwargs)
+        self._clear_accepted_tokens()
+        return receipt
+
+    def is_accepted(self, token: AddressType, block_id: int | BlockAPI | None = None) -> bool:
+        """
+        Whether `token` is accepted as of `block_id` (defaults to `accepted_tokens`), which is a
+        local lookup if it is a known token.
+        """
+        token = self.conversion_manager.convert(token, AddressType)
+        if token in (
+            self.accepted_tokens if block_id is None else self.accepted_tokens_at(block_id)
+        ):
+            return True
 
-    def is_accepted(self, token: AddressType) -> bool:
-        return self.contract.token_is_accepted(token)
+        elif token in (self._token_candidates or ()):
+            return False  # NOTE: Known token, and not accepted
+
+        elif accepted := self.contract.token_is_accepted(
+            token, block_id=block_id.number if isinstance(block_id, BlockAPI) else block_id
+        ):
+            self._add_token_candidates(token)
+
+        return accepted
 
     @cached_property
     def MIN_STREAM_LIFE(self) -> timedelta:
@@ -217,14 +462,321 @@ class StreamManager(BaseInterfaceModel):
 
         # NOTE: Does not require tracing (unlike `.return_value`)
         log = tx.events.filter(self.contract.StreamCreated)[-1]
+        # NOTE: The Stream does not exist before the block it was created in
+        self._update_head()
         return Stream(manager=self, id=log.stream_id)
 
+    def _bulk_call(self, calls: list[tuple[Any, tuple]], block_number: int | None) -> list[Any]:
+        if not calls:
+            return []
+
+        call = multicall.Call()
+        [call.add(method, *args) for method, args in calls]
+        try:
+            return list(call(block_id=block_number))
+
+        except multicall.exceptions.UnsupportedChainError:
+            pass
+
+        # Handle if multicall isn't available via concurrent calls (e.g. local testing)
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_calls) as executor:
+            return list(
+                executor.map(lambda c: c[0](*c[1], block_id=block_number), calls)  # type: ignore
+            )
+
+    def _check_requests(
+        self, results: list[StreamCreation]
+    ) -> Iterator[tuple[StreamCreation, timedelta]]:
+        from .quotes import QuoteEngine  # NOTE: Avoid circular import
+
+        block = self.chain_manager.blocks.head
+        tokens = list({r.request.token.address: r.request.token for r in results}.values())
+        funders = list(
+            {
+                (r.request.sender.address, r.request.token.address): r.request for r in results
+            }.values()
+        )
+        reads = iter(
+            self._bulk_call(
+                [(self.contract.token_is_accepted, (token.address,)) for token in tokens]
+                + [(r.token.balanceOf, (r.sender.address,)) for r in funders]
+                + [(r.token.allowance, (r.sender.address, self.address)) for r in funders],
+                block.number,
+            )
+        )
+        accepted = {token.address: bool(next(reads)) for token in tokens}
+        balances = [next(reads) or 0 for _ in funders]
+        available = {
+            (r.sender.address, r.token.address): min(balance, next(reads) or 0)
+            for r, balance in zip(funders, balances)
+        }
+
+        for result in results:
+            if not accepted[result.request.token.address]:
+                result.error = TokenNotAccepted(str(result.request.token))
+
+            elif result.request.amount <= 0:
+                result.error = ValueError("Cannot create a Stream without funding.")
+
+        # NOTE: Compute stream life for every request in a single round of validator calls (for
+        #       the exact amount of each, since it is used as `min_stream_life`)
+        needs_quote = [r for r in results if r.error is None and r.request.min_stream_life is None]
+        quotes = QuoteEngine(self, ttl=None, exact=True).quote_each(
+            (r.request.sender, r.request.token, r.request.amount, r.request.products)
+            for r in needs_quote
+        )
+        quotes_by_result = {id(r): quote for r, quote in zip(needs_quote, quotes)}
+
+        for result in results:
+            if result.error is not None:
+                continue
+
+            request = result.request
+            if (quote := quotes_by_result.get(id(result))) is None:
+                assert request.min_stream_life is not None  # for mypy
+                min_stream_life = request.min_stream_life
+
+            elif quote.rejected_by:
+                result.error = StreamRejected(quote.rejected_by)
+                continue
+
+            elif quote.stream_life < self.MIN_STREAM_LIFE:
+                result.error = StreamLifeInsufficient(
+                    stream_life=quote.stream_life,
+                    min_stream_life=self.MIN_STREAM_LIFE,
+                )
+                continue
+
+            else:
+                # NOTE: Use this as a safety invariant for StreamManager logic
+                min_stream_life = quote.stream_life
+
+            # NOTE: Funds are shared by every request from the same sender for the same token
+            funder = (request.sender.address, request.token.address)
+            if available[funder] < request.amount:
+                result.error = NotEnoughAllowance(self.address)
+                continue
+
+            available[funder] -= request.amount
+            yield result, min_stream_life
+
+    def _create_stream(
+        self,
+        request: StreamRequest,
+        min_stream_life: timedelta,
+        nonce: int,
+        **txn_kwargs,
+    ) -> ReceiptAPI:
+        return self.contract.create_stream(
+            request.token,
+            request.amount,
+            request.products,
+            int(min_stream_life.total_seconds()),
+            sender=request.sender,
+            nonce=nonce,
+            **txn_kwargs,
+        )
+
+    def create_many(
+        self,
+        requests: Iterable[StreamRequest],
+        max_pending_transactions: int = MAX_PENDING_TRANSACTIONS,
+        **txn_kwargs,
+    ) -> list[StreamCreation]:
+        """
+        Create a Stream for each of `requests` (which may be from many senders), returning the
+        outcome of each request (in order).
+
+        Token acceptance, balances, allowances and stream life are checked for every request
+        up-front using bulk reads. Requests that pass are submitted with sequential nonces per
+        sender, with up to `max_pending_transactions` transactions in flight at once. If one fails,
+        the remaining requests from the same sender are not submitted.
+        """
+        results = [StreamCreation(request=request) for request in requests]
+        if not results:
+            return results
+
+        nonces: dict[AddressType, int] = {}
+        failed: set[AddressType] = set()
+        pending: list[tuple[StreamCreation, Future]] = []
+
+        with ThreadPoolExecutor(max(max_pending_transactions, 1)) as executor:
+            for result, min_stream_life in list(self._check_requests(results)):
+                sender = result.request.sender.address
+                # NOTE: Stop submitting from a sender if one of their transactions already failed
+                failed.update(
+                    r.request.sender.address for r, f in pending if f.done() and f.exception()
+                )
+                if sender in failed:
+                    result.error = StreamNotSubmitted(sender)
+                    continue
+
+                if sender not in nonces:
+                    nonces[sender] = result.request.sender.nonce
+
+                args = (result.request, min_stream_life, nonces[sender])
+                nonces[sender] += 1
+
+                if max_pending_transactions >= 1:
+                    pending.append(
+                        (result, executor.submit(self._create_stream, *args, **txn_kwargs))
+                    )
+                    continue
+
+                # NOTE: Useful for providers that can't handle concurrent requests
+                try:
+                    result.receipt = self._create_stream(*args, **txn_kwargs)
+
+                except Exception as err:
+                    result.error = err
+                    failed.add(sender)
+
+            for result, future in pending:
+                try:
+                    result.receipt = future.result()
+
+                except Exception as err:
+                    result.error = err
+
+        # NOTE: The Streams do not exist before the blocks they were created in
+        self._update_head()
+        for result in results:
+            if result.receipt is not None:
+                # NOTE: Does not require tracing (unlike `.return_value`)
+                log = result.receipt.events.filter(self.contract.StreamCreated)[-1]
+                result.stream = Stream(manager=self, id=log.stream_id)
+
+        return results
+
+    @property
+    def head(self) -> BlockAPI:
+        """
+        Latest block, shared by every Stream of this StreamManager to check if their cached state
+        is still current. Only looked up again once a new block may have been produced.
+        """
+        ttl = self.provider.network.block_time if HEAD_TTL is None else HEAD_TTL
+        if (latest := self._head) is None or time.monotonic() - latest[0] >= ttl:
+            return self._update_head()
+
+        return latest[1]
+
+    def _update_head(self) -> BlockAPI:
+        block = self.chain_manager.blocks.head
+        self._head = time.monotonic(), block
+        return block
+
+    def _observe_head(self, block: BlockAPI):
+        # NOTE: Blocks seen by bots (e.g. from logs) are the latest if they are newer, which saves
+        #       looking it up again
+        if (latest := self._head) is None or (block.number or 0) > (latest[1].number or 0):
+            self._head = time.monotonic(), block
+
+    def _invalidate_stream(self, stream_id: int):
+        self._stream_versions[stream_id] = self._stream_versions.get(stream_id, 0) + 1
+
+    def _log_timestamp(self, log: ContractLog) -> int:
+        # NOTE: Include the hash, so a re-org'd block is never looked up by mistake
+        key = (log.block_number or 0, log.block_hash)
+
+        if (timestamp := self._block_timestamps.get(key)) is None:
+            # NOTE: Only look up each block once, even if it has many logs
+            block = log.block
+            self._observe_head(block)
+            self._block_timestamps[key] = timestamp = block.timestamp
+
+            while len(self._block_timestamps) > LOG_CACHE_SIZE:
+                del self._block_timestamps[next(iter(self._block_timestamps))]
+
+        return timestamp
+
+    def _apply_log(self, log: ContractLog) -> StreamInfo | None:
+        """
+        Update the state of the Stream that emitted `log` from the last log seen for it. Returns
+        `None` if that is not possible (e.g. no previous log was seen).
+        """
+        stream_id = log.stream_id
+        position = (log.block_number or 0, log.log_index or 0)
+        cached = self._log_infos.pop(stream_id, None)
+        info = None
+
+        if log.event_name == "StreamCreated":
+            info = StreamInfo.from_log(log, self._log_timestamp(log))
+            # NOTE: Token must have been accepted to create the Stream
+            if self._token_candidates is not None:
+                self._add_token_candidates(log.token)
+
+        elif cached is None:
+            pass  # NOTE: Nothing to apply `log` to
+
+        elif position > cached[0]:
+            info = cached[1].apply_log(log, self._log_timestamp(log))
+
+        elif position == cached[0] or (
+            # NOTE: Claim made by `fund_stream`, which was already included by `StreamFunded`
+            log.event_name == "StreamClaimed"
+            and position == (cached[0][0], cached[0][1] - 1)
+        ):
+            position, info = cached
+
+        # NOTE: Otherwise, logs were seen out of order, so the Stream has to be fetched again
+
+        if info is not None:
+            self._log_infos[stream_id] = (position, info)
+
+            while len(self._log_infos) > LOG_CACHE_SIZE:
+                del self._log_infos[next(iter(self._log_infos))]
+
+        # NOTE: Any cached state for this Stream is now out of date
+        self._invalidate_stream(stream_id)
+        return info
+
+    def _stream_from_log(self, log: ContractLog) -> Stream:
+        stream = Stream(manager=self, id=log.stream_id)
+
+        if (info := self._apply_log(log)) is not None:
+            # NOTE: Not pinned, so it is only used while `log` is in the latest block (which is
+            #       the block of `log` when it is newer, see `_log_timestamp`), and handlers can
+            #       read every property from it without calling the chain
+            version = self._stream_versions.get(log.stream_id, 0)
+            stream._cache_info(info, version=version, block_hash=log.block_hash or None)
+
+        return stream
+
+    def _track_logs(self, app: "SilverbackApp"):
+        # NOTE: Every log must be seen in order to keep the state decoded from logs up to date
+        if id(app) in self._tracking_apps:
+            return
+
+        self._tracking_apps.add(id(app))
+
+        def log_tracker(event: ContractEvent):
+            async def track_log(log: ContractLog):
+                self._apply_log(log)
+
+            track_log.__name__ = f"apepay_{self.address}_track_{event.name}"
+            return track_log
+
+        for event in (
+            self.contract.StreamCreated,
+            self.contract.StreamFunded,
+            self.contract.StreamClaimed,
+            self.contract.StreamCancelled,
+            self.contract.StreamOwnershipUpdated,
+        ):
+            app.on_(event)(log_tracker(event))
+
     def _parse_stream_decorator(self, app: "SilverbackApp", container: ContractEvent):
 
         def decorator(f):
+            self._track_logs(app)
+            # NOTE: The raw log is only given to handlers that ask for it
+            wants_log = "log" in inspect.signature(f).parameters
 
             async def inner(log: ContractLog, **dependencies):
-                stream = Stream(manager=self, id=log.stream_id)
+                stream = self._stream_from_log(log)
+
+                if wants_log:
+                    dependencies["log"] = log
 
                 result = f(stream, **dependencies)
 
@@ -249,8 +801,13 @@ class StreamManager(BaseInterfaceModel):
             sm = StreamManager(address=...)
 
             sm.on_stream_created(app)
-            def do_something(stream):
+            def do_something(stream, log):  # NOTE: `log` is optional
                 ...  # Use `stream` to update your infrastructure
+
+        The state of `stream` right after `log` was emitted is decoded from the logs of this
+        StreamManager (which are all tracked by `app`), so reading it does not call the chain
+        while `log` is in the latest block. Afterwards (or if that state is not known, e.g. the
+        bot started after the Stream was created), it is fetched from the chain as usual.
         """
         return self._parse_stream_decorator(app, self.contract.StreamCreated)
 
@@ -262,8 +819,10 @@ class StreamManager(BaseInterfaceModel):
             sm = StreamManager(address=...)
 
             sm.on_stream_funded(app)
-            def do_something(stream):
+            def do_something(stream, log):  # NOTE: `log` is optional
                 ...  # Use `stream` to update your infrastructure
+
+        `stream` is decoded from logs when possible (see `on_stream_created`).
         """
         return self._parse_stream_decorator(app, self.contract.StreamFunded)
 
@@ -275,8 +834,10 @@ class StreamManager(BaseInterfaceModel):
             sm = StreamManager(address=...)
 
             sm.on_stream_claimed(app)
-            def do_something(stream):
+            def do_something(stream, log):  # NOTE: `log` is optional
                 ...  # Use `stream` to update your infrastructure
+
+        `stream` is decoded from logs when possible (see `on_stream_created`).
         """
         return self._parse_stream_decorator(app, self.contract.StreamClaimed)
 
@@ -288,21 +849,406 @@ class StreamManager(BaseInterfaceModel):
             sm = StreamManager(address=...)
 
             sm.on_stream_cancelled(app)
-            def do_something(stream):
+            def do_something(stream, log):  # NOTE: `log` is optional
                 ...  # Use `stream` to update your infrastructure
+
+        `stream` is decoded from logs when possible (see `on_stream_created`).
         """
         return self._parse_stream_decorator(app, self.contract.StreamCancelled)
 
-    def all_streams(self) -> Iterator[Stream]:
-        for stream_id in range(self.contract.num_streams()):
-            yield Stream(manager=self, id=stream_id)
+    def _load_expiries_on_startup(self, app: "SilverbackApp", scheduler: ExpiryScheduler):
+        if (schedulers := self._expiry_schedulers.get(id(app))) is not None:
+            if scheduler not in schedulers:
+                schedulers.append(scheduler)
+
+            return
+
+        self._expiry_schedulers[id(app)] = schedulers = [scheduler]
+
+        async def load_expiries(_):
+            if not (pending := [s for s in schedulers if len(s) == 0]):
+                return
+
+            # NOTE: A single scan loads every scheduler, and runs in the thread pool so that it
+            #       does not block the event loop
+            streams = await asyncio.get_running_loop().run_in_executor(
+                shared_executor(), lambda: list(self.active_streams())
+            )
+            for s in pending:
+                s.load(streams)
+
+        load_expiries.__name__ = f"apepay_{self.address}_load_expiries"
+        app.on_startup()(load_expiries)
+
+    def _track_expiries(self, app: "SilverbackApp", scheduler: ExpiryScheduler, name: str):
+        self._load_expiries_on_startup(app, scheduler)
+
+        def expiry_updater(event: ContractEvent):
+            async def update_expiry(log: ContractLog):
+                scheduler.apply_log(log)
+
+            update_expiry.__name__ = f"{name}_update_expiry_{event.name}"
+            return update_expiry
+
+        # NOTE: Each handler needs a unique name
+        for event in (
+            self.contract.StreamCreated,
+            self.contract.StreamFunded,
+            self.contract.StreamCancelled,
+            self.contract.StreamClaimed,
+        ):
+            app.on_(event)(expiry_updater(event))
+
+    def on_stream_expired(self, app: "SilverbackApp", scheduler: ExpiryScheduler | None = None):
+        """
+        Usage example::
+
+            app = SilverbackApp()
+            sm = StreamManager(address=...)
+
+            sm.on_stream_expired(app)
+            def do_something(stream):
+                ...  # Use `stream` to update your infrastructure
+
+        Expiries are tracked with `scheduler` (a new one, loaded from the active Streams on
+        startup, by default), which is kept up to date from the logs of this StreamManager.
+        Every new block only checks for Streams that expired at or before its timestamp. If the
+        handler raises, the Streams that were not handled yet are tried again on the next block.
+        """
+        if scheduler is None:
+            scheduler = ExpiryScheduler()
+
+        def decorator(f):
+            self._track_expiries(app, scheduler, f.__name__)
+
+            async def inner(block: BlockAPI, **dependencies):
+                self._observe_head(block)
+                expired = scheduler.pop_until(block.timestamp)
+                handled: set[int] = set()
+                results = []
+
+                try:
+                    for stream_id, _ in expired:
+                        result = f(Stream(manager=self, id=stream_id), **dependencies)
+
+                        if inspect.isawaitable(result):
+                            result = await result
+
+                        results.append(result)
+                        handled.add(stream_id)
+
+                finally:
+                    # NOTE: Put back every Stream that was not handled (if the handler raised), so
+                    #       it is handled on the next block instead
+                    for stream_id, expires_at in expired:
+                        if stream_id not in handled and stream_id not in scheduler:
+                            scheduler.schedule(stream_id, expires_at)
+
+                return results
+
+            # NOTE: Ensure that the name of original function is used in logs
+            inner.__name__ = f.__name__
+            return app.on_(self.chain_manager.blocks)(inner)
+
+        return decorator
+
+    def on_stream_expiring(
+        self,
+        app: "SilverbackApp",
+        within: timedelta,
+        checkpoint: IndexCheckpoint | Path | str | None = None,
+        scheduler: ExpiryScheduler | None = None,
+    ):
+        """
+        Usage example::
+
+            app = SilverbackApp()
+            sm = StreamManager(address=...)
+
+            sm.on_stream_expiring(app, within=timedelta(hours=24), checkpoint="~/.apepay.db")
+            def do_something(stream):
+                ...  # Warn the owner of `stream` that it is about to run out
+
+        Called once for each Stream when it has `within` (or less) time left (including Streams
+        created with less than that), and again only if it gets funded past that point and then
+        runs low again. Works like `on_stream_expired`, but also remembers the expiry of every
+        Stream that was handled in `checkpoint` (under the name of the handler), so restarting
+        the bot does not send them all again. If the handler raises, the Streams that were not
+        handled yet are tried again on the next block.
+        """
+        if scheduler is None:
+            scheduler = ExpiryScheduler()
+
+        if checkpoint is not None and not isinstance(checkpoint, IndexCheckpoint):
+            checkpoint = IndexCheckpoint(checkpoint)
+
+        window = int(within.total_seconds())
+
+        def decorator(f):
+            self._track_expiries(app, scheduler, f.__name__)
+            # NOTE: Expiry of every Stream that was handled (until it expires)
+            warned = ExpiryScheduler()
+            # NOTE: Horizon of the last block that was handled
+            last_horizon: int | None = None
+
+            async def load_warnings(_):
+                if checkpoint is not None and len(warned) == 0:
+                    for stream_id, expires_at in checkpoint.load_warnings(self, f.__name__).items():
+                        warned.schedule(stream_id, expires_at)
+
+            def should_warn(stream_id: int, expires_at: int) -> bool:
+                if (warned_at := warned.expires_at(stream_id)) is None:
+                    return True
+
+                elif warned_at == expires_at:
+                    return False  # NOTE: Already handled (e.g. before the bot was restarted)
+
+                # NOTE: Funded since it was handled, so only warn again if it was funded past the
+                #       window (Streams funded while still running low are back in it right away)
+                return last_horizon is None or expires_at > last_horizon
+
+            async def inner(block: BlockAPI, **dependencies):
+                nonlocal last_horizon
+                self._observe_head(block)
+                horizon = block.timestamp + window
+                expiring = scheduler.pop_until(horizon)
+                warned.pop_expired(block.timestamp)
+                handled: dict[int, int] = {}
+                results = []
+
+                try:
+                    for stream_id, expires_at in expiring:
+                        if should_warn(stream_id, expires_at):
+                            result = f(Stream(manager=self, id=stream_id), **dependencies)
+
+                            if inspect.isawaitable(result):
+                                result = await result
+
+                            results.append(result)
+
+                        warned.schedule(stream_id, expires_at)
+                        handled[stream_id] = expires_at
+
+                finally:
+                    # NOTE: Put back every Stream that was not handled (if the handler raised), so
+                    #       it is handled on the next block instead
+                    for stream_id, expires_at in expiring:
+                        if stream_id not in handled and stream_id not in scheduler:
+                            scheduler.schedule(stream_id, expires_at)
+
+                    if checkpoint is not None and handled:
+                        # NOTE: Only written when a Stream was handled, and not in the event loop
+                        await asyncio.get_running_loop().run_in_executor(
+                            shared_executor(),
+                            partial(
+                                checkpoint.save_warnings,
+                                self,
+                                f.__name__,
+                                handled,
+                                block.timestamp,
+                            ),
+                        )
+
+                last_horizon = horizon
+                return results
+
+            load_warnings.__name__ = f"{f.__name__}_load_warnings"
+            app.on_startup()(load_warnings)
+
+            inner.__name__ = f.__name__
+            return app.on_(self.chain_manager.blocks)(inner)
+
+        return decorator
+
+    def _load_info(
+        self,
+        stream_ids: Iterable[int],
+        block: BlockAPI,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> Iterator[tuple[int, StreamInfo]]:
+        method = self.contract.streams  # NOTE: Avoid re-building contract instance for every call
+        use_multicall = True
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_calls) as executor:
+            for stream_ids_batch in batched(stream_ids, batch_size):
+                results = None
+
+                if use_multicall:
+                    call = multicall.Call()
+                    [call.add(method, stream_id) for stream_id in stream_ids_batch]
+                    try:
+                        results = list(call(block_id=block.number))
+
+                    except multicall.exceptions.UnsupportedChainError:
+                        # NOTE: Don't bother trying again for the rest of the batches
+                        use_multicall = False
+
+                if results is None:
+                    # Handle if multicall isn't available via concurrent calls (e.g. local testing)
+                    results = list(
+                        executor.map(
+                            partial(method, block_id=block.number),
+                            stream_ids_batch,
+                        )
+                    )
+
+                for stream_id, struct in zip(stream_ids_batch, results):
+                    yield stream_id, StreamInfo.from_struct(struct, block)
+
+    def _load_streams(
+        self,
+        stream_ids: Iterable[int],
+        block_id: int | None = None,
+        pinned: bool | None = None,
+        **snapshot_kwargs,
+    ) -> Iterator[Stream]:
+        # NOTE: Any modifications seen before we start loading will be included in the snapshot
+        versions = dict(self._stream_versions)
+        if pinned is None:
+            # NOTE: Only pin to the snapshot if the user asked for a specific block
+            pinned = block_id is not None
+        block = self._update_head() if block_id is None else self.chain_manager.blocks[block_id]
+
+        for stream_id, info in self._load_info(stream_ids, block, **snapshot_kwargs):
+            stream = Stream(manager=self, id=stream_id)
+            stream._cache_info(
+                info, version=versions.get(stream_id, 0), pinned=pinned, block_hash=block.hash
+            )
+            yield stream
+
+    def load_streams(
+        self,
+        stream_ids: Iterable[int],
+        block_id: int | None = None,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> Iterator[Stream]:
+        """
+        Load the state of every Stream in `stream_ids` in bulk, pinned to `block_id` (defaults to
+        the latest block), and return `Stream` objects that are populated with that snapshot.
+        """
+        yield from self._load_streams(
+            stream_ids,
+            block_id=block_id,
+            batch_size=batch_size,
+        )
+
+    def _topic_stream_ids(self, topic: str, address: AddressType, stop_block: int) -> set[int]:
+        # NOTE: Every Stream that `address` was ever the `topic` of (as of `stop_block`), which
+        #       may include some that no longer are (e.g. if ownership was transferred away)
+        if self._deployment_block is None:
+            from .indexer import _find_deployment_block  # NOTE: Avoid circular import
+
+            self._deployment_block = _find_deployment_block(self.address)
+
+        queries = [(self.contract.StreamCreated, {topic: address})]
+        if topic == "owner":
+            queries.append((self.contract.StreamOwnershipUpdated, {"new_owner": address}))
+
+        last_block, stream_ids = self._topic_indices.pop((topic, address), (None, set()))
+        start_block = (
+            self._deployment_block
+            if last_block is None
+            else max(last_block - TOPIC_INDEX_OVERLAP + 1, self._deployment_block)
+        )
+
+        for event, search_topics in queries:
+            if start_block > stop_block:
+                break  # NOTE: Already up to date
+
+            log_filter = LogFilter.from_event(
+                event=event.abi,
+                search_topics=search_topics,
+                addresses=[self.address],
+                start_block=start_block,
+                stop_block=stop_block,
+            )
+            stream_ids.update(log.stream_id for log in self.provider.get_contract_logs(log_filter))
+
+        # NOTE: Re-inserted, so the least recently used are removed first
+        self._topic_indices[(topic, address)] = (max(stop_block, last_block or 0), stream_ids)
+        while len(self._topic_indices) > TOPIC_INDEX_CACHE_SIZE:
+            del self._topic_indices[next(iter(self._topic_indices))]
+
+        return stream_ids
+
+    def streams(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+        owner: Any = None,
+        token: Any = None,
+        product: bytes | None = None,
+        active: bool | None = None,
+        block_id: int | None = None,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> Iterator[Stream]:
+        """
+        Load (in bulk, like `load_streams`) every Stream with an ID in `range(start, stop)` that
+        matches all of the given filters, as of `block_id` (defaults to the latest block).
+
+        If `owner` or `token` are given, only the Streams found by querying the logs indexed by
+        them are loaded, so the cost is proportional to the number of Streams that match rather
+        than the total number of Streams. Those are remembered (and only new logs queried) for the
+        next time. `product` and `active` are checked after loading.
+        """
+        block = self._update_head() if block_id is None else self.chain_manager.blocks[block_id]
+        num_streams = self.contract.num_streams(block_id=block.number)
+        stop = num_streams if stop is None else min(stop, num_streams)
+
+        if owner is not None:
+            owner = self.conversion_manager.convert(owner, AddressType)
+
+        if token is not None:
+            token = self.conversion_manager.convert(token, AddressType)
+
+        if product is not None:
+            product = HexBytes(product)
+
+        candidates: set[int] | None = None
+        for topic, address in (("owner", owner), ("token", token)):
+            if address is not None:
+                stream_ids = self._topic_stream_ids(topic, address, block.number or 0)
+                candidates = stream_ids if candidates is None else candidates & stream_ids
+
+        for stream in self._load_streams(
+            (
+                range(start, stop)
+                if candidates is None
+                else sorted(s for s in candidates if start <= s < stop)
+            ),
+            # NOTE: Same block that the filters were read at
+            block_id=block.number,
+            pinned=block_id is not None,
+            batch_size=batch_size,
+        ):
+            # NOTE: Check the loaded snapshot (even if the chain has moved on since)
+            info = stream.snapshot
+            if (
+                (owner is None or info.owner == owner)
+                and (token is None or info.token == token)
+                and (product is None or product in info.products)
+                and (active is None or (info.time_left > 0) == active)
+            ):
+                yield stream
+
+    def all_streams(
+        self,
+        block_id: int | None = None,
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+    ) -> Iterator[Stream]:
+        yield from self._load_streams(
+            range(self.contract.num_streams(block_id=block_id)),
+            block_id=block_id,
+            batch_size=batch_size,
+        )
 
-    def active_streams(self) -> Iterator[Stream]:
-        for stream in self.all_streams():
-            if stream.is_active:
+    def active_streams(self, **snapshot_kwargs) -> Iterator[Stream]:
+        # NOTE: Filtered using the loaded snapshot (even if the chain has moved on since)
+        for stream in self.all_streams(**snapshot_kwargs):
+            if stream.snapshot.time_left > 0:
                 yield stream
 
-    def unclaimed_streams(self) -> Iterator[Stream]:
-        for stream in self.all_streams():
-            if stream.amount_claimable > 0:
+    def unclaimed_streams(self, **snapshot_kwargs) -> Iterator[Stream]:
+        for stream in self.all_streams(**snapshot_kwargs):
+            if stream.snapshot.amount_claimable > 0:
                 yield stream
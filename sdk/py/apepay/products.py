@@ -0,0 +1,225 @@
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from ape.types import ContractLog, HexBytes
+
+from .scheduler import ExpiryScheduler
+
+if TYPE_CHECKING:
+    from .indexer import StreamIndex
+    from .streams import Stream
+
+
+def bitmap_ids(bitmap: int) -> list[int]:
+    """
+    Every (Stream ID) bit that is set in `bitmap`, in ascending order.
+    """
+    # NOTE: Searching the (reversed) binary string is done in C, so this is O(set bits) in Python
+    bits = bin(bitmap)[:1:-1]
+    ids = []
+    index = bits.find("1")
+    while index != -1:
+        ids.append(index)
+        index = bits.find("1", index + 1)
+
+    return ids
+
+
+class ProductCatalog:
+    """
+    Catalog of every product code used by the Streams of a StreamManager, with a reverse index
+    from each product to the Streams that pay for it.
+
+    Each `bytes32` product code is interned into a small integer, and the Streams that pay for
+    each product are kept as a bitmap (a Python `int`, where bit N is set for Stream ID N), so set
+    queries over products are a handful of big-integer operations regardless of how many Streams
+    there are. Cancelled Streams are removed from the index, and expired Streams (see `expire`)
+    are excluded from queries with `active=True`.
+
+    Usage example::
+
+        catalog = ProductCatalog()
+        catalog.load(sm.all_streams())
+
+        for log in logs:  # NOTE: e.g. from a Silverback handler
+            catalog.apply_log(log)
+
+        catalog.expire(block.timestamp)
+        for stream_id in catalog.stream_ids([product], active=True):
+            ...  # Provision `product` for Stream
+    """
+
+    def __init__(self):
+        self.codes: list[HexBytes] = []
+        self._indices: dict[HexBytes, int] = {}
+        # NOTE: Bitmap of Streams that pay for each product (by index)
+        self._bitmaps: list[int] = []
+        # NOTE: Needed to clear the bits of a Stream when it is cancelled
+        self._stream_products: dict[int, tuple[int, ...]] = {}
+
+        # NOTE: Bitmap of Streams that have not expired as of `timestamp`
+        self._active = 0
+        self._scheduler = ExpiryScheduler()
+        self.timestamp: int | None = None
+
+    @classmethod
+    def from_index(cls, index: "StreamIndex") -> "ProductCatalog":
+        """
+        Build from the state of `index`, without calling the chain.
+        """
+        catalog = cls()
+        # NOTE: Cancelled Streams cannot be told apart from expired ones in a snapshot, so they
+        #       are indexed (as inactive) until the catalog is updated from their logs
+        for stream_id in sorted(index.streams):
+            info = index.streams[stream_id]
+            catalog.add_stream(stream_id, info.products, expires_at=info.expires_at)
+
+        if index.last_timestamp is not None:
+            catalog.expire(index.last_timestamp)
+
+        return catalog
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.ProductCatalog products={len(self)} streams={self.num_streams}>"
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: bytes) -> bool:
+        return HexBytes(code) in self._indices
+
+    @property
+    def num_streams(self) -> int:
+        return len(self._stream_products)
+
+    def intern(self, code: bytes) -> int:
+        """
+        Small integer that identifies product `code` (assigned in order codes are first seen).
+        """
+        code = HexBytes(code)
+        if (index := self._indices.get(code)) is None:
+            index = self._indices[code] = len(self.codes)
+            self.codes.append(code)
+            self._bitmaps.append(0)
+
+        return index
+
+    def products_of(self, stream_id: int) -> list[HexBytes]:
+        return [self.codes[index] for index in self._stream_products.get(stream_id, ())]
+
+    def add_stream(self, stream_id: int, products: Iterable[bytes], expires_at: int | None = None):
+        """
+        Index Stream `stream_id` under each of `products`. If `expires_at` is given, the Stream is
+        also active until then.
+        """
+        self.remove_stream(stream_id)
+
+        bit = 1 << stream_id
+        indices = tuple(self.intern(code) for code in products)
+        for index in indices:
+            self._bitmaps[index] |= bit
+
+        self._stream_products[stream_id] = indices
+
+        if expires_at is not None and (self.timestamp is None or expires_at > self.timestamp):
+            self._active |= bit
+            self._scheduler.schedule(stream_id, expires_at)
+
+    def remove_stream(self, stream_id: int):
+        if (indices := self._stream_products.pop(stream_id, None)) is None:
+            return
+
+        mask = ~(1 << stream_id)
+        for index in indices:
+            self._bitmaps[index] &= mask
+
+        self._active &= mask
+        self._scheduler.remove(stream_id)
+
+    def load(self, streams: Iterable["Stream"]):
+        """
+        Add every Stream in `streams` using their cached state (e.g. from `all_streams`).
+        """
+        for stream in streams:
+            info = stream.snapshot
+            self.add_stream(
+                stream.id,
+                info.products,
+                expires_at=(info.expires_at if info.time_left > 0 else None),
+            )
+
+    def apply_log(self, log: ContractLog):
+        """
+        Update the catalog from a log emitted by the StreamManager.
+        """
+        if log.event_name == "StreamCreated":
+            self.add_stream(log.stream_id, log.products, expires_at=log.timestamp + log.time_left)
+
+        elif log.event_name == "StreamCancelled":
+            # NOTE: Stream no longer pays for any of its products
+            self.remove_stream(log.stream_id)
+
+        elif log.event_name == "StreamFunded" and log.stream_id in self._scheduler:
+            self._scheduler.schedule(log.stream_id, log.timestamp + log.time_left)
+
+        elif log.event_name == "StreamClaimed" and log.is_expired:
+            self._active &= ~(1 << log.stream_id)
+            self._scheduler.remove(log.stream_id)
+
+    def expire(self, timestamp: int) -> list[int]:
+        """
+        Mark every Stream that has no time left at `timestamp` as inactive (and return them).
+        """
+        if self.timestamp is not None and timestamp < self.timestamp:
+            raise ValueError(f"Catalog has already been expired up to {self.timestamp}.")
+
+        self.timestamp = timestamp
+        expired = self._scheduler.pop_expired(timestamp)
+        for stream_id in expired:
+            self._active &= ~(1 << stream_id)
+
+        return expired
+
+    def bitmap(
+        self,
+        products: Iterable[bytes],
+        match_all: bool = False,
+        active: bool = False,
+    ) -> int:
+        """
+        Bitmap of the Streams that pay for any (or all, if `match_all`) of `products`, only
+        counting those that have not expired (see `expire`) if `active`.
+        """
+        bitmaps = [
+            self._bitmaps[index] if (index := self._indices.get(HexBytes(code))) is not None else 0
+            for code in products
+        ]
+
+        bitmap = 0
+        if match_all and bitmaps:
+            bitmap = bitmaps[0]
+            for other in bitmaps[1:]:
+                bitmap &= other
+
+        elif not match_all:
+            for other in bitmaps:
+                bitmap |= other
+
+        return bitmap & self._active if active else bitmap
+
+    def stream_ids(
+        self,
+        products: Iterable[bytes],
+        match_all: bool = False,
+        active: bool = False,
+    ) -> list[int]:
+        """
+        IDs (in ascending order) of the Streams that pay for any (or all, if `match_all`) of
+        `products`, see `bitmap`.
+        """
+        return bitmap_ids(self.bitmap(products, match_all=match_all, active=active))
+
+    def count(
+        self, products: Iterable[bytes], match_all: bool = False, active: bool = False
+    ) -> int:
+        return self.bitmap(products, match_all=match_all, active=active).bit_count()
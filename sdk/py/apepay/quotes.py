@@ -0,0 +1,250 @@
+import time
+from collections.abc import Iterable, Sequence
+from datetime import timedelta
+from typing import Any, NamedTuple
+
+from ape.exceptions import ContractLogicError
+from ape.types import AddressType, HexBytes
+from ape.utils import ManagerAccessMixin
+from ape.utils.basemodel import BaseModel
+from ape_ethereum import multicall
+
+from .exceptions import NoValidProducts
+from .manager import StreamManager
+from .validators import Validator
+
+# NOTE: How long a validator's result is re-used for, before asking it again
+DEFAULT_QUOTE_TTL = timedelta(minutes=5)
+
+# NOTE: `(funder, token, products)`
+_QuoteKey = tuple[AddressType, AddressType, tuple[HexBytes, ...]]
+# NOTE: `(key, amount)`, where amount is only set if each amount is validated separately
+_ResultKey = tuple[_QuoteKey, int | None]
+
+
+class _ValidatorResult(NamedTuple):
+    # NOTE: Amount the validator was asked to validate
+    amount: int
+    # NOTE: `None` if the validator rejected the Stream (assumed to be regardless of amount)
+    stream_life: int | None
+    block_number: int
+    fetched_at: float
+
+
+class Quote(BaseModel):
+    """
+    Stream life that `funder` would get for funding `amount` of `token` to pay for `products`.
+    """
+
+    funder: AddressType
+    token: AddressType
+    amount: int
+    products: list[HexBytes]
+    # NOTE: Stream life computed by each validator, in seconds (`None` if it rejected the Stream)
+    stream_lives: dict[AddressType, int | None]
+
+    @property
+    def rejected_by(self) -> list[AddressType]:
+        return [v for v, stream_life in self.stream_lives.items() if stream_life is None]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.rejected_by and self.stream_life > timedelta(seconds=0)
+
+    @property
+    def stream_life(self) -> timedelta:
+        # NOTE: Same as `StreamManager._compute_stream_life` (longest life given by any validator)
+        return timedelta(seconds=max((s or 0 for s in self.stream_lives.values()), default=0))
+
+    def amount_for(self, stream_life: timedelta) -> int:
+        """
+        Amount of `token` needed to fund a Stream for `products` for (at least) `stream_life`.
+        """
+        if (quoted_life := int(self.stream_life.total_seconds())) == 0:
+            raise NoValidProducts()
+
+        # NOTE: Round up, so the Stream lasts at least as long as requested
+        return -(-self.amount * int(stream_life.total_seconds()) // quoted_life)
+
+
+class QuoteEngine(ManagerAccessMixin):
+    """
+    Quote the stream life of many possible Streams (e.g. product combinations at checkout)
+    without creating them, and without calling `compute_stream_life` for every single one.
+
+    Each validator is called once per `(funder, token, products)` and the result is re-used for
+    `ttl` (or `max_age_blocks`). Results for other amounts are computed locally, assuming that
+    validators price products at a fixed rate (as described by the `Validator` interface), and
+    rounding down (so they may be a few seconds short). Use `StreamManager.compute_stream_life`
+    to get the exact value before creating a Stream, or set `exact` to validate every amount
+    separately (e.g. for validators that do not price products at a fixed rate).
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        engine = QuoteEngine(sm)
+        for quote in engine.quote_many(user, token, 10**18, [[product_a], [product_a, product_b]]):
+            print(quote.products, quote.stream_life, quote.amount_for(timedelta(days=30)))
+
+    All validator calls that are missing from the cache are made in a single multicall round.
+    """
+
+    def __init__(
+        self,
+        manager: StreamManager,
+        ttl: timedelta | None = DEFAULT_QUOTE_TTL,
+        max_age_blocks: int | None = None,
+        use_multicall: bool = True,
+        exact: bool = False,
+    ):
+        self.manager = manager
+        self.ttl = ttl
+        self.max_age_blocks = max_age_blocks
+        self.use_multicall = use_multicall
+        self.exact = exact
+
+        self._results: dict[tuple[AddressType, _ResultKey], _ValidatorResult] = {}
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.QuoteEngine manager={self.manager.address}>"
+
+    def clear(self):
+        """
+        Forget every cached validator result.
+        """
+        self._results.clear()
+
+    def _is_fresh(self, result: _ValidatorResult, block_number: int, now: float) -> bool:
+        if self.ttl is not None and now - result.fetched_at >= self.ttl.total_seconds():
+            return False
+
+        if self.max_age_blocks is not None and (
+            block_number - result.block_number >= self.max_age_blocks
+        ):
+            return False
+
+        return True
+
+    def _result_key(self, key: _QuoteKey, amount: int) -> _ResultKey:
+        return key, (amount if self.exact else None)
+
+    def _validate_many(
+        self,
+        calls: Sequence[tuple[Validator, _QuoteKey, int]],
+        block_number: int,
+    ) -> list[int | None]:
+        results: list[Any] | None = None
+
+        if self.use_multicall:
+            call = multicall.Call()
+            for validator, (funder, token, products), amount in calls:
+                call.add(validator.contract.validate, funder, token, amount, list(products))
+
+            try:
+                results = list(call(block_id=block_number))
+
+            except multicall.exceptions.UnsupportedChainError:
+                pass
+
+        if results is None:
+            results = [None] * len(calls)
+
+        for idx, (validator, (funder, token, products), amount) in enumerate(calls):
+            if results[idx] is not None:
+                continue
+
+            # NOTE: Either no multicall, or the validator reverted. In the latter case, try again
+            #       from the StreamManager, in case the validator depends on who is calling it.
+            try:
+                results[idx] = validator(
+                    funder, token, amount, list(products), block_id=block_number
+                )
+
+            except ContractLogicError:
+                pass
+
+        return results
+
+    def quote_each(self, requests: Iterable[tuple[Any, Any, int, Sequence[Any]]]) -> list[Quote]:
+        """
+        Quote each `(funder, token, amount, products)` in `requests` (in order).
+        """
+        requests_by_key: dict[_ResultKey, int] = {}
+        keys: list[tuple[_QuoteKey, int]] = []
+        for funder, token, amount, products in requests:
+            if amount <= 0:
+                raise ValueError("Cannot quote a Stream without funding.")
+
+            key = (
+                self.conversion_manager.convert(funder, AddressType),
+                self.conversion_manager.convert(token, AddressType),
+                tuple(HexBytes(p) for p in products),
+            )
+            # NOTE: If the same key is quoted twice, validate the first amount (unless `exact`)
+            requests_by_key.setdefault(self._result_key(key, amount), amount)
+            keys.append((key, amount))
+
+        head = self.chain_manager.blocks.head
+        validators = self.manager.validators_at(head)
+        now = time.monotonic()
+
+        missing: list[tuple[Validator, _QuoteKey, int]] = []
+        for (key, _), amount in requests_by_key.items():
+            for validator in validators:
+                result = self._results.get((validator.address, self._result_key(key, amount)))
+                if result is None or not self._is_fresh(result, head.number, now):
+                    missing.append((validator, key, amount))
+
+        if missing:
+            for (validator, key, amount), stream_life in zip(
+                missing, self._validate_many(missing, head.number)
+            ):
+                self._results[(validator.address, self._result_key(key, amount))] = (
+                    _ValidatorResult(
+                        amount=amount,
+                        stream_life=stream_life,
+                        block_number=head.number,
+                        fetched_at=now,
+                    )
+                )
+
+        quotes = []
+        for (funder, token, products), amount in keys:
+            stream_lives: dict[AddressType, int | None] = {}
+            result_key = self._result_key((funder, token, products), amount)
+            for validator in validators:
+                result = self._results[(validator.address, result_key)]
+                stream_lives[validator.address] = (
+                    None
+                    if result.stream_life is None
+                    # NOTE: Scale locally if the result was cached for a different amount
+                    else result.stream_life * amount // result.amount
+                )
+
+            quotes.append(
+                Quote(
+                    funder=funder,
+                    token=token,
+                    amount=amount,
+                    products=list(products),
+                    stream_lives=stream_lives,
+                )
+            )
+
+        return quotes
+
+    def quote_many(
+        self,
+        funder: Any,
+        token: Any,
+        amount: int,
+        product_lists: Iterable[Sequence[Any]],
+    ) -> list[Quote]:
+        """
+        Quote a Stream funded with `amount` of `token` by `funder`, for each list of products in
+        `product_lists` (in order).
+        """
+        return self.quote_each((funder, token, amount, products) for products in product_lists)
+
+    def quote(self, funder: Any, token: Any, amount: int, products: Sequence[Any]) -> Quote:
+        return self.quote_many(funder, token, amount, [products])[0]
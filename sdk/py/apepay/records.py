@@ -0,0 +1,202 @@
+from collections.abc import Hashable, Iterable, Iterator
+from typing import TYPE_CHECKING, TypeVar
+
+from ape.types import AddressType, HexBytes
+
+from .streams import Stream, StreamInfo
+
+if TYPE_CHECKING:
+    from .indexer import StreamIndex
+    from .manager import StreamManager
+
+_T = TypeVar("_T", bound=Hashable)
+
+
+class StreamRecord:
+    """
+    Compact state of a single Stream in `StreamRecords`. Owner, token and products are stored as
+    indices into the (interned) tables of the collection the record belongs to.
+    """
+
+    __slots__ = (
+        "id",
+        "owner_index",
+        "token_index",
+        "products_index",
+        "funded_amount",
+        "expires_at",
+        "last_update",
+        "last_claim",
+        "block_number",
+        "timestamp",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        owner_index: int,
+        token_index: int,
+        products_index: int,
+        funded_amount: int,
+        expires_at: int,
+        last_update: int,
+        last_claim: int,
+        block_number: int,
+        timestamp: int,
+    ):
+        self.id = id
+        self.owner_index = owner_index
+        self.token_index = token_index
+        self.products_index = products_index
+        self.funded_amount = funded_amount
+        self.expires_at = expires_at
+        self.last_update = last_update
+        self.last_claim = last_claim
+        self.block_number = block_number
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.StreamRecord id={self.id}>"
+
+
+class StreamRecords:
+    """
+    Memory-compact collection of the state of many Streams in `manager`, for bots that have to
+    keep track of (hundreds of) thousands of them at once.
+
+    Each Stream is stored as a `StreamRecord` (using `__slots__`), and every owner, token and set
+    of products is only stored once no matter how many Streams share it. A full `Stream` (with
+    its state cached, so no calls are made) is only created when requested.
+
+    Usage example::
+
+        index = StreamIndex(StreamManager(address=...))
+        index.sync()
+        records = StreamRecords.from_index(index, index.unclaimed_streams())
+
+        for stream_id in records:
+            stream = records.stream(stream_id)  # NOTE: Created on demand
+            ...
+    """
+
+    def __init__(self, manager: "StreamManager"):
+        self.manager = manager
+        self._records: dict[int, StreamRecord] = {}
+
+        self.owners: list[AddressType] = []
+        self.tokens: list[AddressType] = []
+        self.products: list[tuple[HexBytes, ...]] = []
+        self._owner_indices: dict[AddressType, int] = {}
+        self._token_indices: dict[AddressType, int] = {}
+        self._products_indices: dict[tuple[HexBytes, ...], int] = {}
+
+    @classmethod
+    def from_streams(cls, manager: "StreamManager", streams: Iterable[Stream]) -> "StreamRecords":
+        """
+        Store the cached state of every Stream in `streams` (e.g. from `StreamManager.all_streams`).
+        """
+        records = cls(manager)
+        for stream in streams:
+            records.add(stream.id, stream.snapshot)
+
+        return records
+
+    @classmethod
+    def from_index(
+        cls, index: "StreamIndex", streams: Iterable[Stream] | None = None
+    ) -> "StreamRecords":
+        """
+        Store the state of `streams` (defaults to every Stream) from `index`.
+        """
+        records = cls(index.manager)
+        stream_ids: Iterable[int] = (
+            sorted(index.streams) if streams is None else (stream.id for stream in streams)
+        )
+        for stream_id in stream_ids:
+            records.add(stream_id, index.streams[stream_id])
+
+        return records
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.StreamRecords manager={self.manager.address} streams={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, stream_id: int) -> bool:
+        return stream_id in self._records
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._records)
+
+    def __getitem__(self, stream_id: int) -> StreamRecord:
+        return self._records[stream_id]
+
+    def __delitem__(self, stream_id: int):
+        # NOTE: Interned values are kept, since other Streams are likely to use them again
+        del self._records[stream_id]
+
+    @staticmethod
+    def _intern(values: list[_T], indices: dict[_T, int], value: _T) -> int:
+        if (index := indices.get(value)) is None:
+            index = indices[value] = len(values)
+            values.append(value)
+
+        return index
+
+    def add(self, stream_id: int, info: StreamInfo) -> StreamRecord:
+        """
+        Store (or replace) the state of Stream `stream_id`.
+        """
+        record = self._records[stream_id] = StreamRecord(
+            id=stream_id,
+            owner_index=self._intern(self.owners, self._owner_indices, info.owner),
+            token_index=self._intern(self.tokens, self._token_indices, info.token),
+            products_index=self._intern(
+                self.products, self._products_indices, tuple(info.products)
+            ),
+            funded_amount=info.funded_amount,
+            expires_at=info.expires_at,
+            last_update=info.last_update,
+            last_claim=info.last_claim,
+            block_number=info.block_number,
+            timestamp=info.timestamp,
+        )
+        return record
+
+    def discard(self, stream_id: int):
+        self._records.pop(stream_id, None)
+
+    def info(self, stream_id: int) -> StreamInfo:
+        """
+        Full snapshot of the stored state of Stream `stream_id`.
+        """
+        record = self._records[stream_id]
+        # NOTE: Skip validation, since every value was already validated when it was added
+        return StreamInfo.model_construct(
+            owner=self.owners[record.owner_index],
+            token=self.tokens[record.token_index],
+            funded_amount=record.funded_amount,
+            expires_at=record.expires_at,
+            last_update=record.last_update,
+            last_claim=record.last_claim,
+            products=list(self.products[record.products_index]),
+            block_number=record.block_number,
+            timestamp=record.timestamp,
+        )
+
+    def stream(self, stream_id: int) -> Stream:
+        """
+        Create a full `Stream`, with the stored state cached (until the Stream is modified, or
+        the chain moves past the block it was stored at).
+        """
+        stream = Stream(manager=self.manager, id=stream_id)
+        stream._cache_info(
+            self.info(stream_id),
+            version=self.manager._stream_versions.get(stream_id, 0),
+        )
+        return stream
+
+    def streams(self) -> Iterator[Stream]:
+        for stream_id in sorted(self._records):
+            yield self.stream(stream_id)
@@ -0,0 +1,130 @@
+import heapq
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from ape.types import ContractLog
+
+if TYPE_CHECKING:
+    from .streams import Stream
+
+# NOTE: Rebuild the heap once it holds this many times more entries than there are Streams
+MAX_STALE_FACTOR = 2
+
+
+class ExpiryScheduler:
+    """
+    Priority queue of Streams, ordered by when they expire.
+
+    Updating (or removing) a Stream is O(log N), and so is taking each Stream off the queue once
+    it has expired, so a bot only has to look at the Streams that actually expired.
+
+    Usage example::
+
+        scheduler = ExpiryScheduler()
+        scheduler.load(sm.active_streams())
+
+        for log in logs:  # NOTE: e.g. from a Silverback handler
+            scheduler.apply_log(log)
+
+        for stream_id in scheduler.pop_expired(block.timestamp):
+            ...  # Stream has run out of time
+    """
+
+    def __init__(self):
+        # NOTE: Entries are never removed from the heap when a Stream is updated, instead they are
+        #       skipped if they do not match the latest expiry of the Stream
+        self._heap: list[tuple[int, int]] = []
+        self._expires_at: dict[int, int] = {}
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.ExpiryScheduler streams={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def __contains__(self, stream_id: int) -> bool:
+        return stream_id in self._expires_at
+
+    def expires_at(self, stream_id: int) -> int | None:
+        return self._expires_at.get(stream_id)
+
+    def _compact(self):
+        if len(self._heap) > MAX_STALE_FACTOR * len(self._expires_at):
+            self._heap = [(expires_at, s) for s, expires_at in self._expires_at.items()]
+            heapq.heapify(self._heap)
+
+    def schedule(self, stream_id: int, expires_at: int):
+        """
+        Add Stream `stream_id`, or move it if it already has been added.
+        """
+        if self._expires_at.get(stream_id) == expires_at:
+            return
+
+        self._expires_at[stream_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, stream_id))
+        self._compact()
+
+    def remove(self, stream_id: int):
+        if self._expires_at.pop(stream_id, None) is not None:
+            self._compact()
+
+    def load(self, streams: Iterable["Stream"]):
+        """
+        Add every Stream in `streams` using their cached state (e.g. from `active_streams`).
+        """
+        for stream in streams:
+            self._expires_at[stream.id] = stream.snapshot.expires_at
+
+        self._heap = [(expires_at, s) for s, expires_at in self._expires_at.items()]
+        heapq.heapify(self._heap)
+
+    def apply_log(self, log: ContractLog):
+        """
+        Update the queue from a log emitted by the StreamManager.
+        """
+        if log.event_name in ("StreamCreated", "StreamFunded"):
+            # NOTE: Both set `expires_at` to `block.timestamp + time_left`
+            self.schedule(log.stream_id, log.timestamp + log.time_left)
+
+        elif log.event_name == "StreamCancelled":
+            # NOTE: Stream stops immediately, so there is nothing to wait for
+            self.remove(log.stream_id)
+
+        # NOTE: A claim of an expired Stream is left for `pop_expired` to report (it may be seen
+        #       before the block that it expired at is handled)
+
+    def _peek(self) -> tuple[int, int] | None:
+        while self._heap:
+            expires_at, stream_id = self._heap[0]
+            if self._expires_at.get(stream_id) == expires_at:
+                return expires_at, stream_id
+
+            heapq.heappop(self._heap)  # NOTE: Stale entry
+
+        return None
+
+    @property
+    def next_expiry(self) -> int | None:
+        """
+        Timestamp of when the next Stream expires (if any).
+        """
+        return None if (entry := self._peek()) is None else entry[0]
+
+    def pop_until(self, timestamp: int) -> list[tuple[int, int]]:
+        """
+        Remove (and return, in order of expiry) every Stream that expires at or before
+        `timestamp`, along with when it expires (e.g. to find the ones that are running low).
+        """
+        expired = []
+        while (entry := self._peek()) is not None and entry[0] <= timestamp:
+            heapq.heappop(self._heap)
+            del self._expires_at[entry[1]]
+            expired.append((entry[1], entry[0]))
+
+        return expired
+
+    def pop_expired(self, timestamp: int) -> list[int]:
+        """
+        Remove (and return, in order of expiry) every Stream that has no time left at `timestamp`.
+        """
+        return [stream_id for stream_id, _ in self.pop_until(timestamp)]
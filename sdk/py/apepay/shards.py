@@ -0,0 +1,244 @@
+import multiprocessing
+import os
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from ape.types import AddressType
+from ape.utils.basemodel import BaseModel
+
+from .claims import ClaimEngine
+from .manager import StreamManager
+from .streams import Stream, StreamInfo
+
+DEFAULT_NUM_SHARDS = os.cpu_count() or 1
+
+# NOTE: Network each worker process is connected to (set by `_connect`)
+_network_context: Any = None
+
+
+def shard_ids(stream_ids: Sequence[int], num_shards: int) -> list[Sequence[int]]:
+    """
+    Split `stream_ids` into (at most) `num_shards` contiguous shards of (almost) equal size.
+    """
+    num_shards = max(min(num_shards, len(stream_ids)), 1)
+    size, extra = divmod(len(stream_ids), num_shards)
+
+    shards = []
+    start = 0
+    for shard in range(num_shards):
+        stop = start + size + (1 if shard < extra else 0)
+        shards.append(stream_ids[start:stop])
+        start = stop
+
+    return shards
+
+
+def _connect(network_choice: str):
+    # NOTE: Every worker process needs its own connection
+    global _network_context
+    from ape import networks
+
+    _network_context = networks.parse_network_choice(network_choice)
+    _network_context.__enter__()
+
+
+def _scan_shard(
+    manager_address: AddressType,
+    max_concurrent_calls: int,
+    min_claims: dict[AddressType, int],
+    stream_ids: Sequence[int],
+    block_id: int,
+    batch_size: int | None,
+) -> list[tuple[int, StreamInfo, int]]:
+    # NOTE: Must be a module-level function (and only use picklable values) to run in a process
+    engine = ClaimEngine(
+        StreamManager(manager_address, max_concurrent_calls=max_concurrent_calls),
+        min_claims=min_claims,
+    )
+    snapshot_kwargs: dict[str, Any] = dict(block_id=block_id)
+    if batch_size is not None:
+        snapshot_kwargs["batch_size"] = batch_size
+
+    return [
+        (stream.id, stream.info, amount)
+        for stream, amount in engine.claimable_streams(stream_ids, **snapshot_kwargs)
+    ]
+
+
+class ShardReport(BaseModel):
+    """
+    Streams that can be claimed from a single shard of `ShardedClaimEngine`.
+    """
+
+    stream_ids: list[int]
+    # NOTE: Claimable amount of each Stream in the shard that should be claimed
+    claims: dict[int, int]
+    amounts: dict[AddressType, int]
+
+
+class ShardedClaimEngine(ClaimEngine):
+    """
+    `ClaimEngine` that splits reading the state of every Stream across `num_shards` workers.
+
+    Stream IDs are split into contiguous shards every time Streams are loaded (so shards are
+    re-balanced as new Streams are created), and every shard is read as of the same block. Only
+    reads are sharded: batches are still built and signed by this process, one nonce at a time,
+    so a single `sender` can be used.
+
+    If `network_choice` is given (e.g. `"ethereum:mainnet:node"`), each worker is a separate
+    process connected to that network, otherwise workers are threads of this process.
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        with ShardedClaimEngine(sm, num_shards=8, network_choice="ethereum:mainnet") as engine:
+            print(ShardedClaimEngine.revenue(engine.scan()))
+            for batch in engine.run(sender=account):
+                print(batch.receipt.txn_hash, batch.amounts)
+    """
+
+    def __init__(
+        self,
+        manager: StreamManager,
+        num_shards: int = DEFAULT_NUM_SHARDS,
+        network_choice: str | None = None,
+        max_workers: int | None = None,
+        **engine_kwargs,
+    ):
+        super().__init__(manager, **engine_kwargs)
+        self.num_shards = num_shards
+        self.network_choice = network_choice
+        self.max_workers = max_workers or num_shards
+        self._executor: Executor | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<apepay_sdk.ShardedClaimEngine manager={self.manager.address} "
+            f"shards={self.num_shards}>"
+        )
+
+    def __enter__(self) -> "ShardedClaimEngine":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = (
+                ThreadPoolExecutor(self.max_workers)
+                if self.network_choice is None
+                else ProcessPoolExecutor(
+                    self.max_workers,
+                    # NOTE: Never fork, since this process has a live connection (and threads)
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_connect,
+                    initargs=(self.network_choice,),
+                )
+            )
+
+        return self._executor
+
+    def close(self):
+        """
+        Shut down all the workers.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def shards(
+        self,
+        stream_ids: Iterable[int] | None = None,
+        block_id: int | None = None,
+    ) -> list[Sequence[int]]:
+        """
+        Split `stream_ids` (defaults to every Stream as of `block_id`) into shards.
+        """
+        if stream_ids is None:
+            ids: Sequence[int] = range(self.manager.contract.num_streams(block_id=block_id))
+
+        else:
+            ids = sorted(stream_ids)
+
+        return shard_ids(ids, self.num_shards)
+
+    def _scan(
+        self,
+        stream_ids: Iterable[int] | None = None,
+        block_id: int | None = None,
+        batch_size: int | None = None,
+    ) -> Iterator[tuple[Sequence[int], list[tuple[int, StreamInfo, int]]]]:
+        # NOTE: Every shard must be read as of the same block
+        if block_id is None:
+            block_id = self.chain_manager.blocks.head.number
+
+        shards = self.shards(stream_ids, block_id=block_id)
+        scan_shard = partial(
+            _scan_shard,
+            self.manager.address,
+            self.manager.max_concurrent_calls,
+            self.min_claims,
+            block_id=block_id,
+            batch_size=batch_size,
+        )
+        results = self.executor.map(scan_shard, shards)
+        yield from zip(shards, results)
+
+    def scan(self, stream_ids: Iterable[int] | None = None, **snapshot_kwargs) -> list[ShardReport]:
+        """
+        Report what can be claimed from each shard (without sending any transactions).
+        """
+        reports = []
+        for shard, claims in self._scan(stream_ids, **snapshot_kwargs):
+            amounts: dict[AddressType, int] = defaultdict(int)
+            for _, info, amount in claims:
+                amounts[info.token] += amount
+
+            reports.append(
+                ShardReport(
+                    stream_ids=list(shard),
+                    claims={stream_id: amount for stream_id, _, amount in claims},
+                    amounts=dict(amounts),
+                )
+            )
+
+        return reports
+
+    @staticmethod
+    def revenue(reports: Iterable[ShardReport]) -> dict[AddressType, int]:
+        """
+        Merge the amounts that can be claimed from each shard in `reports`.
+        """
+        revenue: dict[AddressType, int] = defaultdict(int)
+        for report in reports:
+            for token, amount in report.amounts.items():
+                revenue[token] += amount
+
+        return dict(revenue)
+
+    def claimable_streams(
+        self,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> Iterator[tuple[Stream, int]]:
+        # NOTE: Same as `StreamManager.load_streams`, but loaded by the workers
+        versions = dict(self.manager._stream_versions)
+        # NOTE: Every Stream is pinned to the same block (defaults to latest), like `ClaimEngine`
+        block = (
+            self.chain_manager.blocks.head
+            if (block_id := snapshot_kwargs.pop("block_id", None)) is None
+            else self.chain_manager.blocks[block_id]
+        )
+
+        for _, claims in self._scan(stream_ids, block_id=block.number, **snapshot_kwargs):
+            for stream_id, info, amount in claims:
+                stream = Stream(manager=self.manager, id=stream_id)
+                stream._cache_info(
+                    info, version=versions.get(stream_id, 0), pinned=True, block_hash=block.hash
+                )
+                yield stream, amount
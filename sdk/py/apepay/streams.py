@@ -1,65 +1,279 @@
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from functools import partial
-from typing import TYPE_CHECKING, cast
+from functools import wraps
+from typing import TYPE_CHECKING, Any, cast
 
+from ape.api import BlockAPI, ReceiptAPI
 from ape.contracts.base import ContractInstance, ContractTransactionHandler
-from ape.types import AddressType, HexBytes
+from ape.types import AddressType, ContractLog, HexBytes
 from ape.utils import BaseInterfaceModel, cached_property
+from ape.utils.basemodel import BaseModel
+from pydantic import PrivateAttr
 
-from .exceptions import FundsNotClaimable
+from .exceptions import FundsNotClaimable, StreamComputationError
+from .tokens import token_registry
 
 if TYPE_CHECKING:
     from .manager import StreamManager
 
 MAX_DURATION_SECONDS = int(timedelta.max.total_seconds()) - 1
+MAX_UINT256 = 2**256 - 1
+
+
+class StreamInfo(BaseModel):
+    """
+    Snapshot of the on-chain state of a Stream, as of `block_number`.
+
+    All time-dependent values are computed locally, exactly as `StreamManager.vy` does, so that
+    they can be evaluated for any `timestamp` without calling the contract.
+    """
+
+    owner: AddressType
+    token: AddressType
+    funded_amount: int
+    expires_at: int
+    last_update: int
+    last_claim: int
+    products: list[HexBytes]
+
+    block_number: int
+    timestamp: int  # NOTE: Timestamp of `block_number`
+
+    @classmethod
+    def from_struct(cls, struct: Any, block: BlockAPI) -> "StreamInfo":
+        return cls(
+            owner=struct.owner,
+            token=struct.token,
+            funded_amount=struct.funded_amount,
+            expires_at=struct.expires_at,
+            last_update=struct.last_update,
+            last_claim=struct.last_claim,
+            products=struct.products,
+            block_number=block.number,
+            timestamp=block.timestamp,
+        )
+
+    @classmethod
+    def from_log(cls, log: ContractLog, timestamp: int) -> "StreamInfo":
+        """
+        State of a Stream right after it was created, from its `StreamCreated` log (emitted at
+        `timestamp`).
+        """
+        return cls(
+            owner=log.owner,
+            token=log.token,
+            funded_amount=log.funded_amount,
+            expires_at=timestamp + log.time_left,
+            last_update=timestamp,
+            last_claim=timestamp,
+            products=log.products,
+            block_number=log.block_number or 0,
+            timestamp=timestamp,
+        )
+
+    def apply_log(self, log: ContractLog, timestamp: int) -> "StreamInfo":
+        """
+        State of the Stream after `log` (emitted at `timestamp`) modified it. Never modifies this
+        snapshot in-place, since it may be shared with `Stream` objects.
+        """
+        update: dict[str, Any] = dict(block_number=log.block_number or 0, timestamp=timestamp)
+
+        if log.event_name == "StreamFunded":
+            # NOTE: `fund_stream` claims first (`StreamClaimed` is emitted right before this),
+            #       which is a no-op here if that claim was already applied
+            update.update(
+                funded_amount=(
+                    self.funded_amount - self.amount_claimable_at(timestamp) + log.funded_amount
+                ),
+                expires_at=timestamp + log.time_left,
+                last_claim=timestamp,
+            )
+
+        elif log.event_name == "StreamClaimed":
+            update.update(
+                funded_amount=self.funded_amount - log.claim_amount,
+                last_claim=timestamp,
+            )
+
+        elif log.event_name == "StreamCancelled":
+            update.update(
+                funded_amount=self.funded_amount - log.refund_amount,
+                expires_at=timestamp,
+            )
+
+        elif log.event_name == "StreamOwnershipUpdated":
+            update.update(owner=log.new_owner)
+
+        else:
+            raise ValueError(f"Cannot apply '{log.event_name}' to an existing Stream.")
+
+        return self.model_copy(update=update)
+
+    def amount_claimable_at(self, timestamp: int) -> int:
+        """
+        Amount of `token` that can be claimed at `timestamp` (see `_amount_claimable`).
+        """
+        if timestamp >= self.expires_at:
+            return self.funded_amount  # All funds vested
+
+        if timestamp < self.last_claim:
+            # NOTE: Also covers `last_claim >= expires_at` (which should be unreachable)
+            raise StreamComputationError("amount_claimable", "Cannot claim in the past.")
+
+        if (vested := self.funded_amount * (timestamp - self.last_claim)) > MAX_UINT256:
+            raise StreamComputationError("amount_claimable", "Integer overflow.")
+
+        # NOTE: Use floor division, just like the contract
+        return vested // (self.expires_at - self.last_claim)
+
+    def time_left_at(self, timestamp: int) -> int:
+        """
+        Number of seconds left in the Stream at `timestamp` (see `_time_left`).
+        """
+        if self.funded_amount == 0:
+            return 0
+
+        if self.expires_at < timestamp:
+            return 0  # No time left
+
+        return self.expires_at - timestamp
+
+    def funding_needed_at(self, stream_life: int, timestamp: int) -> int:
+        """
+        Amount of `token` to add at `timestamp` so that at least `stream_life` seconds are left
+        afterwards (see `fund_stream`), assuming the funding rate of the Stream does not change.
+        """
+        if timestamp >= self.expires_at:
+            raise StreamComputationError("fund_stream", "Stream has expired.")
+
+        # NOTE: Unclaimed funds are claimed first, the rest is added to the new funding amount
+        remaining = self.funded_amount - self.amount_claimable_at(timestamp)
+        # NOTE: Round up, so the Stream lasts at least `stream_life`
+        required = -(-stream_life * self.funded_amount // (self.expires_at - self.last_claim))
+        return max(required - remaining, 0)
+
+    @property
+    def amount_claimable(self) -> int:
+        return self.amount_claimable_at(self.timestamp)
+
+    @property
+    def time_left(self) -> int:
+        return self.time_left_at(self.timestamp)
 
 
 class Stream(BaseInterfaceModel):
     manager: "StreamManager"
     id: int
 
+    # NOTE: Cached snapshot of Stream state, shared by all properties until invalidated (or
+    #       until the chain moves past the block it was taken at)
+    _info: StreamInfo | None = PrivateAttr(default=None)
+    _info_version: int = PrivateAttr(default=0)
+    _info_block_hash: HexBytes | None = PrivateAttr(default=None)
+    # NOTE: If the snapshot was requested for a specific block, don't replace it automatically
+    _info_pinned: bool = PrivateAttr(default=False)
+
     @property
     def contract(self) -> ContractInstance:
         return self.manager.contract
 
     def __repr__(self) -> str:
-        return f"<apepay_sdk.Stream manager={self.contract.address} id={self.id}>"
+        return f"<apepay_sdk.Stream manager={self.manager.address} id={self.id}>"
+
+    def _cache_info(
+        self,
+        info: StreamInfo,
+        version: int,
+        pinned: bool = False,
+        block_hash: HexBytes | None = None,
+    ) -> StreamInfo:
+        self._info = info
+        self._info_version = version
+        self._info_pinned = pinned
+        # NOTE: Hash of `info.block_number` (if known), so re-orgs and reverts are detected
+        self._info_block_hash = block_hash
+        return info
+
+    def _info_is_current(self, info: StreamInfo) -> bool:
+        # NOTE: Checked against the latest block cached by the manager (modifications made by
+        #       others are only seen from the chain, so an unpinned snapshot is only valid for the
+        #       latest block), so it is looked up at most once per block for every Stream
+        head = self.manager.head
+        return head.number == info.block_number and (
+            self._info_block_hash is None or head.hash == self._info_block_hash
+        )
+
+    def _load(self, block: BlockAPI, pinned: bool = False) -> StreamInfo:
+        # NOTE: Read version first, so any modifications seen while fetching will invalidate it
+        version = self.manager._stream_versions.get(self.id, 0)
+        ((_, info),) = self.manager._load_info([self.id], block)
+        return self._cache_info(info, version=version, pinned=pinned, block_hash=block.hash)
+
+    def refresh(self, at_block: int | None = None) -> StreamInfo:
+        """
+        Re-fetch the state of this Stream as of `at_block` (defaults to the latest block). If
+        `at_block` is given, all properties are computed as of that block until the next refresh.
+        """
+        if at_block is not None:
+            return self._load(self.chain_manager.blocks[at_block], pinned=True)
+
+        # NOTE: Look up the latest block again (and share it with every other Stream), since the
+        #       Stream may have just been modified in a new block
+        return self._load(self.manager._update_head())
 
     @property
-    def info(self):
-        return self.contract.streams(self.id)
+    def info(self) -> StreamInfo:
+        if (info := self._info) is None:
+            return self._load(self.manager.head)
 
-    @cached_property
-    def token(self) -> ContractInstance:
-        # NOTE: This cannot be updated
-        try:
-            from ape_tokens.managers import ERC20  # type: ignore[import-not-found]
+        elif self._info_pinned:
+            return info
 
-        except ImportError:
-            ERC20 = None  # type: ignore[assignment]
+        elif self._info_version != self.manager._stream_versions.get(self.id, 0):
+            return self.refresh()
 
-        return self.chain_manager.contracts.instance_at(self.info.token, contract_type=ERC20)
+        elif not self._info_is_current(info):
+            # NOTE: Nothing is known to have changed, so the shared latest block can be used
+            return self._load(self.manager.head)
 
-    @cached_property
+        return info
+
+    @property
+    def snapshot(self) -> StreamInfo:
+        """
+        State of this Stream as it was last loaded (e.g. in bulk), without checking if it is still
+        current. Useful to filter loaded Streams without looking up anything else.
+        """
+        return self.info if self._info is None else self._info
+
+    @property
+    def token(self) -> ContractInstance:
+        # NOTE: This cannot be updated, so it is shared by every Stream (see `TokenRegistry`)
+        return token_registry.contract(self.info.token)
+
+    @property
     def token_decimals(self) -> int:
-        return self.token.decimals()
+        return token_registry[self.info.token].decimals
+
+    @property
+    def token_symbol(self) -> str:
+        return token_registry[self.info.token].symbol
 
     @property
     def funded(self) -> Decimal:
-        return Decimal(self.info.funded_amount) / Decimal(10 ** self.token_decimals)
+        return Decimal(self.info.funded_amount) / Decimal(10**self.token_decimals)
 
     @property
     def funding_rate(self) -> Decimal:
         """
         Funding rate, in tokens per second, of Stream in human-readable decimal form.
         """
-        info = self.info  # NOTE: Avoid calling contract twice by caching
+        info = self.info
 
         return (
             Decimal(info.funded_amount)
             / Decimal(info.expires_at - info.last_claim)
-            / Decimal(10 ** self.token_decimals)
+            / Decimal(10**self.token_decimals)
         )
 
     def estimate_funding(self, period: timedelta) -> Decimal:
@@ -91,7 +305,16 @@ class Stream(BaseInterfaceModel):
 
     @property
     def amount_claimable(self) -> int:
-        return self.contract.amount_claimable(self.id)
+        # NOTE: `info` is pinned, or current as of the latest block, so this is computed locally
+        #       as of that block (without calling the contract)
+        info = self.info
+
+        try:
+            return info.amount_claimable
+
+        except StreamComputationError:
+            # NOTE: Let the contract decide if it can't be computed (e.g. on overflow)
+            return self.contract.amount_claimable(self.id, block_id=info.block_number)
 
     @property
     def amount_refundable(self) -> int:
@@ -100,7 +323,8 @@ class Stream(BaseInterfaceModel):
 
     @property
     def time_left(self) -> timedelta:
-        seconds = self.contract.time_left(self.id)
+        # NOTE: Computed locally, just like `amount_claimable`
+        seconds = self.info.time_left
         assert seconds < MAX_DURATION_SECONDS, "Invaraint wrong"
         return timedelta(seconds=seconds)
 
@@ -108,12 +332,38 @@ class Stream(BaseInterfaceModel):
     def is_active(self) -> bool:
         return self.time_left.total_seconds() > 0
 
+    def amount_claimable_at(self, timestamp: datetime) -> int:
+        """
+        Amount claimable at `timestamp`, computed locally using the cached state of the Stream.
+        """
+        return self.info.amount_claimable_at(int(timestamp.timestamp()))
+
+    def time_left_at(self, timestamp: datetime) -> timedelta:
+        """
+        Time left at `timestamp`, computed locally using the cached state of the Stream.
+        """
+        return timedelta(seconds=self.info.time_left_at(int(timestamp.timestamp())))
+
+    def is_active_at(self, timestamp: datetime) -> bool:
+        return self.info.time_left_at(int(timestamp.timestamp())) > 0
+
+    def _modifies_stream(self, handler: ContractTransactionHandler) -> ContractTransactionHandler:
+
+        @wraps(handler)
+        def modify_stream(*args, **txn_kwargs) -> ReceiptAPI:
+            try:
+                return handler(self.id, *args, **txn_kwargs)
+
+            finally:
+                # NOTE: Any cached state for this Stream is now out of date (even if the
+                #       transaction failed, since it may still have been mined)
+                self.manager._invalidate_stream(self.id)
+
+        return cast(ContractTransactionHandler, modify_stream)
+
     @property
     def add_funds(self) -> ContractTransactionHandler:
-        return cast(
-            ContractTransactionHandler,
-            partial(self.contract.fund_stream, self.id),
-        )
+        return self._modifies_stream(self.contract.fund_stream)
 
     @property
     def is_cancelable(self) -> bool:
@@ -121,17 +371,11 @@ class Stream(BaseInterfaceModel):
 
     @property
     def cancel(self) -> ContractTransactionHandler:
-        return cast(
-            ContractTransactionHandler,
-            partial(self.contract.cancel_stream, self.id),
-        )
+        return self._modifies_stream(self.contract.cancel_stream)
 
     @property
     def claim(self) -> ContractTransactionHandler:
         if not self.amount_claimable > 0:
             raise FundsNotClaimable()
 
-        return cast(
-            ContractTransactionHandler,
-            partial(self.contract.claim_stream, self.id),
-        )
+        return self._modifies_stream(self.contract.claim_stream)
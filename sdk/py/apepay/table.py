@@ -0,0 +1,210 @@
+from collections.abc import Mapping
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from ape.types import AddressType
+
+from .exceptions import StreamComputationError
+from .streams import MAX_UINT256, StreamInfo
+
+try:
+    import numpy as np
+
+except ImportError as e:
+    raise ImportError("`StreamTable` requires NumPy, please install `apepay[analytics]`.") from e
+
+if TYPE_CHECKING:
+    from .indexer import StreamIndex
+    from .manager import StreamManager
+
+# NOTE: Largest value that can be computed using `int64` without overflowing
+MAX_INT64 = 2**63 - 1
+
+
+def _as_int64(values: np.ndarray) -> np.ndarray:
+    # NOTE: Keeps Python integers (`dtype=object`) if any value does not fit in `int64`
+    return values.astype(np.int64) if max(values, default=0) <= MAX_INT64 else values
+
+
+class StreamTable:
+    """
+    Columnar (NumPy) table of the state of many Streams, for computing analytics over all of them
+    at once. Every method is vectorized, and returns one entry per Stream (in order of `ids`).
+
+    Amounts (and timestamps) are exact: they are computed using `int64` whenever that cannot
+    overflow, otherwise the arrays hold Python integers (`dtype=object`) so that 256-bit values
+    are never truncated.
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        table = StreamTable.from_manager(sm)
+        revenue_by_token = table.projected_revenue(timedelta(days=30))
+    """
+
+    def __init__(self, infos: Mapping[int, StreamInfo]):
+        stream_ids = sorted(infos)
+        self.ids = np.array(stream_ids, dtype=np.int64)
+
+        self.tokens: list[AddressType] = []
+        self.owners: list[AddressType] = []
+        token_indices: dict[AddressType, int] = {}
+        owner_indices: dict[AddressType, int] = {}
+
+        self.token_index = np.empty(len(stream_ids), dtype=np.intp)
+        self.owner_index = np.empty(len(stream_ids), dtype=np.intp)
+        self.funded_amount = np.empty(len(stream_ids), dtype=object)
+        self.expires_at = np.empty(len(stream_ids), dtype=object)
+        self.last_claim = np.empty(len(stream_ids), dtype=object)
+
+        for row, stream_id in enumerate(stream_ids):
+            info = infos[stream_id]
+            if (token_idx := token_indices.get(info.token)) is None:
+                token_idx = token_indices[info.token] = len(self.tokens)
+                self.tokens.append(info.token)
+
+            if (owner_idx := owner_indices.get(info.owner)) is None:
+                owner_idx = owner_indices[info.owner] = len(self.owners)
+                self.owners.append(info.owner)
+
+            self.token_index[row] = token_idx
+            self.owner_index[row] = owner_idx
+            self.funded_amount[row] = info.funded_amount
+            self.expires_at[row] = info.expires_at
+            self.last_claim[row] = info.last_claim
+
+        # NOTE: Timestamps only overflow `int64` if a Stream is funded for (practically) forever
+        self.expires_at = _as_int64(self.expires_at)
+        self.last_claim = _as_int64(self.last_claim)
+
+        # NOTE: Default time to compute values at (the most recent snapshot in the table)
+        self.timestamp = max((info.timestamp for info in infos.values()), default=0)
+
+        self._max_funded_amount = max(self.funded_amount, default=0)
+        self._funded_amount_int64 = (
+            _as_int64(self.funded_amount) if self._max_funded_amount <= MAX_INT64 else None
+        )
+
+    @classmethod
+    def from_manager(cls, manager: "StreamManager", **snapshot_kwargs) -> "StreamTable":
+        """
+        Load every Stream in `manager` in bulk (see `StreamManager.all_streams`).
+        """
+        return cls(
+            {stream.id: stream.snapshot for stream in manager.all_streams(**snapshot_kwargs)}
+        )
+
+    @classmethod
+    def from_index(cls, index: "StreamIndex") -> "StreamTable":
+        """
+        Build from the state of `index`, without calling the chain.
+        """
+        table = cls(index.streams)
+        if index.last_timestamp is not None:
+            table.timestamp = index.last_timestamp
+
+        return table
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.StreamTable streams={len(self)} tokens={len(self.tokens)}>"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _timestamp(self, timestamp: int | None) -> int:
+        return self.timestamp if timestamp is None else timestamp
+
+    def time_left_at(self, timestamp: int | None = None) -> np.ndarray:
+        """
+        Number of seconds left in each Stream at `timestamp` (see `StreamInfo.time_left_at`).
+        """
+        time_left = np.maximum(self.expires_at - self._timestamp(timestamp), 0)
+        time_left[self.funded_amount == 0] = 0
+        return time_left
+
+    def is_active_at(self, timestamp: int | None = None) -> np.ndarray:
+        return self.time_left_at(timestamp) > 0
+
+    def amount_claimable_at(self, timestamp: int | None = None) -> np.ndarray:
+        """
+        Amount of `token` that can be claimed from each Stream at `timestamp`
+        (see `StreamInfo.amount_claimable_at`).
+        """
+        timestamp = self._timestamp(timestamp)
+        vested = self.expires_at <= timestamp
+
+        if (~vested & (self.last_claim > timestamp)).any():
+            raise StreamComputationError("amount_claimable", "Cannot claim in the past.")
+
+        # NOTE: Vested Streams are replaced with `funded_amount * 1 // 1` to avoid branching
+        elapsed = np.where(vested, 1, timestamp - self.last_claim)
+        duration = np.where(vested, 1, self.expires_at - self.last_claim)
+        max_elapsed = int(elapsed.max(initial=0))
+
+        if (
+            self._funded_amount_int64 is not None
+            and self._max_funded_amount * max_elapsed <= MAX_INT64
+        ):
+            return self._funded_amount_int64 * elapsed // duration
+
+        # NOTE: Fall back to Python integers for the Streams that would overflow `int64`
+        amount_vested = self.funded_amount * elapsed.astype(object)
+        if (amount_vested > MAX_UINT256).any():
+            raise StreamComputationError("amount_claimable", "Integer overflow.")
+
+        return amount_vested // duration.astype(object)
+
+    def funding_rate(self) -> np.ndarray:
+        """
+        Funding rate of each Stream, in (base units of) tokens per second.
+        """
+        duration = self.expires_at - self.last_claim
+        funding_rate = np.zeros(len(self), dtype=np.float64)
+        np.divide(
+            self.funded_amount.astype(np.float64),
+            duration.astype(np.float64),
+            out=funding_rate,
+            where=duration > 0,
+        )
+        return funding_rate
+
+    def _sum_by_token(self, values: np.ndarray) -> dict[AddressType, int]:
+        # NOTE: There are only ever a handful of tokens, so just mask for each of them
+        return {
+            token: int(values[self.token_index == token_idx].sum())
+            for token_idx, token in enumerate(self.tokens)
+        }
+
+    def funding_rate_by_token(self, timestamp: int | None = None) -> dict[AddressType, float]:
+        """
+        Total funding rate of all active Streams, in (base units of) tokens per second.
+        """
+        funding_rate = np.where(self.is_active_at(timestamp), self.funding_rate(), 0.0)
+        return {
+            token: float(rate)
+            for token, rate in zip(
+                self.tokens,
+                np.bincount(self.token_index, weights=funding_rate, minlength=len(self.tokens)),
+            )
+        }
+
+    def amount_claimable_by_token(self, timestamp: int | None = None) -> dict[AddressType, int]:
+        return self._sum_by_token(self.amount_claimable_at(timestamp))
+
+    def projected_revenue(
+        self, horizon: timedelta, timestamp: int | None = None
+    ) -> dict[AddressType, int]:
+        """
+        Amount of each token that will be streamed over the next `horizon` after `timestamp`,
+        assuming no Streams are created, funded or cancelled in that time.
+        """
+        timestamp = self._timestamp(timestamp)
+        start = self.amount_claimable_at(timestamp)
+        stop = self.amount_claimable_at(timestamp + int(horizon.total_seconds()))
+        return self._sum_by_token(stop - start)
+
+    def active_stream_ids(self, timestamp: int | None = None) -> np.ndarray:
+        return self.ids[self.is_active_at(timestamp)]
+
+    def unclaimed_stream_ids(self, timestamp: int | None = None) -> np.ndarray:
+        return self.ids[self.amount_claimable_at(timestamp) > 0]
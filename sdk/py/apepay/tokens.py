@@ -0,0 +1,198 @@
+import sqlite3
+from collections.abc import Iterable
+from contextlib import closing
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from ape.contracts.base import ContractInstance
+from ape.types import AddressType
+from ape.utils import ManagerAccessMixin
+from ape.utils.basemodel import BaseModel
+from ape_ethereum import multicall
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    chain_id INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    decimals INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, address)
+);
+"""
+
+
+def _token_contract_type():
+    try:
+        from ape_tokens.managers import ERC20  # type: ignore[import-not-found]
+
+    except ImportError:
+        return None
+
+    return ERC20
+
+
+class TokenMetadata(BaseModel):
+    """
+    Metadata of a token (which can never change once it is deployed).
+    """
+
+    address: AddressType
+    symbol: str
+    decimals: int
+
+
+class TokenRegistry(ManagerAccessMixin):
+    """
+    Process-wide cache of the contract and metadata of every token used by Streams, keyed by
+    chain ID and token address, so that looking up a token is a dict hit after the first time.
+
+    Tokens can be prefilled in bulk (a single multicall for all of them), and if `path` is given
+    the metadata is persisted there (an SQLite database, which can be the same one used by an
+    `IndexCheckpoint`) so that it is never fetched again once known.
+
+    Usage example::
+
+        token_registry.persist("~/.apepay/checkpoint.db")
+        token_registry.prefill(records.tokens)  # NOTE: e.g. every token used by `StreamRecords`
+        decimals = token_registry[stream.info.token].decimals
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        self._contracts: dict[tuple[int, AddressType], ContractInstance] = {}
+        self._metadata: dict[tuple[int, AddressType], TokenMetadata] = {}
+        # NOTE: Bots look up tokens from many threads
+        self._lock = Lock()
+        self.path: Path | None = None
+
+        if path is not None:
+            self.persist(path)
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.TokenRegistry tokens={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def _key(self, token: Any) -> tuple[int, AddressType]:
+        chain_id = self.provider.chain_id
+        # NOTE: Skip conversion for known addresses, since that is by far the most common case
+        if isinstance(token, str) and (
+            (key := (chain_id, token)) in self._metadata or key in self._contracts
+        ):
+            return key
+
+        return chain_id, self.conversion_manager.convert(token, AddressType)
+
+    def __contains__(self, token: Any) -> bool:
+        return self._key(token) in self._metadata
+
+    def _connect(self) -> sqlite3.Connection:
+        assert self.path is not None
+        return sqlite3.connect(self.path)
+
+    def persist(self, path: Path | str):
+        """
+        Load (and from now on, save) the metadata of all tokens from the database at `path`.
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(SCHEMA)
+            rows = connection.execute("SELECT chain_id, address, symbol, decimals FROM tokens")
+
+            with self._lock:
+                for chain_id, address, symbol, decimals in rows:
+                    self._metadata[(chain_id, address)] = TokenMetadata(
+                        address=address, symbol=symbol, decimals=decimals
+                    )
+
+    def _save(self, chain_id: int, metadata: list[TokenMetadata]):
+        if self.path is None or not metadata:
+            return
+
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)",
+                ((chain_id, m.address, m.symbol, m.decimals) for m in metadata),
+            )
+
+    def contract(self, token: Any) -> ContractInstance:
+        """
+        Contract instance of `token` (using the ERC20 ABI from `ape-tokens`, if installed).
+        """
+        key = self._key(token)
+        if (contract := self._contracts.get(key)) is None:
+            contract = self.chain_manager.contracts.instance_at(
+                key[1], contract_type=_token_contract_type()
+            )
+            with self._lock:
+                self._contracts[key] = contract
+
+        return contract
+
+    def prefill(self, tokens: Iterable[Any]):
+        """
+        Fetch the metadata of every token in `tokens` that is not known yet, in a single multicall.
+        """
+        chain_id = self.provider.chain_id
+        contracts = list(
+            {
+                contract.address: contract
+                for contract in map(self.contract, tokens)
+                if (chain_id, contract.address) not in self._metadata
+            }.values()
+        )
+        if not contracts:
+            return
+
+        call = multicall.Call()
+        for contract in contracts:
+            call.add(contract.symbol)
+            call.add(contract.decimals)
+
+        try:
+            results = list(call())
+
+        except multicall.exceptions.UnsupportedChainError:
+            # Handle if multicall isn't available via individual calls (e.g. local testing)
+            results = [
+                result
+                for contract in contracts
+                for result in (contract.symbol(), contract.decimals())
+            ]
+
+        metadata = [
+            TokenMetadata(address=contract.address, symbol=symbol, decimals=decimals)
+            for contract, symbol, decimals in zip(contracts, results[::2], results[1::2])
+        ]
+        with self._lock:
+            for m in metadata:
+                self._metadata[(chain_id, m.address)] = m
+
+        self._save(chain_id, metadata)
+
+    def __getitem__(self, token: Any) -> TokenMetadata:
+        key = self._key(token)
+        if (metadata := self._metadata.get(key)) is None:
+            self.prefill([key[1]])
+            metadata = self._metadata[key]
+
+        return metadata
+
+    def clear(self):
+        """
+        Forget every token (including any that were persisted).
+        """
+        with self._lock:
+            self._contracts.clear()
+            self._metadata.clear()
+
+        if self.path is not None:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM tokens")
+
+
+# NOTE: Shared by every Stream (and StreamManager) in this process
+token_registry = TokenRegistry()
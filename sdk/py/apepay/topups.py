@@ -0,0 +1,225 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any
+
+from ape.api import AccountAPI, ReceiptAPI
+from ape.contracts.base import ContractInstance
+from ape.types import AddressType
+from ape.utils import ManagerAccessMixin
+from ape.utils.basemodel import BaseModel
+
+from .exceptions import NotEnoughAllowance, StreamNotSubmitted
+from .manager import MAX_PENDING_TRANSACTIONS, StreamManager
+from .streams import Stream
+
+
+class TopUp(BaseModel):
+    """
+    Funds added (or planned to be added) to a single Stream by `TopUpPlanner`.
+    """
+
+    stream_id: int
+    token: AddressType
+    amount: int
+    # NOTE: Expected when planned, and updated from the `StreamFunded` log once confirmed
+    expires_at: int
+    receipt: ReceiptAPI | None = None
+    error: Exception | None = None
+
+
+class TopUpPlanner(ManagerAccessMixin):
+    """
+    Keep Streams alive by funding each of them so that at least `stream_life` is left.
+
+    The amount to add to each Stream is computed locally from a bulk snapshot of all the Streams
+    (optionally only those owned by one of `owners`). When run, a single `approve` is sent per
+    token (if the current allowance is not enough), and then every `fund_stream` transaction is
+    signed with the next sequential nonce, with up to `max_pending_transactions` in flight at once.
+
+    Usage example::
+
+        sm = StreamManager(address=...)
+        planner = TopUpPlanner(sm, stream_life=timedelta(days=7), owners=[...])
+        print(TopUpPlanner.cost(planner.plan()))
+        for top_up in planner.run(sender=account):
+            print(top_up.stream_id, top_up.amount, top_up.expires_at)
+    """
+
+    def __init__(
+        self,
+        manager: StreamManager,
+        stream_life: timedelta,
+        owners: Iterable[Any] | None = None,
+        max_pending_transactions: int = MAX_PENDING_TRANSACTIONS,
+    ):
+        self.manager = manager
+        self.stream_life = stream_life
+        self.owners: set[AddressType] | None = (
+            None
+            if owners is None
+            else {self.conversion_manager.convert(owner, AddressType) for owner in owners}
+        )
+        self.max_pending_transactions = max_pending_transactions
+
+    def __repr__(self) -> str:
+        return f"<apepay_sdk.TopUpPlanner manager={self.manager.address}>"
+
+    @staticmethod
+    def cost(top_ups: Iterable[TopUp]) -> dict[AddressType, int]:
+        """
+        Total amount of each token needed for `top_ups`.
+        """
+        cost: dict[AddressType, int] = defaultdict(int)
+        for top_up in top_ups:
+            cost[top_up.token] += top_up.amount
+
+        return dict(cost)
+
+    def _streams_to_fund(
+        self,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> list[tuple[Stream, TopUp]]:
+        streams = (
+            self.manager.all_streams(**snapshot_kwargs)
+            if stream_ids is None
+            else self.manager.load_streams(stream_ids, **snapshot_kwargs)
+        )
+        stream_life = int(self.stream_life.total_seconds())
+
+        top_ups = []
+        for stream in streams:
+            # NOTE: Use the loaded snapshot (even if the chain has moved on since)
+            info = stream.snapshot
+            if self.owners is not None and info.owner not in self.owners:
+                continue
+
+            elif info.time_left == 0:
+                continue  # NOTE: Expired Streams cannot be funded
+
+            elif (amount := info.funding_needed_at(stream_life, info.timestamp)) == 0:
+                continue
+
+            top_ups.append(
+                (
+                    stream,
+                    TopUp(
+                        stream_id=stream.id,
+                        token=info.token,
+                        amount=amount,
+                        expires_at=info.timestamp + stream_life,
+                    ),
+                )
+            )
+
+        return top_ups
+
+    def plan(self, stream_ids: Iterable[int] | None = None, **snapshot_kwargs) -> list[TopUp]:
+        """
+        Work out how much `run` would add to each Stream (without sending any transactions).
+        """
+        return [top_up for _, top_up in self._streams_to_fund(stream_ids, **snapshot_kwargs)]
+
+    def _approve(
+        self,
+        sender: AccountAPI,
+        tokens: dict[AddressType, ContractInstance],
+        cost: dict[AddressType, int],
+    ):
+        reads = iter(
+            self.manager._bulk_call(
+                [(token.balanceOf, (sender.address,)) for token in tokens.values()]
+                + [
+                    (token.allowance, (sender.address, self.manager.address))
+                    for token in tokens.values()
+                ],
+                self.chain_manager.blocks.head.number,
+            )
+        )
+        balances = [next(reads) or 0 for _ in tokens]
+        allowances = [next(reads) or 0 for _ in tokens]
+
+        for (address, token), balance, allowance in zip(tokens.items(), balances, allowances):
+            if balance < cost[address]:
+                raise NotEnoughAllowance(self.manager.address)
+
+            if allowance < cost[address]:
+                # NOTE: Coalesce into a single approval per token
+                token.approve(self.manager.address, cost[address], sender=sender)
+
+    def _fund_stream(self, top_up: TopUp, sender: AccountAPI, nonce: int) -> ReceiptAPI:
+        receipt = self.manager.contract.fund_stream(
+            top_up.stream_id,
+            top_up.amount,
+            sender=sender,
+            nonce=nonce,
+        )
+        self.manager._invalidate_stream(top_up.stream_id)
+        return receipt
+
+    def run(
+        self,
+        sender: AccountAPI,
+        stream_ids: Iterable[int] | None = None,
+        **snapshot_kwargs,
+    ) -> list[TopUp]:
+        """
+        Fund every Stream in `stream_ids` (defaults to all Streams) that needs it, and return a
+        report of each top-up (in nonce order).
+
+        If funding a Stream fails, no more top-ups are submitted (and they are marked as such).
+        """
+        streams = self._streams_to_fund(stream_ids, **snapshot_kwargs)
+        if not streams:
+            return []
+
+        top_ups = [top_up for _, top_up in streams]
+        tokens: dict[AddressType, ContractInstance] = {}
+        for stream, top_up in streams:
+            if top_up.token not in tokens:
+                tokens[top_up.token] = stream.token
+
+        self._approve(sender, tokens, self.cost(top_ups))
+
+        nonce = sender.nonce
+        failed = False
+        pending: list[tuple[TopUp, Future]] = []
+        with ThreadPoolExecutor(max(self.max_pending_transactions, 1)) as executor:
+            for top_up in top_ups:
+                # NOTE: Stop submitting if a top-up already failed
+                failed = failed or any(f.done() and f.exception() for _, f in pending)
+                if failed:
+                    top_up.error = StreamNotSubmitted(sender.address)
+                    continue
+
+                if self.max_pending_transactions >= 1:
+                    pending.append(
+                        (top_up, executor.submit(self._fund_stream, top_up, sender, nonce))
+                    )
+
+                else:
+                    # NOTE: Useful for providers that can't handle concurrent requests
+                    try:
+                        top_up.receipt = self._fund_stream(top_up, sender, nonce)
+
+                    except Exception as err:
+                        top_up.error = err
+                        failed = True
+
+                nonce += 1
+
+            for top_up, future in pending:
+                try:
+                    top_up.receipt = future.result()
+
+                except Exception as err:
+                    top_up.error = err
+
+        for top_up in top_ups:
+            if top_up.receipt is not None:
+                log = top_up.receipt.events.filter(self.manager.contract.StreamFunded)[-1]
+                top_up.expires_at = top_up.receipt.timestamp + log.time_left
+
+        return top_ups
@@ -1,40 +1,204 @@
 import asyncio
 import threading
-from collections.abc import AsyncIterator, Iterator
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
 from datetime import timedelta
+from itertools import islice
+from typing import TypeVar, cast
 
+T = TypeVar("T")
+_END = object()
 
-def async_wrap_iter(it: Iterator) -> AsyncIterator:
-    """Wrap blocking iterator into an asynchronous one"""
-    loop = asyncio.get_event_loop()
-    q = asyncio.Queue(1)  # type: ignore[var-annotated]
-    exception = None
-    _END = object()
 
-    async def yield_queue_items():
+# NOTE: Default number of batches that `async_wrap_iter` will fetch ahead of the consumer
+DEFAULT_PREFETCH = 2
+# NOTE: Shared by every wrapped iterator that isn't given an executor
+MAX_SHARED_WORKERS = 8
+_shared_executor: ThreadPoolExecutor | None = None
+_shared_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Thread pool that is shared by default for running blocking code"""
+    global _shared_executor
+
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(
+                max_workers=MAX_SHARED_WORKERS,
+                thread_name_prefix="apepay",
+            )
+
+        return _shared_executor
+
+
+class PrefetchingIterator(AsyncIterator[T]):
+    """
+    Asynchronous iterator over blocking iterator `it`, where items are fetched `batch_size` at a
+    time in `executor`, with up to `prefetch` batches fetched ahead of the consumer.
+
+    At most one fetch is running at once (so `it` is never used concurrently), and no thread is
+    held while waiting for the consumer. If the consumer stops early (via `aclose()` or by being
+    cancelled), no more items are fetched and `it` is closed (if it is a generator).
+    """
+
+    def __init__(
+        self,
+        it: Iterable[T],
+        prefetch: int = DEFAULT_PREFETCH,
+        batch_size: int = 1,
+        executor: Executor | None = None,
+    ):
+        if prefetch < 1 or batch_size < 1:
+            raise ValueError("`prefetch` and `batch_size` must be at least 1.")
+
+        self._it = iter(it)
+        self.prefetch = prefetch
+        self.batch_size = batch_size
+        self.executor = executor or shared_executor()
+
+        self._items: Iterator[T] = iter(())
+        self._batches: deque[list[T]] = deque()
+        self._fetching: asyncio.Future | None = None
+        self._error: BaseException | None = None
+        self._exhausted = False
+        self._closed = False
+        # NOTE: Makes sure `it` is only closed once nothing is fetching from it
+        self._lock = threading.Lock()
+        self._fetch_pending = False
+
+    def _fetch(self) -> list[T]:
+        # NOTE: Runs in `executor`
+        batch = [] if self._closed else list(islice(self._it, self.batch_size))
+
+        with self._lock:
+            self._fetch_pending = False
+            if not self._closed:
+                return batch
+
+        # NOTE: Closed while fetching, so close `it` here (event loop may not be running anymore)
+        self._close_source()
+        return []
+
+    def _schedule(self):
+        if (
+            self._fetching is not None
+            or self._exhausted
+            or self._closed
+            or self._error is not None
+            or len(self._batches) >= self.prefetch
+        ):
+            return
+
+        with self._lock:
+            self._fetch_pending = True
+
+        self._fetching = asyncio.get_running_loop().run_in_executor(self.executor, self._fetch)
+        self._fetching.add_done_callback(self._fetched)
+
+    def _fetched(self, future: asyncio.Future):
+        # NOTE: Runs in the event loop, as soon as the fetch is done (or when it is awaited)
+        if future is not self._fetching:
+            return  # NOTE: Already handled
+
+        self._fetching = None
+
+        if future.cancelled():
+            self._exhausted = True
+
+        elif (error := future.exception()) is not None:
+            # NOTE: Has the traceback from `executor`, which is preserved when raised
+            self._error = error
+
+        else:
+            if batch := future.result():
+                self._batches.append(batch)
+
+            if len(batch) < self.batch_size:
+                self._exhausted = True
+
+            self._schedule()
+
+    def _close_source(self):
+        if close := getattr(self._it, "close", None):
+            close()
+
+        self._it = iter(())
+
+    def __aiter__(self) -> "PrefetchingIterator[T]":
+        return self
+
+    async def __anext__(self) -> T:
         while True:
-            next_item = await q.get()
-            if next_item is _END:
-                break
-            yield next_item
-        if exception is not None:
-            # the iterator has raised, propagate the exception
-            raise exception
-
-    def iter_to_queue():
-        nonlocal exception
-        try:
-            for item in it:
-                # This runs outside the event loop thread, so we
-                # must use thread-safe API to talk to the queue.
-                asyncio.run_coroutine_threadsafe(q.put(item), loop).result()
-        except Exception as e:
-            exception = e
-        finally:
-            asyncio.run_coroutine_threadsafe(q.put(_END), loop).result()
-
-    threading.Thread(target=iter_to_queue).start()
-    return yield_queue_items()
+            if (item := next(self._items, _END)) is not _END:
+                return cast(T, item)
+
+            if self._batches:
+                self._items = iter(self._batches.popleft())
+                self._schedule()  # NOTE: Make room for the next batch
+                continue
+
+            if self._error is not None:
+                error, self._error = self._error, None
+                await self.aclose()
+                raise error
+
+            if self._exhausted or self._closed:
+                raise StopAsyncIteration
+
+            self._schedule()
+            fetching = self._fetching
+            assert fetching is not None  # NOTE: For mypy
+
+            try:
+                # NOTE: Shield it, so that the batch isn't lost (or `it` used concurrently)
+                await asyncio.shield(fetching)
+
+            except asyncio.CancelledError:
+                await self.aclose()
+                raise
+
+            except BaseException:
+                pass  # NOTE: Raised on the next loop, once it has been recorded by `_fetched`
+
+            # NOTE: Don't wait for the callback, as awaiting a done future doesn't yield to the loop
+            self._fetched(fetching)
+
+    async def aclose(self):
+        """
+        Stop fetching items, and close `it` (if supported).
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+            fetch_pending = self._fetch_pending
+
+        self._batches.clear()
+        self._items = iter(())
+        if not fetch_pending:
+            # NOTE: Close in `executor`, since it may run `finally` blocks that make calls
+            self.executor.submit(self._close_source)
+        # else: closed by `_fetch` once it is done
+
+
+def async_wrap_iter(
+    it: Iterable[T],
+    prefetch: int = DEFAULT_PREFETCH,
+    batch_size: int = 1,
+    executor: Executor | None = None,
+) -> PrefetchingIterator[T]:
+    """Wrap blocking iterator into an asynchronous one (see `PrefetchingIterator`)"""
+    return PrefetchingIterator(it, prefetch=prefetch, batch_size=batch_size, executor=executor)
+
+
+def batched(it: Iterable[T], size: int) -> Iterator[tuple[T, ...]]:
+    """Split iterable into tuples of length `size` (the last one may be shorter)"""
+    it = iter(it)
+    while batch := tuple(islice(it, size)):
+        yield batch
 
 
 def coerce_time_unit(time: str) -> str:
@@ -4,7 +4,7 @@ from ape.contracts.base import ContractInstance
 from ape.types import AddressType
 from ape.utils import BaseInterfaceModel
 from eth_utils import to_int
-from pydantic import field_validator
+from pydantic import PrivateAttr, field_validator
 
 from .package import MANIFEST
 
@@ -21,6 +21,8 @@ class Validator(BaseInterfaceModel):
     address: AddressType
     manager: "StreamManager"
 
+    _contract: ContractInstance | None = PrivateAttr(default=None)
+
     def __init__(self, address: str | AddressType, /, *args, **kwargs):
         kwargs["address"] = address
         super().__init__(*args, **kwargs)
@@ -37,10 +39,13 @@ class Validator(BaseInterfaceModel):
 
     @property
     def contract(self) -> ContractInstance:
-        return self.chain_manager.contracts.instance_at(
-            self.address,
-            contract_type=MANIFEST.Validator.contract_type,
-        )
+        if self._contract is None:
+            self._contract = self.chain_manager.contracts.instance_at(
+                self.address,
+                contract_type=MANIFEST.Validator.contract_type,
+            )
+
+        return self._contract
 
     def __hash__(self) -> int:
         # NOTE: So `set` works
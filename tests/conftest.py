@@ -1,16 +1,64 @@
+import asyncio
+from collections import defaultdict
 from datetime import timedelta
 from decimal import Decimal
 
 import pytest
 from ape.api import AccountAPI
+from ape_ethereum.multicall.constants import MULTICALL3_ADDRESS, MULTICALL3_CODE, SUPPORTED_CHAINS
 from eth_pydantic_types import HashBytes32
 from eth_utils import to_bytes, to_int
 
-from apepay import StreamManager
+from apepay import Stream, StreamManager
 
 ONE_HOUR = timedelta(hours=1)
 
 
+class RecordingApp:
+    """
+    Stand-in for a SilverbackApp, which lets tests run the registered handlers directly
+    """
+
+    def __init__(self):
+        self.handlers = defaultdict(list)
+
+    def _register(self, key):
+        def decorator(f):
+            self.handlers[key].append(f)
+            return f
+
+        return decorator
+
+    def on_startup(self):
+        return self._register("startup")
+
+    def on_(self, container):
+        return self._register(getattr(container, "name", "block"))
+
+    def run(self, key, arg):
+        return [asyncio.run(handler(arg)) for handler in self.handlers[key]]
+
+    def apply(self, logs):
+        for log in logs:
+            self.run(log.event_name, log)
+
+
+@pytest.fixture(params=["multicall", "no multicall"])
+def multicall_support(request, chain):
+    if request.param == "no multicall":
+        yield False
+        return
+
+    # NOTE: `ape-titanoboa` does not support `ProviderAPI.set_code` (for `multicall.inject`)
+    import boa
+
+    boa.env.set_code(MULTICALL3_ADDRESS, MULTICALL3_CODE)
+    SUPPORTED_CHAINS.append(chain.chain_id)
+    yield True
+    SUPPORTED_CHAINS.remove(chain.chain_id)
+    boa.env.set_code(MULTICALL3_ADDRESS, b"")
+
+
 @pytest.fixture(scope="session")
 def controller(accounts):
     return accounts[9]
@@ -64,8 +112,15 @@ def stream_manager_contract(project, controller, token, validator, MIN_STREAM_LI
 
 
 @pytest.fixture(scope="session")
-def stream_manager(stream_manager_contract):
-    return StreamManager(stream_manager_contract)
+def session_stream_manager(stream_manager_contract):
+    # NOTE: Local test provider is not thread-safe
+    return StreamManager(stream_manager_contract, max_concurrent_calls=1)
+
+
+@pytest.fixture
+def stream_manager(session_stream_manager):
+    # NOTE: Chain state is reverted between tests, so don't re-use any cached validator sets
+    return StreamManager(session_stream_manager.address, max_concurrent_calls=1)
 
 
 @pytest.fixture(scope="session", params=["1 product", "2 products", "3 products"])
@@ -89,7 +144,15 @@ def funding_rate(token, products):
 
 
 @pytest.fixture(scope="session")
-def create_stream(chain, stream_manager, token, payer, products, stream_life, funding_rate):
+def min_stream_amount(token, funding_rate, MIN_STREAM_LIFE):
+    # NOTE: Cheapest stream possible, so that payer can create many of them
+    return int(
+        Decimal(MIN_STREAM_LIFE.total_seconds()) * funding_rate * Decimal(10 ** token.decimals())
+    )
+
+
+@pytest.fixture(scope="session")
+def create_stream(chain, session_stream_manager, token, payer, products, stream_life, funding_rate):
     def create_stream(
         amount: int | None = None,
         sender: AccountAPI | None = None,
@@ -105,16 +168,37 @@ def create_stream(chain, stream_manager, token, payer, products, stream_life, fu
             )
             assert amount <= token.balanceOf(sender or payer)
 
-        if token.allowance(sender or payer, stream_manager.address) != allowance:
-            token.approve(stream_manager.address, allowance, sender=(sender or payer))
+        if token.allowance(sender or payer, session_stream_manager.address) != allowance:
+            token.approve(session_stream_manager.address, allowance, sender=(sender or payer))
 
-        return stream_manager.create(token, amount, products, sender=(sender or payer), **txn_args)
+        return session_stream_manager.create(
+            token, amount, products, sender=(sender or payer), **txn_args
+        )
 
     return create_stream
 
 
 @pytest.fixture(scope="session")
-def stream(chain, create_stream):
+def created_stream(chain, create_stream):
     # TODO: Remove when https://github.com/ApeWorX/ape/pull/2277 merges
     with chain.isolate():
         yield create_stream()
+
+
+@pytest.fixture
+def stream(created_stream):
+    # NOTE: Chain state is reverted between tests, so don't re-use any cached Stream state
+    return Stream(manager=created_stream.manager, id=created_stream.id)
+
+
+@pytest.fixture
+def streams(chain, create_stream, min_stream_amount):
+    # NOTE: Cheapest Streams possible, with some time passed so they can be claimed
+    streams = [create_stream(amount=min_stream_amount) for _ in range(3)]
+    chain.mine(deltatime=60)
+    return streams
+
+
+@pytest.fixture(scope="session")
+def create_app():
+    return RecordingApp
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from apepay import AsyncStreamManager
+
+
+@pytest.fixture
+def async_manager(stream_manager):
+    # NOTE: Local test provider is not thread-safe
+    return AsyncStreamManager(stream_manager, max_concurrency=1)
+
+
+def test_stream(chain, async_manager, payer, controller, create_stream, min_stream_amount):
+    stream = create_stream(amount=min_stream_amount)
+    chain.mine(deltatime=60)
+    async_stream = async_manager.wrap(stream)
+
+    async def check():
+        assert await async_stream.time_left() == stream.time_left
+        assert await async_stream.amount_claimable() == stream.amount_claimable
+        assert await async_stream.owner() == payer
+        assert await async_stream.is_active()
+
+        await async_stream.claim(sender=controller)
+        assert (await async_stream.info()).last_claim == chain.blocks.head.timestamp
+
+    asyncio.run(check())
+
+
+def test_all_streams(async_manager, stream_manager, create_stream, min_stream_amount):
+    create_stream(amount=min_stream_amount)
+
+    async def load():
+        ids = [stream.id async for stream in async_manager.all_streams(batch_size=2)]
+        # NOTE: Fan out many reads at once
+        time_left = await asyncio.gather(*(async_manager.stream(i).time_left() for i in ids))
+        return ids, time_left
+
+    ids, time_left = asyncio.run(load())
+    streams = list(stream_manager.all_streams())
+    assert ids == [stream.id for stream in streams]
+    assert time_left == [stream.time_left for stream in streams]
+    assert asyncio.run(async_manager.num_streams()) == len(streams)
+    async_manager.close()
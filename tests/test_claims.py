@@ -0,0 +1,60 @@
+import pytest
+
+from apepay import ClaimEngine
+
+
+@pytest.fixture
+def engine(stream_manager, multicall_support):
+    # NOTE: Local test provider is not thread-safe, so don't pipeline submissions
+    return ClaimEngine(stream_manager, max_pending_batches=0, use_multicall=multicall_support)
+
+
+def test_claim(chain, engine, streams, controller, multicall_support):
+    stream_ids = [stream.id for stream in streams]
+    engine.max_batch_size = 2
+
+    claimable = dict((s.id, amount) for s, amount in engine.claimable_streams(stream_ids))
+    assert list(claimable) == stream_ids
+
+    nonce = controller.nonce
+    batches = engine.run(controller, stream_ids)
+
+    expected_batches = (
+        [stream_ids[:2], stream_ids[2:]]
+        if multicall_support
+        else [[stream_id] for stream_id in stream_ids]
+    )
+    assert [batch.stream_ids for batch in batches] == expected_batches
+    assert [batch.nonce for batch in batches] == list(range(nonce, nonce + len(batches)))
+    assert controller.nonce == nonce + len(batches)
+
+    token = streams[0].info.token
+    for batch in batches:
+        assert batch.amounts == {token: sum(claimable[stream_id] for stream_id in batch.stream_ids)}
+        for stream_id in batch.stream_ids:
+            assert engine.manager.contract.streams(stream_id).last_claim == batch.receipt.timestamp
+
+
+def test_min_claims(chain, engine, streams, token):
+    stream_ids = [stream.id for stream in streams]
+    engine.min_claims = {token.address: 2**256 - 1}
+    assert list(engine.claimable_streams(stream_ids)) == []
+
+    # NOTE: Expired streams are always claimed
+    chain.mine(deltatime=int(streams[-1].time_left.total_seconds()))
+    assert [s.id for s, _ in engine.claimable_streams(stream_ids)] == stream_ids
+
+
+def test_gas_aware_batches(chain, engine, streams, controller, multicall_support):
+    stream_ids = [stream.id for stream in streams]
+
+    batches = engine.plan(controller, stream_ids)
+    if multicall_support:
+        assert [batch.stream_ids for batch in batches] == [stream_ids]
+
+    # NOTE: Only enough gas for a single claim per batch
+    claim_gas = engine._claim_gas[streams[0].info.token]
+    engine.max_block_gas_usage = 1.5 * claim_gas / chain.blocks.head.gas_limit
+    batches = engine.plan(controller, stream_ids)
+    assert [batch.stream_ids for batch in batches] == [[stream_id] for stream_id in stream_ids]
+    assert all(batch.receipt is None for batch in batches)
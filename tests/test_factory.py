@@ -0,0 +1,85 @@
+import pytest
+
+from apepay import StreamFactory
+from apepay import exceptions as apepay_exc
+
+
+@pytest.fixture
+def factory(project, controller):
+    blueprint = project.StreamManager.declare(sender=controller)
+    return project.StreamFactory.deploy(blueprint.contract_address, sender=controller)
+
+
+@pytest.fixture
+def deployers(accounts):
+    return accounts[5:8]
+
+
+@pytest.fixture
+def create_manager(factory, validator, token):
+    def create_manager(deployer):
+        # NOTE: Same argument order as `scripts/deploy.py` (arguments are swapped by the factory)
+        return factory.create([validator], [token], sender=deployer)
+
+    return create_manager
+
+
+def test_get_deployments(monkeypatch, factory, deployers, create_manager):
+    managers = [create_manager(deployer).return_value for deployer in deployers[:2]]
+    stream_factory = StreamFactory(factory.address)
+    assert stream_factory.contract is stream_factory.contract
+
+    calls = []
+    call_deployments = StreamFactory._call_deployments
+
+    def counted(self, deployers, block_number):
+        calls.append(deployers)
+        return call_deployments(self, deployers, block_number)
+
+    monkeypatch.setattr(StreamFactory, "_call_deployments", counted)
+
+    deployments = stream_factory.get_deployments(deployers)
+    assert [m and m.address for m in deployments.values()] == [*managers, None]
+    assert len(calls) == 1
+
+    # NOTE: Deployments are cached forever, and deployers without one until the next block
+    assert stream_factory.get_deployment(deployers[0]) is deployments[deployers[0].address]
+    with pytest.raises(apepay_exc.ManagerDoesNotExist):
+        stream_factory.get_deployment(deployers[2])
+
+    assert len(calls) == 1
+
+    new_manager = create_manager(deployers[2]).return_value
+    assert stream_factory.get_deployment(deployers[2]).address == new_manager
+    assert calls[1:] == [[deployers[2].address]]
+
+
+def test_load_deployments(monkeypatch, chain, accounts, factory, deployers, create_manager):
+    receipts = []
+
+    def get_contract_logs(provider, log_filter):
+        # NOTE: Not supported by all local providers, so serve the logs of `receipts`
+        for receipt in receipts:
+            for log in receipt.events:
+                if (
+                    log.contract_address in log_filter.addresses
+                    and log_filter.start_block <= log.block_number <= log_filter.stop_block
+                ):
+                    yield log
+
+    monkeypatch.setattr(type(chain.provider), "get_contract_logs", get_contract_logs)
+
+    def call_deployments(self, deployers, block_number):
+        raise AssertionError("Should not be called")
+
+    monkeypatch.setattr(StreamFactory, "_call_deployments", call_deployments)
+
+    receipts.extend(create_manager(deployer) for deployer in deployers[:2])
+    stream_factory = StreamFactory(factory.address)
+    assert stream_factory.load_deployments() == 2
+    assert stream_factory.get_deployment(deployers[1]).address == receipts[1].return_value
+
+    # NOTE: New logs are loaded when a deployer is not found
+    receipts.append(create_manager(deployers[2]))
+    deployments = stream_factory.get_deployments([deployers[2], accounts[0]])
+    assert [m and m.address for m in deployments.values()] == [receipts[2].return_value, None]
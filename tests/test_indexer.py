@@ -0,0 +1,234 @@
+from apepay import FactoryIndex, StreamFactory, StreamIndex, StreamManager
+
+
+def assert_matches_contract(index, stream_id):
+    struct = index.manager.contract.streams(stream_id)
+    info = index.streams[stream_id]
+    assert info.owner == struct.owner
+    assert info.token == struct.token
+    assert info.funded_amount == struct.funded_amount
+    assert info.expires_at == struct.expires_at
+    assert info.last_update == struct.last_update
+    assert info.last_claim == struct.last_claim
+    assert info.products == struct.products
+
+
+def test_replay_logs(
+    chain, accounts, stream_manager, controller, payer, token, products, min_stream_amount
+):
+    index = StreamIndex(stream_manager, start_block=chain.blocks.head.number)
+    contract = stream_manager.contract
+    receipts = []
+
+    def create_stream():
+        receipts.append(contract.create_stream(token, min_stream_amount, products, sender=payer))
+        return receipts[-1].events.filter(contract.StreamCreated)[-1].stream_id
+
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    created, funded, claimed, cancelled = [create_stream() for _ in range(4)]
+
+    chain.mine(deltatime=60)
+    receipts.append(contract.fund_stream(funded, min_stream_amount, sender=payer))
+    receipts.append(contract.claim_stream(claimed, sender=controller))
+    receipts.append(contract.cancel_stream(cancelled, sender=controller))
+
+    new_owner = accounts[2]
+    receipts.append(contract.set_stream_owner(created, new_owner, sender=payer))
+
+    assert index.apply_logs(log for tx in receipts for log in tx.events) == 9
+    assert len(index) == 4
+    for stream_id in (created, funded, claimed, cancelled):
+        assert_matches_contract(index, stream_id)
+
+    timestamp = chain.blocks.head.timestamp
+    assert [s.id for s in index.active_streams(timestamp=timestamp)] == [created, funded, claimed]
+    assert [s.id for s in index.unclaimed_streams(timestamp=timestamp)] == [
+        s.id for s in index.all_streams() if s.amount_claimable > 0
+    ]
+    assert [s.id for s in index.streams_by_owner(new_owner)] == [created]
+    assert [s.id for s in index.streams_by_owner(payer)] == [funded, claimed, cancelled]
+    assert [s.id for s in index.streams_by_token(token)] == [created, funded, claimed, cancelled]
+
+    # NOTE: Streams from index are pre-populated (last log of `created` is in the latest block)
+    stream = index[created]
+    assert stream.info is index.streams[created]
+    assert stream.time_left.total_seconds() == stream.info.time_left_at(timestamp)
+
+
+def test_checkpoint(
+    tmp_path, chain, stream_manager, controller, payer, token, products, min_stream_amount
+):
+    path = tmp_path / "index.db"
+    index = StreamIndex(stream_manager, start_block=chain.blocks.head.number, checkpoint=path)
+    assert index.last_block is None
+    index.sync()
+
+    contract = stream_manager.contract
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    tx = contract.create_stream(token, min_stream_amount, products, sender=payer)
+    stream_id = tx.events.filter(contract.StreamCreated)[-1].stream_id
+    created_block = tx.block_number
+    index.apply_logs(tx.events)
+    created_info = index.streams[stream_id]
+
+    chain.mine(deltatime=60)
+    tx = contract.claim_stream(stream_id, sender=controller)
+    index.apply_logs(tx.events)
+    index.sync()
+    assert index.streams[stream_id] != created_info
+
+    # NOTE: Resumes from where the last one left off
+    restored = StreamIndex(stream_manager, checkpoint=path)
+    assert restored.last_block == index.last_block == chain.blocks.head.number
+    assert restored.start_block == index.start_block
+    assert restored.streams == index.streams
+    assert [s.id for s in restored.streams_by_owner(payer)] == [stream_id]
+    assert restored._journal == index._journal
+    assert restored._block_hashes == index._block_hashes
+
+    # NOTE: Re-org of the last block (where the claim happened) is undone
+    restored._block_hashes[restored.last_block] = b"\x00" * 32
+    restored.sync(stop_block=restored.last_block)
+    assert restored.streams[stream_id] == created_info
+
+    # NOTE: Undoing stream creation removes it (also from the checkpoint)
+    restored.rewind(created_block - 1)
+    restored.checkpoint.save(restored)
+    assert stream_id not in restored
+    assert stream_id not in StreamIndex(stream_manager, checkpoint=path)
+    assert list(restored.streams_by_owner(payer)) == []
+
+
+def test_sync_after_apply_logs(
+    monkeypatch, chain, stream_manager, controller, payer, token, products, min_stream_amount
+):
+    index = StreamIndex(stream_manager, start_block=chain.blocks.head.number)
+    contract = stream_manager.contract
+    receipts = []
+
+    def get_contract_logs(provider, log_filter):
+        # NOTE: Not supported by all local providers, so serve the logs of `receipts`
+        for receipt in receipts:
+            for log in receipt.events:
+                if log_filter.start_block <= log.block_number <= log_filter.stop_block:
+                    yield log
+
+    monkeypatch.setattr(type(chain.provider), "get_contract_logs", get_contract_logs)
+
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    receipts.append(contract.create_stream(token, min_stream_amount, products, sender=payer))
+    stream_id = receipts[-1].events.filter(contract.StreamCreated)[-1].stream_id
+    chain.mine(deltatime=60)
+    receipts.append(contract.fund_stream(stream_id, min_stream_amount, sender=payer))
+    chain.mine(deltatime=60)
+    receipts.append(contract.claim_stream(stream_id, sender=controller))
+
+    # NOTE: Logs applied from a receipt (e.g. by a handler) are not applied again when syncing
+    assert index.apply_logs(receipts[0].events) == 1
+    assert index.apply_logs(log for tx in receipts[:2] for log in tx.events) == 2
+    assert index.apply_logs(receipts[1].events) == 0
+    assert index.sync() == 1
+    assert_matches_contract(index, stream_id)
+
+    assert index.apply_logs(log for tx in receipts for log in tx.events) == 0
+    assert_matches_contract(index, stream_id)
+
+
+def test_factory_index(
+    tmp_path,
+    monkeypatch,
+    chain,
+    project,
+    accounts,
+    controller,
+    payer,
+    token,
+    validator,
+    products,
+    min_stream_amount,
+    MIN_STREAM_LIFE,
+):
+    start_block = chain.blocks.head.number
+    blueprint = project.StreamManager.declare(sender=controller)
+    factory = project.StreamFactory.deploy(blueprint.contract_address, sender=controller)
+    receipts = []
+    queries = []
+
+    def get_contract_logs(provider, log_filter):
+        # NOTE: Not supported by all local providers, so serve the logs of `receipts`
+        queries.append(log_filter)
+        event_names = {event.name for event in log_filter.events}
+        for receipt in receipts:
+            for log in receipt.events:
+                if (
+                    log.contract_address in log_filter.addresses
+                    and log.event_name in event_names
+                    and log_filter.start_block <= log.block_number <= log_filter.stop_block
+                ):
+                    yield log
+
+    monkeypatch.setattr(type(chain.provider), "get_contract_logs", get_contract_logs)
+
+    def deploy_manager():
+        return StreamManager(
+            project.StreamManager.deploy(
+                controller,
+                int(MIN_STREAM_LIFE.total_seconds()),
+                [token],
+                [validator],
+                sender=controller,
+            )
+        )
+
+    def create_stream(manager):
+        token.approve(manager.address, 2**256 - 1, sender=payer)
+        receipts.append(
+            manager.contract.create_stream(token, min_stream_amount, products, sender=payer)
+        )
+        return receipts[-1].events.filter(manager.contract.StreamCreated)[-1].stream_id
+
+    # NOTE: Same argument order as `scripts/deploy.py` (arguments are swapped by the factory)
+    receipts.append(factory.create([validator], [token], sender=accounts[5]))
+    factory_manager = receipts[-1].return_value
+
+    managers = [deploy_manager() for _ in range(2)]
+    streams = [(manager.address, create_stream(manager)) for manager in managers for _ in range(2)]
+
+    path = tmp_path / "index.db"
+    index = FactoryIndex(StreamFactory(factory.address), start_block=start_block, checkpoint=path)
+    for manager in managers:
+        index.add_manager(manager, start_block=start_block)
+
+    assert index.sync() == len(streams)
+    assert [m.address for m in index.managers] == [m.address for m in managers] + [factory_manager]
+    # NOTE: One query to discover managers, and one for the logs of all of them
+    assert len(queries) == 2
+    assert sorted((s.manager.address, s.id) for s in index.all_streams()) == sorted(streams)
+    for manager in managers:
+        assert len(index[manager]) == 2
+        assert index[manager].last_block == chain.blocks.head.number
+
+    # NOTE: Discovered managers are only indexed from the block they were created at
+    assert index[factory_manager].start_block == receipts[0].block_number
+    # NOTE: Also cached by the factory, without calling it
+    assert index.factory.get_deployment(accounts[5]).address == factory_manager
+
+    new_manager = deploy_manager()
+    new_stream = create_stream(new_manager)
+    index.add_manager(new_manager, start_block=chain.blocks.head.number)
+    create_stream(managers[0])
+    queries.clear()
+    assert index.sync() == 2
+    assert len(queries) == 2
+    assert [s.id for s in index[new_manager].all_streams()] == [new_stream]
+    assert len(index[managers[0]]) == 3
+
+    # NOTE: Every index resumes from the checkpoint
+    restored = FactoryIndex(
+        StreamFactory(factory.address), start_block=start_block, checkpoint=path
+    )
+    restored.add_manager(new_manager)
+    assert restored.sync() == 0
+    assert len(restored) == 2
+    assert restored[new_manager].streams == index[new_manager].streams
+    assert factory_manager in restored
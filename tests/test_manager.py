@@ -1,5 +1,11 @@
 from datetime import timedelta
 
+from ape.types import LogFilter
+
+from apepay import Stream, StreamManager, StreamRequest
+from apepay import exceptions as apepay_exc
+from apepay import manager as apepay_manager
+
 
 def test_init(stream_manager, controller, validator, token):
     assert stream_manager.MIN_STREAM_LIFE == timedelta(hours=1)
@@ -7,6 +13,10 @@ def test_init(stream_manager, controller, validator, token):
     assert stream_manager.validators == [validator]
     assert stream_manager.is_accepted(token)
 
+    # NOTE: Contract instances are reused
+    assert stream_manager.contract is stream_manager.contract
+    assert stream_manager.validators[0].contract is stream_manager.validators[0].contract
+
 
 def test_add_rm_tokens(stream_manager, controller, create_token):
     new_token = create_token(controller)
@@ -17,3 +27,304 @@ def test_add_rm_tokens(stream_manager, controller, create_token):
 
     stream_manager.remove_token(new_token, sender=controller)
     assert not stream_manager.is_accepted(new_token)
+
+
+def test_accepted_tokens(
+    monkeypatch, chain, stream_manager, controller, create_token, token, validator
+):
+    # NOTE: Discovered from the constructor arguments (validators are not tokens)
+    assert stream_manager.accepted_tokens == {token.address}
+    assert stream_manager._token_candidates == {token.address}
+
+    new_token = create_token(controller)
+    stream_manager.add_token(new_token, sender=controller)
+    assert stream_manager.accepted_tokens == {token.address, new_token.address}
+
+    # NOTE: Cached for a while (or for a given block), without looking up the latest block
+    block_id = chain.blocks.head.number
+    assert new_token.address in stream_manager.accepted_tokens_at(block_id)
+    stream_manager.contract.set_token_accepted(new_token, False, sender=controller)
+    assert stream_manager.is_accepted(new_token)
+    assert stream_manager.is_accepted(new_token, block_id=block_id)
+    assert not stream_manager.is_accepted(new_token, block_id=chain.blocks.head.number)
+
+    monkeypatch.setattr(apepay_manager, "ACCEPTED_TOKENS_TTL", 0)
+    assert stream_manager.accepted_tokens == {token.address}
+    assert not stream_manager.is_accepted(new_token)
+
+    # NOTE: Tokens accepted elsewhere are found when they are checked
+    other_token = create_token(controller)
+    stream_manager.contract.set_token_accepted(other_token, True, sender=controller)
+    assert stream_manager.is_accepted(other_token)
+    assert other_token.address in stream_manager.accepted_tokens
+
+
+def test_all_streams(
+    chain, stream_manager, controller, min_stream_amount, create_stream, multicall_support
+):
+    streams = [create_stream(amount=min_stream_amount) for _ in range(3)]
+    streams[1].cancel(sender=controller)
+
+    all_streams = list(stream_manager.all_streams(batch_size=2))
+    assert [s.id for s in all_streams] == [s.id for s in streams]
+
+    for stream in all_streams:
+        assert stream.info.block_number == chain.blocks.head.number
+        assert stream.info.owner == stream.contract.streams(stream.id).owner
+        assert stream.info.funded_amount == stream.contract.streams(stream.id).funded_amount
+        assert stream.info.time_left == stream.contract.time_left(stream.id)
+        assert stream.info.amount_claimable == stream.contract.amount_claimable(stream.id)
+
+    # NOTE: Snapshots are kept as loaded (for filtering), even once the chain moves on
+    chain.mine()
+    assert all(s.snapshot.block_number == chain.blocks.head.number - 1 for s in all_streams)
+
+    assert [s.id for s in stream_manager.active_streams(batch_size=2)] == [
+        streams[0].id,
+        streams[2].id,
+    ]
+    assert [s.id for s in stream_manager.unclaimed_streams(batch_size=2)] == [
+        s.id for s in streams if s.amount_claimable > 0
+    ]
+
+    chain.mine(deltatime=60)
+    assert [s.id for s in stream_manager.unclaimed_streams(batch_size=2)] == [
+        s.id for s in streams if s.amount_claimable > 0
+    ]
+
+
+def test_streams(
+    monkeypatch,
+    chain,
+    accounts,
+    stream_manager,
+    controller,
+    payer,
+    token,
+    products,
+    min_stream_amount,
+):
+    contract = stream_manager.contract
+    receipts = []
+    queries = []
+
+    def get_contract_logs(provider, log_filter):
+        # NOTE: Not supported by all local providers, so serve the logs of `receipts`
+        queries.append(log_filter)
+        (event,) = log_filter.events
+        for receipt in receipts:
+            for log in receipt.events:
+                if log.event_name == event.name and any(
+                    LogFilter.from_event(event=event, search_topics={name: value}).topic_filter
+                    == log_filter.topic_filter
+                    for name, value in log.event_arguments.items()
+                    if name in ("owner", "token", "new_owner")
+                ):
+                    yield log
+
+    monkeypatch.setattr(type(chain.provider), "get_contract_logs", get_contract_logs)
+
+    def create_stream():
+        receipts.append(contract.create_stream(token, min_stream_amount, products, sender=payer))
+        return receipts[-1].events.filter(contract.StreamCreated)[-1].stream_id
+
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    stream_ids = [create_stream() for _ in range(4)]
+    new_owner = accounts[2]
+    receipts.append(contract.set_stream_owner(stream_ids[1], new_owner, sender=payer))
+    contract.cancel_stream(stream_ids[3], sender=controller)
+
+    def find(**filters):
+        return [stream.id for stream in stream_manager.streams(**filters)]
+
+    assert find(start=stream_ids[0]) == stream_ids
+    assert find(start=stream_ids[1], stop=stream_ids[3]) == stream_ids[1:3]
+    assert find(start=stream_ids[0], active=True) == stream_ids[:3]
+    assert find(start=stream_ids[0], active=False) == stream_ids[3:]
+    assert find(start=stream_ids[0], product=products[-1]) == stream_ids
+    assert find(start=stream_ids[0], product=b"\xff" * 32) == []
+
+    # NOTE: Only the Streams found in the logs for an owner (or token) are loaded
+    assert find(owner=new_owner) == stream_ids[1:2]
+    assert find(owner=payer, token=token) == [stream_ids[0], *stream_ids[2:]]
+    assert find(owner=payer, stop=stream_ids[2]) == stream_ids[:1]
+    assert find(owner=controller) == []
+
+    # NOTE: Only new logs (and those in the last `TOPIC_INDEX_OVERLAP` blocks) are queried again
+    monkeypatch.setattr(apepay_manager, "TOPIC_INDEX_OVERLAP", 1)
+    queries.clear()
+    last_block = chain.blocks.head.number
+    receipts.append(contract.set_stream_owner(stream_ids[0], new_owner, sender=payer))
+    assert find(owner=new_owner) == stream_ids[:2]
+    assert [(query.start_block, query.stop_block) for query in queries] == [
+        (last_block, chain.blocks.head.number)
+    ] * 2
+
+
+def test_create_many(
+    stream_manager, accounts, payer, token, products, min_stream_amount, create_token
+):
+    other_payer = accounts[1]
+    token.DEBUG_mint(other_payer, min_stream_amount, sender=other_payer)
+    for sender in (payer, other_payer):
+        token.approve(stream_manager.address, 2**256 - 1, sender=sender)
+
+    def request(sender=payer, amount=min_stream_amount, **kwargs):
+        return StreamRequest(
+            sender=sender,
+            token=kwargs.pop("token", token),
+            amount=amount,
+            products=kwargs.pop("products", products),
+            **kwargs,
+        )
+
+    num_streams = stream_manager.contract.num_streams()
+    results = stream_manager.create_many(
+        [
+            request(),
+            request(sender=other_payer),
+            request(token=create_token(payer)),
+            request(amount=token.balanceOf(payer)),  # NOTE: Not enough left after first request
+            request(products=[]),  # NOTE: `TestValidator` divides by zero
+            request(amount=min_stream_amount // 2),
+            request(min_stream_life=stream_manager.MIN_STREAM_LIFE),
+        ],
+        # NOTE: Local test provider is not thread-safe
+        max_pending_transactions=0,
+    )
+
+    created = [result for result in results if result.stream is not None]
+    assert [result.stream.id for result in created] == [num_streams + idx for idx in range(3)]
+    assert [result.stream.owner for result in created] == [payer, other_payer, payer]
+    assert all(result.error is None for result in created)
+
+    assert [type(result.error) for result in results if result.stream is None] == [
+        apepay_exc.TokenNotAccepted,
+        apepay_exc.NotEnoughAllowance,
+        apepay_exc.StreamRejected,
+        apepay_exc.StreamLifeInsufficient,
+    ]
+    assert token.balanceOf(other_payer) == 0
+
+
+def test_create_many_stops_after_failure(stream_manager, payer, token, products, min_stream_amount):
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    requests = [
+        StreamRequest(
+            sender=payer,
+            token=token,
+            amount=min_stream_amount,
+            products=products,
+            # NOTE: Too long, so `create_stream` reverts
+            min_stream_life=stream_manager.MIN_STREAM_LIFE * (10 if idx == 0 else 1),
+        )
+        for idx in range(2)
+    ]
+
+    results = stream_manager.create_many(requests, max_pending_transactions=0)
+    assert all(result.stream is None for result in results)
+    assert results[0].error is not None
+    assert isinstance(results[1].error, apepay_exc.StreamNotSubmitted)
+
+
+def test_streams_from_logs(
+    chain, stream_manager, create_app, token, products, min_stream_amount, payer, controller
+):
+    app = create_app()
+    handled = []
+
+    @stream_manager.on_stream_created(app)
+    def created(stream, log):
+        handled.append((stream, log))
+
+    @stream_manager.on_stream_funded(app)
+    def funded(stream, log):
+        handled.append((stream, log))
+
+    @stream_manager.on_stream_claimed(app)
+    def claimed(stream):
+        handled.append((stream, None))
+
+    @stream_manager.on_stream_cancelled(app)
+    def cancelled(stream, log):
+        handled.append((stream, log))
+
+    def check(receipt, logs=None):
+        handled.clear()
+        app.apply(receipt.events if logs is None else logs)
+        assert handled
+
+        for stream, log in handled:
+            assert log is None or log.stream_id == stream.id
+            # NOTE: Decoded from logs, without calling the chain
+            assert stream._info is not None and not stream._info_pinned
+            expected = Stream(manager=stream_manager, id=stream.id)
+            assert stream.info == expected.refresh(at_block=receipt.block_number)
+
+        return stream
+
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    stream = check(
+        stream_manager.contract.create_stream(token, min_stream_amount, products, sender=payer)
+    )
+    assert stream.time_left == stream_manager.MIN_STREAM_LIFE
+
+    chain.mine(deltatime=60)
+    # NOTE: Not frozen as of the log (e.g. if a bot keeps it around)
+    assert stream.time_left < stream_manager.MIN_STREAM_LIFE
+    assert stream.time_left == timedelta(
+        seconds=stream.info.expires_at - chain.blocks.head.timestamp
+    )
+    receipt = stream.add_funds(min_stream_amount, sender=payer)
+    # NOTE: Also works if the claim made while funding is seen after the funding
+    check(receipt, logs=reversed(receipt.events))
+
+    chain.mine(deltatime=60)
+    check(stream.claim(sender=controller))
+
+    chain.mine(deltatime=60)
+    receipt = stream.cancel(sender=controller)
+    assert not check(receipt).is_active
+    assert not stream.is_active
+
+    # A new bot has not seen the Stream being created, so it has to fetch it from the chain
+    other_app = create_app()
+    other_manager = StreamManager(stream_manager.address)
+    fetched = []
+    other_manager.on_stream_cancelled(other_app)(fetched.append)
+    other_app.apply(receipt.events)
+    assert fetched[0]._info is None
+
+
+def test_streams_from_logs_without_calls(
+    monkeypatch, stream_manager, create_app, token, products, min_stream_amount, payer
+):
+    monkeypatch.setattr(apepay_manager, "HEAD_TTL", 3600.0)
+    # NOTE: Forget any blocks from before the chain was last reverted
+    stream_manager._update_head()
+    app = create_app()
+    handled = []
+
+    @stream_manager.on_stream_created(app)
+    def created(stream, log):
+        handled.append((stream.info, stream.time_left, stream.amount_claimable, stream.is_active))
+
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    receipt = stream_manager.contract.create_stream(
+        token, min_stream_amount, products, sender=payer
+    )
+
+    def no_calls(*args, **kwargs):
+        raise AssertionError("Called the chain")
+
+    # NOTE: Only the block of the log is looked up (to get its timestamp)
+    with monkeypatch.context() as m:
+        m.setattr(type(stream_manager), "_load_info", no_calls)
+        m.setattr(type(stream_manager), "_update_head", no_calls)
+        app.apply(receipt.events)
+
+    ((info, time_left, amount_claimable, is_active),) = handled
+    assert info.block_number == receipt.block_number
+    assert time_left == stream_manager.MIN_STREAM_LIFE
+    assert amount_claimable == 0
+    assert is_active
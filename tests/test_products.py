@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from apepay import ProductCatalog
+from apepay.products import bitmap_ids
+
+A, B, C = (bytes([code]) * 32 for code in range(1, 4))
+
+
+def test_bitmap_ids():
+    assert bitmap_ids(0) == []
+    assert bitmap_ids(0b1011) == [0, 1, 3]
+    assert bitmap_ids(1 << 1_000 | 1) == [0, 1_000]
+
+
+def test_catalog():
+    catalog = ProductCatalog()
+    catalog.add_stream(0, [A], expires_at=100)
+    catalog.add_stream(1, [A, B], expires_at=200)
+    catalog.add_stream(2, [B, C], expires_at=300)
+    catalog.add_stream(3, [C])  # NOTE: Already expired
+
+    assert len(catalog) == 3
+    assert catalog.codes == [A, B, C]
+    assert catalog.intern(B) == 1
+    assert A in catalog
+    assert catalog.products_of(1) == [A, B]
+
+    assert catalog.stream_ids([A]) == [0, 1]
+    assert catalog.stream_ids([A, C]) == [0, 1, 2, 3]
+    assert catalog.stream_ids([B, C], match_all=True) == [2]
+    assert catalog.stream_ids([A, b"\xff" * 32], match_all=True) == []
+    assert catalog.stream_ids([C], active=True) == [2]
+    assert catalog.count([A, B]) == 3
+
+    assert catalog.expire(150) == [0]
+    assert catalog.stream_ids([A], active=True) == [1]
+    assert catalog.stream_ids([A]) == [0, 1]
+
+    with pytest.raises(ValueError):
+        catalog.expire(100)
+
+    catalog.remove_stream(1)
+    assert catalog.stream_ids([A, B]) == [0, 2]
+    assert catalog.num_streams == 3
+
+
+def test_apply_logs(chain, stream_manager, create_stream, min_stream_amount, controller, products):
+    streams = [create_stream(amount=min_stream_amount) for _ in range(3)]
+    stream_ids = [stream.id for stream in streams]
+
+    catalog = ProductCatalog()
+    catalog.load(streams)
+    assert catalog.stream_ids(products, match_all=True) == stream_ids
+
+    for log in streams[1].cancel(sender=controller).events:
+        catalog.apply_log(log)
+
+    assert catalog.stream_ids(products) == [streams[0].id, streams[2].id]
+    assert catalog.products_of(streams[1].id) == []
+
+    chain.mine(deltatime=int(streams[2].time_left.total_seconds()))
+    catalog.expire(chain.blocks.head.timestamp)
+    assert catalog.stream_ids(products, active=True) == []
+    assert catalog.stream_ids(products) == [streams[0].id, streams[2].id]
+
+
+def test_query_speed():
+    catalog = ProductCatalog()
+    codes = [bytes([code]) * 32 for code in range(1, 11)]
+    for stream_id in range(100_000):
+        # NOTE: Every Stream pays for 3 or 4 products
+        stream_products = [code for n, code in enumerate(codes) if n % 3 == stream_id % 3]
+        catalog.add_stream(stream_id, stream_products, expires_at=stream_id)
+
+    catalog.expire(50_000)
+
+    def timed(query) -> float:
+        start = time.perf_counter()
+        query()
+        return time.perf_counter() - start
+
+    # NOTE: Best of many runs, so that the test is not affected by noise
+    any_of = min(timed(lambda: catalog.count(codes[:4], active=True)) for _ in range(10))
+    all_of = min(timed(lambda: catalog.count(codes[::3], match_all=True)) for _ in range(10))
+    assert any_of < 1e-3
+    assert all_of < 1e-3
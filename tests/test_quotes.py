@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from eth_utils import to_int
+
+from apepay import QuoteEngine
+from apepay import exceptions as apepay_exc
+
+
+@pytest.fixture
+def engine(stream_manager, multicall_support):
+    return QuoteEngine(stream_manager, use_multicall=multicall_support)
+
+
+@pytest.fixture
+def validate_calls(monkeypatch, engine):
+    calls = []
+    validate_many = QuoteEngine._validate_many
+
+    def counting_validate(self, calls_, *args):
+        calls.extend(calls_)
+        return validate_many(self, calls_, *args)
+
+    monkeypatch.setattr(QuoteEngine, "_validate_many", counting_validate)
+    return calls
+
+
+def test_quote(stream_manager, engine, payer, token, products, min_stream_amount):
+    quote = engine.quote(payer, token, min_stream_amount, products)
+
+    assert quote.is_valid
+    assert quote.stream_life == stream_manager.compute_stream_life(
+        payer, token, min_stream_amount, products
+    )
+    assert quote.stream_life.total_seconds() == min_stream_amount // sum(map(to_int, products))
+    assert quote.amount_for(quote.stream_life) <= min_stream_amount
+
+
+def test_quote_many(stream_manager, engine, validate_calls, payer, token, products):
+    amount = 10**18
+    product_lists = [products[:idx] for idx in range(1, len(products) + 1)] + [products]
+    quotes = engine.quote_many(payer, token, amount, product_lists)
+
+    assert [quote.products for quote in quotes] == product_lists
+    assert [quote.stream_life for quote in quotes] == [
+        stream_manager.compute_stream_life(payer, token, amount, product_list)
+        for product_list in product_lists
+    ]
+    # NOTE: One call per validator and unique list of products
+    assert len(validate_calls) == len(stream_manager.validators) * len(products)
+
+    # NOTE: Cached, and scaled locally for other amounts (rounding down)
+    quote = engine.quote(payer, token, 2 * amount, products)
+    assert len(validate_calls) == len(stream_manager.validators) * len(products)
+    stream_life = stream_manager.compute_stream_life(payer, token, 2 * amount, products)
+    assert stream_life - timedelta(seconds=2) <= quote.stream_life <= stream_life
+
+
+def test_quote_expires(chain, stream_manager, engine, validate_calls, payer, token, products):
+    engine.ttl, engine.max_age_blocks = None, 1
+
+    engine.quote(payer, token, 10**18, products)
+    engine.quote(payer, token, 10**18, products)
+    assert len(validate_calls) == len(stream_manager.validators)
+
+    chain.mine()
+    engine.quote(payer, token, 10**18, products)
+    assert len(validate_calls) == 2 * len(stream_manager.validators)
+
+
+def test_no_valid_products(engine, payer, token):
+    quote = engine.quote(payer, token, 10**18, [])
+
+    # NOTE: `TestValidator` divides by zero
+    assert not quote.is_valid
+    assert quote.rejected_by
+
+    with pytest.raises(apepay_exc.NoValidProducts):
+        quote.amount_for(timedelta(hours=1))
+
+
+def test_quote_exact(stream_manager, engine, validate_calls, payer, token, products):
+    engine.exact = True
+    amounts = [10**18, 3 * 10**18 + 1, 10**18]
+    quotes = engine.quote_each((payer, token, amount, products) for amount in amounts)
+
+    # NOTE: One call per validator and unique amount, instead of scaling locally
+    assert len(validate_calls) == 2 * len(stream_manager.validators)
+    assert [quote.stream_life for quote in quotes] == [
+        stream_manager.compute_stream_life(payer, token, amount, products) for amount in amounts
+    ]
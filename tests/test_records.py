@@ -0,0 +1,104 @@
+import tracemalloc
+
+from apepay import Stream, StreamInfo, StreamRecords
+
+TOKENS = ["0x" + "1" * 40, "0x" + "2" * 40]
+OWNERS = ["0x" + "3" * 40, "0x" + "4" * 40, "0x" + "5" * 40]
+PRODUCTS = [[b"\x01" * 32], [b"\x01" * 32, b"\x02" * 32]]
+START = 1_700_000_000
+
+
+def make_info(stream_id: int) -> StreamInfo:
+    return StreamInfo(
+        owner=OWNERS[stream_id % len(OWNERS)],
+        token=TOKENS[stream_id % len(TOKENS)],
+        funded_amount=10**18 * stream_id,
+        expires_at=START + 3_600 * stream_id,
+        last_update=START,
+        last_claim=START + stream_id,
+        products=PRODUCTS[stream_id % len(PRODUCTS)],
+        block_number=1,
+        timestamp=START + 100,
+    )
+
+
+def test_records(stream_manager):
+    infos = {stream_id: make_info(stream_id) for stream_id in range(20)}
+    records = StreamRecords(stream_manager)
+    for stream_id, info in infos.items():
+        records.add(stream_id, info)
+
+    assert len(records) == len(infos)
+    assert list(records) == list(infos)
+    # NOTE: Every owner, token and set of products is only stored once
+    assert records.owners == OWNERS
+    assert records.tokens == TOKENS
+    assert len(records.products) == len(PRODUCTS)
+
+    for stream_id, info in infos.items():
+        assert records.info(stream_id) == info
+        assert records[stream_id].funded_amount == info.funded_amount
+
+    stream = records.stream(5)
+    assert isinstance(stream, Stream)
+    assert stream._info == infos[5]  # NOTE: Cached (until the chain moves past it)
+
+    del records[5]
+    records.discard(6)
+    records.discard(6)
+    assert 5 not in records and 6 not in records
+    assert [stream.id for stream in records.streams()] == [
+        stream_id for stream_id in infos if stream_id not in (5, 6)
+    ]
+
+
+def test_from_index(stream_manager, create_stream, min_stream_amount):
+    from apepay import StreamIndex
+
+    streams = [create_stream(amount=min_stream_amount) for _ in range(2)]
+    index = StreamIndex(stream_manager)
+    for stream in streams:
+        index._add(stream.id, stream.info)
+
+    records = StreamRecords.from_index(index, streams[1:])
+    assert list(records) == [streams[1].id]
+    assert records.stream(streams[1].id).info == streams[1].info
+
+    records = StreamRecords.from_streams(stream_manager, streams)
+    assert [stream.info for stream in records.streams()] == [stream.info for stream in streams]
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    try:
+        value = build()
+        size, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    del value
+    return size
+
+
+def test_memory(stream_manager):
+    infos = [make_info(stream_id) for stream_id in range(1_000)]
+
+    def build_streams():
+        streams = {}
+        for stream_id, info in enumerate(infos):
+            # NOTE: What `StreamIndex.unclaimed_streams` (and the revenue bot) keep around
+            stream = Stream(manager=stream_manager, id=stream_id)
+            stream._cache_info(info.model_copy(deep=True), version=0)
+            streams[stream_id] = stream
+
+        return streams
+
+    def build_records():
+        records = StreamRecords(stream_manager)
+        for stream_id, info in enumerate(infos):
+            records.add(stream_id, info.model_copy(deep=True))
+
+        return records
+
+    assert measure(build_records) * 3 < measure(build_streams)
@@ -0,0 +1,255 @@
+from datetime import timedelta
+
+import pytest
+
+from apepay import ExpiryScheduler, Stream, StreamManager
+
+
+def test_schedule():
+    scheduler = ExpiryScheduler()
+    assert len(scheduler) == 0
+    assert scheduler.next_expiry is None
+
+    scheduler.schedule(1, 300)
+    scheduler.schedule(2, 100)
+    scheduler.schedule(3, 200)
+    assert len(scheduler) == 3
+    assert 2 in scheduler
+    assert scheduler.next_expiry == 100
+
+    # Moving or removing a Stream leaves a stale entry behind, which must be skipped
+    scheduler.schedule(2, 400)
+    scheduler.remove(3)
+    assert 3 not in scheduler
+    assert scheduler.expires_at(2) == 400
+    assert scheduler.next_expiry == 300
+
+    assert scheduler.pop_expired(299) == []
+    assert scheduler.pop_expired(400) == [1, 2]
+    assert len(scheduler) == 0
+    assert scheduler.next_expiry is None
+
+
+def test_compaction():
+    scheduler = ExpiryScheduler()
+    scheduler.schedule(0, 0)
+    for expires_at in range(1, 100):
+        scheduler.schedule(1, expires_at)
+
+    # NOTE: Stale entries don't pile up when the same Stream keeps getting funded
+    assert len(scheduler._heap) <= 2 * len(scheduler)
+    assert scheduler.pop_expired(100) == [0, 1]
+
+
+def test_load_and_apply_logs(
+    chain, stream_manager, create_stream, token, products, min_stream_amount, controller, payer
+):
+    # NOTE: Cheapest Streams possible, so that payer can afford all of them
+    streams = [create_stream(amount=min_stream_amount) for _ in range(3)]
+
+    scheduler = ExpiryScheduler()
+    scheduler.load(streams)
+    assert len(scheduler) == 3
+    assert scheduler.next_expiry == streams[0].info.expires_at
+
+    receipt = streams[0].add_funds(min_stream_amount, sender=payer)
+    for log in receipt.events:
+        scheduler.apply_log(log)
+
+    for log in streams[1].cancel(sender=controller).events:
+        scheduler.apply_log(log)
+
+    assert streams[1].id not in scheduler
+    assert scheduler.expires_at(streams[0].id) == streams[0].info.expires_at
+    assert scheduler.next_expiry == streams[2].info.expires_at
+
+    receipt = stream_manager.contract.create_stream(
+        token, min_stream_amount, products, sender=payer
+    )
+    for log in receipt.events:
+        scheduler.apply_log(log)
+
+    new_stream = Stream(manager=stream_manager, id=receipt.events[-1].stream_id)
+
+    assert scheduler.expires_at(new_stream.id) == new_stream.info.expires_at
+
+    chain.mine(deltatime=int(new_stream.time_left.total_seconds()))
+    assert scheduler.pop_expired(chain.blocks.head.timestamp) == [streams[2].id, new_stream.id]
+    assert scheduler.pop_expired(streams[0].info.expires_at) == [streams[0].id]
+
+
+def test_expired_claim(chain, create_stream, min_stream_amount, controller):
+    stream = create_stream(amount=min_stream_amount)
+    scheduler = ExpiryScheduler()
+    scheduler.load([stream])
+
+    chain.mine(deltatime=int(stream.time_left.total_seconds()))
+    for log in stream.claim(sender=controller).events:
+        scheduler.apply_log(log)
+
+    # NOTE: Claim can be seen before the block it expired at is handled
+    assert scheduler.pop_expired(chain.blocks.head.timestamp) == [stream.id]
+
+
+def test_on_stream_expired(
+    monkeypatch, chain, stream_manager, create_app, create_stream, min_stream_amount, controller
+):
+    streams = [create_stream(amount=min_stream_amount) for _ in range(2)]
+
+    app = create_app()
+    expired = []
+    scans = []
+    active_streams = StreamManager.active_streams
+
+    def counted(self, *args, **kwargs):
+        scans.append(self)
+        return active_streams(self, *args, **kwargs)
+
+    monkeypatch.setattr(StreamManager, "active_streams", counted)
+
+    @stream_manager.on_stream_expired(app)
+    def handle_expired(stream):
+        expired.append(stream.id)
+
+    @stream_manager.on_stream_expired(app)
+    def handle_expired_again(stream):
+        pass
+
+    app.run("startup", None)
+    # NOTE: Every scheduler is loaded from a single scan
+    assert len(scans) == 1
+    app.apply(streams[1].cancel(sender=controller).events)
+
+    app.run("block", chain.blocks.head)
+    assert streams[0].id not in expired
+
+    chain.mine(deltatime=int(streams[0].time_left.total_seconds()))
+    app.run("block", chain.blocks.head)
+    assert streams[0].id in expired
+    assert streams[1].id not in expired  # NOTE: Cancelled
+
+
+def test_on_stream_expired_retries(
+    chain, stream_manager, create_app, create_stream, min_stream_amount, MIN_STREAM_LIFE
+):
+    app = create_app()
+    expired = []
+    failing = set()
+
+    @stream_manager.on_stream_expired(app)
+    def expire(stream):
+        if stream.id in failing:
+            raise ValueError("Could not update infrastructure")
+
+        expired.append(stream.id)
+
+    stream = create_stream(amount=min_stream_amount)
+    app.run("startup", None)
+    failing.add(stream.id)
+
+    chain.mine(deltatime=int(MIN_STREAM_LIFE.total_seconds()) + 60)
+    with pytest.raises(ValueError):
+        app.run("block", chain.blocks.head)
+
+    # NOTE: Not lost when the handler raises
+    failing.clear()
+    app.run("block", chain.blocks.head)
+    assert stream.id in expired
+
+    expired.clear()
+    app.run("block", chain.blocks.head)
+    assert stream.id not in expired
+
+
+def test_on_stream_expiring(
+    chain,
+    stream_manager,
+    create_app,
+    create_stream,
+    min_stream_amount,
+    MIN_STREAM_LIFE,
+    payer,
+    tmp_path,
+):
+    streams = [create_stream(amount=min_stream_amount) for _ in range(2)]
+    stream_ids = [stream.id for stream in streams]
+    within = MIN_STREAM_LIFE / 2
+    checkpoint = tmp_path / "warnings.db"
+
+    def start_bot():
+        app = create_app()
+        expiring = []
+
+        @stream_manager.on_stream_expiring(app, within=within, checkpoint=checkpoint)
+        def warn_owner(stream):
+            expiring.append(stream.id)
+
+        app.run("startup", None)
+        return app, expiring
+
+    def tick(app, expiring):
+        expiring.clear()
+        app.run("block", chain.blocks.head)
+        return [stream_id for stream_id in expiring if stream_id in stream_ids]
+
+    app, expiring = start_bot()
+    assert tick(app, expiring) == []
+
+    chain.mine(deltatime=int((MIN_STREAM_LIFE - within).total_seconds()) + 60)
+    assert tick(app, expiring) == stream_ids
+    assert tick(app, expiring) == []
+
+    # Funding a Stream, but not enough to get out of the window, does not warn again
+    app.apply(streams[0].add_funds(min_stream_amount // 10, sender=payer).events)
+    assert tick(app, expiring) == []
+
+    # ...but it does once it runs low again after being funded past the window
+    app.apply(streams[0].add_funds(min_stream_amount, sender=payer).events)
+    assert tick(app, expiring) == []
+
+    chain.mine(deltatime=int((streams[0].time_left - within).total_seconds()) + 60)
+    assert tick(app, expiring) == [streams[0].id]
+
+    # Restarting the bot does not warn about the same Streams again
+    app, expiring = start_bot()
+    assert tick(app, expiring) == []
+    assert timedelta(0) < streams[0].time_left <= within
+
+
+def test_on_stream_expiring_retries(
+    chain, stream_manager, create_app, token, products, min_stream_amount, MIN_STREAM_LIFE, payer
+):
+    app = create_app()
+    expiring = []
+    failing = set()
+
+    @stream_manager.on_stream_expiring(app, within=MIN_STREAM_LIFE * 2)
+    def warn_owner(stream):
+        if stream.id in failing:
+            raise ValueError("Could not send warning")
+
+        expiring.append(stream.id)
+
+    app.run("startup", None)
+    app.run("block", chain.blocks.head)
+
+    # NOTE: Created with less than `within` left, so it is already running low
+    token.approve(stream_manager.address, 2**256 - 1, sender=payer)
+    receipt = stream_manager.contract.create_stream(
+        token, min_stream_amount, products, sender=payer
+    )
+    app.apply(receipt.events)
+    stream_id = receipt.events.filter(stream_manager.contract.StreamCreated)[-1].stream_id
+    failing.add(stream_id)
+
+    with pytest.raises(ValueError):
+        app.run("block", chain.blocks.head)
+
+    # NOTE: Not lost when the handler raises
+    failing.clear()
+    app.run("block", chain.blocks.head)
+    assert stream_id in expiring
+
+    expiring.clear()
+    app.run("block", chain.blocks.head)
+    assert stream_id not in expiring
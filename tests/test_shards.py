@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from apepay import ClaimEngine, ShardedClaimEngine
+from apepay.shards import shard_ids
+
+
+@pytest.fixture
+def engine(stream_manager, multicall_support):
+    # NOTE: Local test provider is not thread-safe, so only use one worker (but many shards)
+    with ShardedClaimEngine(
+        stream_manager,
+        num_shards=2,
+        max_workers=1,
+        max_pending_batches=0,
+        use_multicall=multicall_support,
+    ) as engine:
+        yield engine
+
+
+def test_shard_ids():
+    assert shard_ids(range(10), 3) == [range(0, 4), range(4, 7), range(7, 10)]
+    assert shard_ids([5, 6], 4) == [[5], [6]]
+    assert shard_ids([], 4) == [[]]
+
+
+def test_shards(stream_manager, engine, streams, create_stream, min_stream_amount):
+    shards = engine.shards()
+    assert len(shards) == 2
+    assert [stream_id for shard in shards for stream_id in shard] == list(
+        range(stream_manager.contract.num_streams())
+    )
+
+    # NOTE: Shards are re-balanced as new Streams are created
+    new_stream = create_stream(amount=min_stream_amount)
+    assert engine.shards()[-1][-1] == new_stream.id
+
+
+def test_sharded_claim(chain, stream_manager, engine, streams, controller, multicall_support):
+    stream_ids = [stream.id for stream in streams]
+    expected = dict(
+        (s.id, amount) for s, amount in ClaimEngine(stream_manager).claimable_streams(stream_ids)
+    )
+
+    reports = engine.scan(stream_ids)
+    assert [report.stream_ids for report in reports] == [stream_ids[:2], stream_ids[2:]]
+    assert {
+        stream_id: amount for report in reports for stream_id, amount in report.claims.items()
+    } == expected
+    token = streams[0].info.token
+    assert ShardedClaimEngine.revenue(reports) == {token: sum(expected.values())}
+
+    # NOTE: Pinned to the block they were loaded at, even once the chain moves on
+    block = chain.blocks.head
+    claimable = list(engine.claimable_streams(stream_ids))
+    chain.mine(deltatime=60)
+    for stream, amount in claimable:
+        assert stream._info_pinned and stream._info_block_hash == block.hash
+        assert stream.info.block_number == block.number
+        assert stream.amount_claimable == amount
+
+    nonce = controller.nonce
+    batches = engine.run(controller, stream_ids)
+    assert [stream_id for batch in batches for stream_id in batch.stream_ids] == stream_ids
+    assert [batch.nonce for batch in batches] == list(range(nonce, nonce + len(batches)))
+    for batch in batches:
+        for stream_id in batch.stream_ids:
+            assert stream_manager.contract.streams(stream_id).last_claim == batch.receipt.timestamp
+
+
+def test_process_workers(stream_manager):
+    with ShardedClaimEngine(
+        stream_manager, network_choice=stream_manager.provider.network_choice
+    ) as engine:
+        # NOTE: Workers are only started once used, and are spawned (not forked) when they are
+        assert isinstance(engine.executor, ProcessPoolExecutor)
+        assert engine.executor._mp_context.get_start_method() == "spawn"
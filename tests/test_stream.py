@@ -4,6 +4,7 @@ from decimal import Decimal
 import ape
 import pytest
 
+from apepay import Stream
 from apepay import exceptions as apepay_exc
 
 
@@ -158,3 +159,70 @@ def test_cancel_stream(chain, token, payer, controller, MIN_STREAM_LIFE, stream_
     assert token.balanceOf(payer) == starting_balance + refundable
     assert token.balanceOf(controller) == 0  # No claim happened
     assert not stream.is_active
+
+
+def test_stream_info_cache(chain, payer, min_stream_amount, create_stream):
+    amount = min_stream_amount
+    stream = create_stream(amount=amount)
+    info = stream.info
+    assert info.block_number == chain.blocks.head.number
+    assert stream.info is info, "Not cached"
+
+    other_stream = Stream(manager=stream.manager, id=stream.id)
+    other_info = other_stream.info
+    assert other_info == info
+
+    # Modifying the Stream invalidates cached state for every copy of it
+    stream.add_funds(amount, sender=payer)
+    assert stream.info is not info
+    assert stream.info.funded_amount > info.funded_amount
+    assert other_stream.info is not other_info
+    assert other_stream.info == stream.info
+
+    # Modifications made by others are seen once the chain moves on
+    info = stream.info
+    stream.contract.fund_stream(stream.id, amount, sender=payer)
+    assert stream.info is not info
+    assert stream.info.funded_amount > info.funded_amount
+
+    # Reverted blocks are not used either
+    info = stream.info
+    with chain.isolate():
+        stream.contract.fund_stream(stream.id, amount, sender=payer)
+        assert stream.info.funded_amount > info.funded_amount
+
+    assert stream.info == info
+
+    # Pinning state to a specific block
+    pinned_info = stream.refresh(at_block=chain.blocks.head.number)
+    chain.mine(deltatime=60)
+    assert stream.info is pinned_info
+    assert stream.time_left == timedelta(seconds=pinned_info.time_left)
+    assert stream.contract.time_left(stream.id) < pinned_info.time_left
+    assert stream.amount_claimable == pinned_info.amount_claimable
+    assert stream.contract.amount_claimable(stream.id) > pinned_info.amount_claimable
+
+    # Pinned state is not replaced automatically
+    stream.manager._invalidate_stream(stream.id)
+    assert stream.info is pinned_info
+    assert stream.refresh().block_number == chain.blocks.head.number
+
+
+def test_stream_info_head_cache(chain, monkeypatch, payer, min_stream_amount, create_stream):
+    monkeypatch.setattr("apepay.manager.HEAD_TTL", 3600.0)
+    stream = create_stream(amount=min_stream_amount)
+    info = stream.info
+    head = stream.manager.head
+    assert head.number == info.block_number
+
+    # Latest block is only looked up again once a new block may have been produced
+    chain.mine(deltatime=60)
+    assert stream.manager.head is head
+    assert stream.info is info
+    assert stream.time_left == timedelta(seconds=info.time_left)
+    assert stream.amount_claimable == info.amount_claimable
+
+    # Modifications made using the SDK are still seen right away
+    stream.add_funds(min_stream_amount, sender=payer)
+    assert stream.info.funded_amount > info.funded_amount
+    assert stream.manager.head.number == chain.blocks.head.number
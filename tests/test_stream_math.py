@@ -0,0 +1,61 @@
+import pytest
+
+from apepay import exceptions as apepay_exc
+
+ONE_HOUR = 60 * 60
+# NOTE: Offsets (in seconds) from the start of the scenario to check at
+OFFSETS = [1, 59, ONE_HOUR - 1, ONE_HOUR, ONE_HOUR + 1, 2 * ONE_HOUR, 12 * ONE_HOUR, 24 * ONE_HOUR]
+
+
+def assert_matches_contract(chain, stream, info):
+    timestamp = chain.blocks.head.timestamp
+    assert info.time_left_at(timestamp) == stream.contract.time_left(stream.id)
+    assert info.amount_claimable_at(timestamp) == stream.contract.amount_claimable(stream.id)
+
+
+def check_offsets(chain, stream):
+    info = stream.refresh()
+    # NOTE: Snapshot values should also match at the block it was taken
+    assert info.time_left == stream.contract.time_left(stream.id)
+    assert info.amount_claimable == stream.contract.amount_claimable(stream.id)
+
+    for offset in OFFSETS:
+        chain.mine(timestamp=info.timestamp + offset)
+        assert_matches_contract(chain, stream, info)
+
+
+@pytest.fixture
+def stream(min_stream_amount, create_stream):
+    return create_stream(amount=min_stream_amount)
+
+
+def test_created(chain, stream):
+    check_offsets(chain, stream)
+
+
+def test_funded(chain, payer, stream):
+    chain.mine(deltatime=ONE_HOUR // 2)
+    stream.add_funds(stream.info.funded_amount // 3, sender=payer)
+    check_offsets(chain, stream)
+
+
+def test_claimed(chain, controller, stream):
+    chain.mine(deltatime=ONE_HOUR // 3)
+    stream.claim(sender=controller)
+    check_offsets(chain, stream)
+
+
+def test_cancelled(chain, controller, stream):
+    chain.mine(deltatime=ONE_HOUR // 4)
+    stream.cancel(sender=controller)
+    check_offsets(chain, stream)
+
+
+def test_cannot_compute_in_the_past(stream):
+    info = stream.info
+
+    with pytest.raises(apepay_exc.StreamComputationError):
+        info.amount_claimable_at(info.last_claim - 1)
+
+    # NOTE: Contract does not revert for this one
+    assert info.time_left_at(info.last_claim - 1) == info.expires_at - info.last_claim + 1
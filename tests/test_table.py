@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+
+from apepay import StreamInfo
+from apepay import exceptions as apepay_exc
+
+np = pytest.importorskip("numpy")
+from apepay import StreamTable  # noqa: E402
+
+TOKENS = ["0x" + "1" * 40, "0x" + "2" * 40]
+OWNERS = ["0x" + "3" * 40, "0x" + "4" * 40, "0x" + "5" * 40]
+START = 1_700_000_000
+
+
+def make_infos(funded_amount_scale: int) -> dict[int, StreamInfo]:
+    return {
+        stream_id: StreamInfo(
+            owner=OWNERS[stream_id % len(OWNERS)],
+            token=TOKENS[stream_id % len(TOKENS)],
+            funded_amount=funded_amount_scale * stream_id,  # NOTE: First stream is unfunded
+            expires_at=START + 3_600 * stream_id,
+            last_update=START,
+            last_claim=START + stream_id,
+            products=[],
+            block_number=1,
+            timestamp=START + 100,
+        )
+        for stream_id in range(20)
+    }
+
+
+@pytest.mark.parametrize(
+    "funded_amount_scale",
+    [10**6, 10**24],  # NOTE: Latter cannot be computed with `int64`
+    ids=["int64", "uint256"],
+)
+@pytest.mark.parametrize("offset", [100, 3_600, 7_200, 36_000, 100_000])
+def test_matches_stream_info(funded_amount_scale, offset):
+    infos = make_infos(funded_amount_scale)
+    table = StreamTable(infos)
+    timestamp = START + offset
+
+    assert len(table) == len(infos)
+    assert table.timestamp == START + 100
+    assert table.tokens == TOKENS
+    assert table.ids.tolist() == sorted(infos)
+
+    assert table.time_left_at(timestamp).tolist() == [
+        info.time_left_at(timestamp) for info in infos.values()
+    ]
+    assert table.amount_claimable_at(timestamp).tolist() == [
+        info.amount_claimable_at(timestamp) for info in infos.values()
+    ]
+    assert table.active_stream_ids(timestamp).tolist() == [
+        stream_id for stream_id, info in infos.items() if info.time_left_at(timestamp) > 0
+    ]
+    assert table.unclaimed_stream_ids(timestamp).tolist() == [
+        stream_id for stream_id, info in infos.items() if info.amount_claimable_at(timestamp) > 0
+    ]
+
+    horizon = timedelta(hours=5)
+    expected_revenue = dict.fromkeys(TOKENS, 0)
+    for info in infos.values():
+        expected_revenue[info.token] += info.amount_claimable_at(
+            timestamp + int(horizon.total_seconds())
+        ) - info.amount_claimable_at(timestamp)
+
+    assert table.projected_revenue(horizon, timestamp=timestamp) == expected_revenue
+
+
+def test_funding_rate():
+    infos = make_infos(10**18)
+    table = StreamTable(infos)
+
+    assert table.funding_rate().tolist() == pytest.approx(
+        [
+            info.funded_amount / (info.expires_at - info.last_claim) if info.funded_amount else 0
+            for info in infos.values()
+        ]
+    )
+
+    rates = table.funding_rate_by_token()
+    for token in TOKENS:
+        assert rates[token] == pytest.approx(
+            sum(
+                info.funded_amount / (info.expires_at - info.last_claim)
+                for info in infos.values()
+                if info.token == token and info.time_left > 0
+            )
+        )
+
+
+def test_timestamps_overflow_int64():
+    infos = make_infos(10**18)
+    # NOTE: Funded for (practically) forever
+    infos[1] = infos[1].model_copy(update=dict(expires_at=2**64))
+    table = StreamTable(infos)
+    timestamp = START + 3_600
+
+    assert table.expires_at[1] == 2**64
+    assert table.time_left_at(timestamp).tolist() == [
+        info.time_left_at(timestamp) for info in infos.values()
+    ]
+    assert table.amount_claimable_at(timestamp).tolist() == [
+        info.amount_claimable_at(timestamp) for info in infos.values()
+    ]
+    assert table.funding_rate()[1] == pytest.approx(
+        infos[1].funded_amount / (infos[1].expires_at - infos[1].last_claim)
+    )
+
+
+def test_cannot_compute_in_the_past():
+    table = StreamTable(make_infos(10**18))
+
+    with pytest.raises(apepay_exc.StreamComputationError):
+        table.amount_claimable_at(START)
+
+
+def test_from_manager(stream_manager, create_stream, min_stream_amount):
+    create_stream(amount=min_stream_amount)
+    streams = list(stream_manager.all_streams())
+    table = StreamTable.from_manager(stream_manager)
+
+    assert table.ids.tolist() == [stream.id for stream in streams]
+    assert table.time_left_at().tolist() == [stream.info.time_left for stream in streams]
+    assert table.amount_claimable_at().tolist() == [
+        stream.info.amount_claimable for stream in streams
+    ]
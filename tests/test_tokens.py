@@ -0,0 +1,36 @@
+from apepay import TokenRegistry, token_registry
+
+
+def test_registry(tmp_path, token):
+    path = tmp_path / "tokens.db"
+    registry = TokenRegistry(path)
+    assert len(registry) == 0
+    assert token.address not in registry
+
+    registry.prefill([token, token.address])
+    assert len(registry) == 1
+    assert token in registry
+
+    metadata = registry[token.address]
+    assert metadata.symbol == token.symbol()
+    assert metadata.decimals == token.decimals()
+    assert registry.contract(token.address) is registry.contract(token)
+
+    # NOTE: Restored from disk, without calling the token
+    restored = TokenRegistry(path)
+    assert restored[token.address] == metadata
+
+    restored.clear()
+    assert len(restored) == 0
+    assert len(TokenRegistry(path)) == 0
+
+
+def test_stream_token(create_stream, token, min_stream_amount):
+    stream = create_stream(amount=min_stream_amount)
+    assert stream.token.address == token.address
+    assert stream.token_decimals == token.decimals()
+    assert stream.token_symbol == token.symbol()
+
+    # NOTE: Shared by every Stream
+    assert token.address in token_registry
+    assert create_stream(amount=min_stream_amount).token is stream.token
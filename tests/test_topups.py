@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+import pytest
+
+from apepay import TopUpPlanner
+
+
+@pytest.fixture
+def streams(accounts, create_stream, min_stream_amount, token):
+    # NOTE: Unlike the shared fixture, owned by different payers and funded differently
+    other_payer = accounts[1]
+    token.DEBUG_mint(other_payer, min_stream_amount, sender=other_payer)
+    return [
+        create_stream(amount=min_stream_amount),
+        create_stream(amount=min_stream_amount, sender=other_payer),
+        create_stream(amount=2 * min_stream_amount),
+    ]
+
+
+def test_plan(stream_manager, streams, payer, MIN_STREAM_LIFE):
+    stream_ids = [stream.id for stream in streams]
+    planner = TopUpPlanner(stream_manager, stream_life=2 * MIN_STREAM_LIFE, owners=[payer])
+    top_ups = planner.plan(stream_ids)
+
+    # NOTE: Last Stream already has enough time left
+    assert [top_up.stream_id for top_up in top_ups] == stream_ids[:1]
+    assert top_ups[0].amount == pytest.approx(
+        streams[0].info.funded_amount - streams[0].info.amount_claimable, rel=1e-3
+    )
+    assert TopUpPlanner.cost(top_ups) == {streams[0].info.token: top_ups[0].amount}
+
+
+def test_run(chain, stream_manager, streams, payer, token, MIN_STREAM_LIFE):
+    stream_ids = [stream.id for stream in streams]
+    stream_life = 3 * MIN_STREAM_LIFE
+    planner = TopUpPlanner(stream_manager, stream_life=stream_life, max_pending_transactions=0)
+    token.approve(stream_manager.address, 0, sender=payer)
+
+    # NOTE: Extra, since a few seconds pass before it is run
+    cost = TopUpPlanner.cost(planner.plan(stream_ids))
+    token.DEBUG_mint(payer, 2 * cost[token.address], sender=payer)
+    balance = token.balanceOf(payer)
+    top_ups = planner.run(payer, stream_ids)
+
+    assert [top_up.stream_id for top_up in top_ups] == stream_ids
+    assert all(top_up.error is None for top_up in top_ups)
+    assert token.balanceOf(payer) == balance - TopUpPlanner.cost(top_ups)[token.address]
+
+    for stream, top_up in zip(streams, top_ups):
+        info = stream_manager.contract.streams(stream.id)
+        assert info.expires_at == top_up.expires_at
+        # NOTE: A few seconds may have passed since the plan was made
+        assert (
+            top_up.expires_at - chain.blocks.head.timestamp
+            >= (stream_life - timedelta(seconds=len(top_ups) + 1)).total_seconds()
+        )
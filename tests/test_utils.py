@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from apepay.utils import async_wrap_iter
+
+
+class Source:
+    """Blocking generator that records how far it was consumed, and if it was closed"""
+
+    def __init__(self, num_items: int, fail_at: int | None = None):
+        self.num_items = num_items
+        self.fail_at = fail_at
+        self.produced = 0
+        self.closed = threading.Event()
+        self.threads: set[str] = set()
+
+    def __iter__(self):
+        try:
+            for item in range(self.num_items):
+                self.threads.add(threading.current_thread().name)
+                if item == self.fail_at:
+                    raise ValueError("producer failed")
+
+                self.produced += 1
+                yield item
+
+        finally:
+            self.closed.set()
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+@pytest.mark.parametrize("prefetch", [1, 4])
+def test_order(batch_size, prefetch):
+    source = Source(50)
+
+    async def consume():
+        return [item async for item in async_wrap_iter(iter(source), prefetch, batch_size)]
+
+    assert asyncio.run(consume()) == list(range(50))
+    assert all(name.startswith("apepay") for name in source.threads)
+
+
+def test_exception_has_traceback():
+    source = Source(10, fail_at=5)
+
+    async def consume():
+        return [item async for item in async_wrap_iter(iter(source), batch_size=2)]
+
+    with pytest.raises(ValueError, match="producer failed") as exc_info:
+        asyncio.run(consume())
+
+    # NOTE: Traceback includes the frame that raised it in the producer thread
+    frames = traceback.extract_tb(exc_info.value.__traceback__)
+    assert any(frame.name == "__iter__" for frame in frames)
+
+
+def test_close_stops_producer():
+    source = Source(1_000)
+    prefetch, batch_size = 2, 5
+
+    async def consume():
+        it = async_wrap_iter(iter(source), prefetch=prefetch, batch_size=batch_size)
+        assert [await it.__anext__() for _ in range(3)] == [0, 1, 2]
+        await asyncio.sleep(0.1)  # NOTE: Let it prefetch as much as it is allowed
+        await it.aclose()
+
+    asyncio.run(consume())
+    assert source.closed.wait(timeout=5)
+    # NOTE: Bounded by the batch being consumed, plus the prefetched batches
+    assert source.produced <= (prefetch + 1) * batch_size
+
+
+def test_cancel_stops_producer():
+    source = Source(1_000)
+    started = threading.Event()
+
+    def slow_source():
+        for item in source:
+            started.set()
+            threading.Event().wait(0.01)
+            yield item
+
+    async def consume():
+        async for _ in async_wrap_iter(slow_source()):
+            pass
+
+    async def cancel():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    assert started.is_set()
+    assert source.closed.wait(timeout=5)
+    assert source.produced < 1_000
+
+
+def test_single_worker_does_not_deadlock():
+    # NOTE: The producer must not hold the only thread while waiting for the consumer
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop_calls = []
+
+    async def consume():
+        async for item in async_wrap_iter(range(10), prefetch=1, executor=executor):
+            loop_calls.append(await asyncio.get_running_loop().run_in_executor(executor, abs, item))
+
+    asyncio.run(asyncio.wait_for(consume(), timeout=5))
+    assert loop_calls == list(range(10))
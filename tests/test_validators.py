@@ -1,5 +1,7 @@
 import pytest
 
+from apepay import StreamManager
+
 
 @pytest.mark.parametrize("num_validators", [1, 2, 3])
 def test_set_validators(stream_manager, controller, create_validator, num_validators):
@@ -25,3 +27,29 @@ def test_set_validators(stream_manager, controller, create_validator, num_valida
     assert obselete not in stream_manager.validators
     assert replacement in stream_manager.validators
     assert len(stream_manager.validators) == len(new_validators)
+
+
+def test_validators_cache(monkeypatch, chain, stream_manager, controller, create_validator):
+    loads = []
+    load_validators = StreamManager._load_validators
+
+    def counting_load(self, block_id):
+        loads.append(block_id)
+        return load_validators(self, block_id)
+
+    monkeypatch.setattr(StreamManager, "_load_validators", counting_load)
+
+    new_validator = create_validator()
+    old_validators = stream_manager.validators
+    old_block = chain.blocks.head
+    assert stream_manager.validators == old_validators
+    assert loads == [old_block.number]  # NOTE: Same block, so read from cache
+
+    receipt = stream_manager.add_validators(new_validator, sender=controller)
+    assert new_validator in stream_manager.validators
+    assert new_validator in stream_manager.validators_at(receipt.block_number)
+    assert loads == [old_block.number]  # NOTE: New set is known from the receipt
+
+    # NOTE: Past validator sets can still be looked up
+    assert stream_manager.validators_at(old_block) == old_validators
+    assert new_validator not in stream_manager.validators_at(old_block)